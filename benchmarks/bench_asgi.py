@@ -0,0 +1,259 @@
+"""
+Escalado con la concurrencia: GET del perfil con N conexiones keep-alive simultáneas
+contra
+    - WSGI (ThreadedWSGIServer de Django, un hilo por conexión) + ProfileView (sync)
+    - ASGI (servidor asyncio mínimo en el proceso) + ProfileView (sync, pasa por sync_to_async)
+    - ASGI + AsyncProfileView (async nativa)
+
+El generador de carga corre en otro proceso (asyncio, sin Django) para no competir
+por el GIL con el servidor. No hace falta uvicorn: el servidor ASGI es un HTTP/1.1
+básico con keep-alive suficiente para estas peticiones.
+
+Uso:
+    DB_ENGINE=django.db.backends.sqlite3 python -m benchmarks.bench_asgi \\
+        [--concurrency 1,10,100,1000] [--requests-per-connection 5] [--output asgi.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import resource
+import socket
+import threading
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+HOST = '127.0.0.1'
+
+
+# ---------- servidor ASGI mínimo ---------- #
+
+class ASGIServer:
+    """
+    HTTP/1.1 con keep-alive sobre asyncio que llama a una aplicación ASGI; corre su
+    propio bucle de eventos en un hilo.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        return self.port
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(asyncio.start_server(self._connection, HOST, 0, backlog=4096))
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        async def close():
+            self.server.close()
+            await self.server.wait_closed()
+        asyncio.run_coroutine_threadsafe(close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                request_line, *header_lines = head.decode('latin-1').split('\r\n')[:-2]
+                method, target, _ = request_line.split(' ', 2)
+                headers = [tuple(line.split(':', 1)) for line in header_lines]
+                headers = [(name.strip().lower().encode('latin-1'), value.strip().encode('latin-1')) for name, value in headers]
+                length = int(dict(headers).get(b'content-length', b'0'))
+                body = await reader.readexactly(length) if length else b''
+                path, _, query = target.partition('?')
+                keep_alive = dict(headers).get(b'connection', b'').lower() != b'close'
+                writer.write(await self._call(method, path, query, headers, body, writer))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _call(self, method, path, query, headers, body, writer):
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method, 'scheme': 'http',
+            'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+            'headers': headers, 'client': writer.get_extra_info('peername'), 'server': (HOST, self.port),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        start = {}
+        chunks = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.application(scope, receive, send)
+        content = b''.join(chunks)
+        response_headers = [(name, value) for name, value in start.get('headers', []) if name.lower() != b'content-length']
+        lines = [f"HTTP/1.1 {start['status']} -".encode()]
+        lines += [name + b': ' + value for name, value in response_headers]
+        lines.append(b'Content-Length: ' + str(len(content)).encode())
+        return b'\r\n'.join(lines) + b'\r\n\r\n' + content
+
+
+# ---------- generador de carga (otro proceso) ---------- #
+
+async def _client(port, path, headers, requests, latencies, errors):
+    request = (f"GET {path} HTTP/1.1\r\nHost: {HOST}\r\n" + ''.join(f"{k}: {v}\r\n" for k, v in headers.items())
+               + "\r\n").encode()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, port)
+    except OSError:
+        errors.append(requests)
+        return
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b'\r\n\r\n')
+            status = int(head.split(b' ', 2)[1])
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            if status != 200:
+                errors.append(1)
+            latencies.append(time.perf_counter() - start)
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        errors.append(1)
+    finally:
+        writer.close()
+
+
+def _load(port, path, headers, concurrency, requests, queue):
+    async def main():
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(port, path, headers, requests, latencies, errors) for _ in range(concurrency)))
+        return latencies, sum(errors), time.perf_counter() - start
+
+    queue.put(asyncio.run(main()))
+
+
+def load(port, path, headers, concurrency, requests):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_load, args=(port, path, headers, concurrency, requests, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+# ---------- corrida ---------- #
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def raise_file_limit():
+    # cada conexión es un descriptor en el cliente y otro en el servidor
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+
+
+def run(levels=(1, 10, 100, 1000), requests=5):
+    from django.core.asgi import get_asgi_application
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+    from django.core.wsgi import get_wsgi_application
+
+    from companies.models import Company
+    from users.models import User
+    from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+
+    raise_file_limit()
+    company = Company.objects.create(company_name="Bench", nit="900000001", cell="3000000000", email="bench@empresa.co")
+    user = User.objects.create_user(identification_number="100200300", email="bench@empresa.co",
+                                    username="bench", rol="cajero", company=company, password=None)
+    headers = {'Authorization': f"Bearer {CustomTokenObtainPairSerialier.get_token(user).access_token}"}
+
+    class QuietHandler(WSGIRequestHandler):
+        def setup(self):
+            super().setup()
+            # cabeceras y cuerpo salen en escrituras separadas: sin esto Nagle + ACK
+            # retardado suman ~40 ms por petición (asyncio ya activa TCP_NODELAY)
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, *args):
+            pass
+
+    class WSGIServer(ThreadedWSGIServer):
+        request_queue_size = 4096
+
+    wsgi = WSGIServer((HOST, 0), QuietHandler)
+    wsgi.set_app(get_wsgi_application())
+    threading.Thread(target=wsgi.serve_forever, daemon=True).start()
+    asgi = ASGIServer(get_asgi_application())
+    asgi_port = asgi.start()
+
+    targets = [
+        ('WSGI + vista sync', wsgi.server_address[1], '/api/v1/auth/profile/'),
+        ('ASGI + vista sync', asgi_port, '/api/v1/auth/profile/'),
+        ('ASGI + vista async', asgi_port, '/api/v1/auth/async/profile/'),
+    ]
+    results = []
+    try:
+        print(f"{'servidor':<22}{'conexiones':>11}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errores':>9}")
+        for label, port, path in targets:
+            load(port, path, headers, 1, 20)   # calentamiento
+            for concurrency in levels:
+                latencies, errors, elapsed = load(port, path, headers, concurrency, requests)
+                latencies.sort()
+                row = {
+                    'server': label, 'concurrency': concurrency, 'requests': len(latencies), 'errors': errors,
+                    'throughput_rps': round(len(latencies) / elapsed, 1),
+                    'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+                    'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+                }
+                results.append(row)
+                print(f"{label:<22}{concurrency:>11}{row['throughput_rps']:>10.1f}{row['p50_ms'] or 0:>10.2f}"
+                      f"{row['p99_ms'] or 0:>10.2f}{errors:>9}")
+    finally:
+        wsgi.shutdown()
+        wsgi.server_close()
+        asgi.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WSGI vs ASGI con conexiones concurrentes")
+    parser.add_argument('--concurrency', default='1,10,100,1000', help='Niveles de conexiones simultáneas')
+    parser.add_argument('--requests-per-connection', type=int, default=5)
+    parser.add_argument('--output', help='Archivo JSON donde guardar el resultado')
+    args = parser.parse_args()
+
+    setup_django()
+    with test_database():
+        results = run([int(level) for level in args.concurrency.split(',')], args.requests_per_connection)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compara peticiones/segundo de GET /api/v1/auth/profile/ con la autenticación JWT
+original de simplejwt (consulta el usuario en cada petición) y con
+PrincipalJWTAuthentication (principal desde los claims + LRU).
+
+Uso:
+    DB_ENGINE=django.db.backends.sqlite3 python -m benchmarks.bench_profile [peticiones]
+"""
+
+import sys
+
+from benchmarks.utils import measure_throughput, setup_django, test_database
+
+
+def run(requests=2000):
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    from companies.models import Company
+    from users.authentication import PrincipalJWTAuthentication
+    from users.models import User
+    from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+    from users.views.users_views import ProfileView
+
+    company = Company.objects.create(company_name="Bench", nit="900000001", cell="3000000000", email="bench@empresa.co")
+    user = User.objects.create_user(identification_number="100200300", email="bench@empresa.co",
+                                    username="bench", rol="admin", company=company, password="bench-pass-123")
+    token = str(CustomTokenObtainPairSerialier.get_token(user).access_token)
+
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+    url = "/api/v1/auth/profile/"
+
+    def profile():
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+
+    results = {}
+    original_classes = ProfileView.authentication_classes
+    try:
+        for label, auth_class in (("JWTAuthentication (antes)", JWTAuthentication),
+                                  ("PrincipalJWTAuthentication (después)", PrincipalJWTAuthentication)):
+            ProfileView.authentication_classes = [auth_class]
+            rps = measure_throughput(profile, requests=requests)
+            with CaptureQueriesContext(connection) as ctx:
+                profile()
+            results[label] = (rps, len(ctx.captured_queries))
+    finally:
+        ProfileView.authentication_classes = original_classes
+
+    for label, (rps, queries) in results.items():
+        print(f"{label:<40} {rps:>10.1f} req/s  {queries} consultas/petición")
+    return results
+
+
+if __name__ == "__main__":
+    setup_django()
+    with test_database():
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
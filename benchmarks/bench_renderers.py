@@ -0,0 +1,78 @@
+"""
+Micro-benchmark de renderizado: JSONRenderer de DRF contra FastJSONRenderer (orjson)
+y MessagePackRenderer (si `msgpack` está instalado), sobre listados reales de
+empresas y de usuarios (con fechas) ya serializados.
+
+Uso:
+    DB_ENGINE=django.db.backends.sqlite3 python -m benchmarks.bench_renderers [filas]
+"""
+
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(rows=5000):
+    from rest_framework import serializers
+    from rest_framework.renderers import JSONRenderer
+
+    from commons.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+    from companies.models import Company
+    from companies.serializer_company import CompanySerializer
+    from users.models import User
+    from users.services import bulk_insert_users
+
+    class UserListSerializer(serializers.ModelSerializer):
+        class Meta:
+            model = User
+            fields = ['id', 'identification_number', 'email', 'username', 'rol', 'is_active',
+                      'company', 'date_joined', 'updated_at']
+
+    Company.objects.bulk_create([
+        Company(company_name=f"Panadería Ñandú {i:05d}", nit=f"900{i:06d}", address=f"Calle {i} # 10-20",
+                cell="3000000000", phone="6010000000", email=f"empresa{i}@empresa.co")
+        for i in range(rows)
+    ], batch_size=1000)
+    company = Company.objects.order_by('id').first()
+    bulk_insert_users([
+        User(identification_number=f"2000{i:06d}", email=f"usuario{i}@empresa.co", username=f"José Pérez {i}",
+             rol="cliente", company=company, password="!")
+        for i in range(rows)
+    ])
+
+    payloads = {
+        'empresas': {'results': CompanySerializer(Company.objects.all(), many=True).data},
+        'usuarios': {'results': UserListSerializer(User.objects.all(), many=True).data},
+    }
+    candidates = [('JSONRenderer (DRF)', JSONRenderer())]
+    if orjson is not None:
+        candidates.append(('FastJSONRenderer (orjson)', FastJSONRenderer()))
+    if msgpack is not None:
+        candidates.append(('MessagePackRenderer', MessagePackRenderer()))
+
+    results = {}
+    for payload_name, payload in payloads.items():
+        for label, renderer in candidates:
+            size = len(renderer.render(payload, renderer.media_type, {}))
+            elapsed = best_of(lambda: renderer.render(payload, renderer.media_type, {}))
+            results[(payload_name, label)] = (elapsed, size)
+
+    for (payload_name, label), (elapsed, size) in results.items():
+        print(f"{payload_name:<10} {label:<28} {elapsed * 1000:>8.2f} ms  {size:>9} bytes")
+    return results
+
+
+if __name__ == "__main__":
+    setup_django()
+    with test_database():
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
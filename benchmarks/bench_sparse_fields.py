@@ -0,0 +1,69 @@
+"""
+Compara tamaño de respuesta y peticiones/segundo de los listados con todos los campos
+y con ?fields= (sparse fieldsets), que además reduce las columnas leídas con .only().
+
+La caché de respuestas de CompanyViewSet se vacía en cada petición para medir la
+construcción de la respuesta y no el acierto de caché.
+
+Uso:
+    DB_ENGINE=django.db.backends.sqlite3 python -m benchmarks.bench_sparse_fields [peticiones]
+"""
+
+import sys
+
+from benchmarks.utils import measure_throughput, setup_django, test_database
+
+
+def run(requests=500, rows=200):
+    from django.core.cache import cache
+    from django.test import Client
+
+    from companies.models import Company
+    from users.models import User
+    from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+    from users.services import bulk_insert_users
+
+    Company.objects.bulk_create([
+        Company(company_name=f"Empresa {i:04d}", nit=f"900{i:06d}", address=f"Calle {i} # 10-20",
+                cell="3000000000", phone="6010000000", email=f"empresa{i}@empresa.co")
+        for i in range(rows)
+    ])
+    company = Company.objects.get(email="empresa0@empresa.co")
+    admin = User.objects.create_user(identification_number="100200300", email="bench@empresa.co",
+                                     username="bench", rol="admin", company=company, password="bench-pass-123")
+    bulk_insert_users([
+        User(identification_number=f"2000{i:06d}", email=f"usuario{i}@empresa.co", username=f"Usuario {i}",
+             rol="cliente", company=company, password="!")
+        for i in range(rows - 1)
+    ])
+    token = str(CustomTokenObtainPairSerialier.get_token(admin).access_token)
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    scenarios = (
+        ("empresas (todos los campos)", "/api/v1/companies/", {'page_size': rows}),
+        ("empresas ?fields=id,company_name", "/api/v1/companies/", {'page_size': rows, 'fields': 'id,company_name'}),
+        ("usuarios (todos los campos)", f"/api/v1/companies/{company.pk}/users/", {'page_size': rows}),
+        ("usuarios ?fields=id,email", f"/api/v1/companies/{company.pk}/users/", {'page_size': rows, 'fields': 'id,email'}),
+    )
+
+    results = {}
+    for label, url, params in scenarios:
+        def fetch():
+            cache.clear()
+            response = client.get(url, params)
+            assert response.status_code == 200, response.content
+            return response
+
+        size = len(fetch().content)
+        rps = measure_throughput(fetch, requests=requests, warmup=10)
+        results[label] = (size, rps)
+
+    for label, (size, rps) in results.items():
+        print(f"{label:<40} {size:>9} bytes  {rps:>8.1f} req/s")
+    return results
+
+
+if __name__ == "__main__":
+    setup_django()
+    with test_database():
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
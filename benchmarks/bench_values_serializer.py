@@ -0,0 +1,65 @@
+"""
+Compara CompanySerializer/UserSerializer (instancias del ORM + campos de DRF) con
+sus ValuesSerializer (.values() + transformador precompilado) serializando 1k y 10k filas.
+
+Uso:
+    DB_ENGINE=django.db.backends.sqlite3 python -m benchmarks.bench_values_serializer [repeticiones]
+"""
+
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(repeat=5, sizes=(1000, 10000)):
+    from companies.models import Company
+    from companies.serializer_company import CompanySerializer, CompanyValuesSerializer
+    from users.models import User
+    from users.serializers import UserSerializer, UserValuesSerializer
+    from users.services import bulk_insert_users
+
+    total = max(sizes)
+    Company.objects.bulk_create([
+        Company(company_name=f"Empresa {i:05d}", nit=f"900{i:06d}", address=f"Calle {i} # 10-20",
+                cell="3000000000", phone="6010000000", email=f"empresa{i}@empresa.co")
+        for i in range(total)
+    ], batch_size=1000)
+    company = Company.objects.order_by('id').first()
+    for start in range(0, total, 1000):
+        bulk_insert_users([
+            User(identification_number=f"2000{i:06d}", email=f"usuario{i}@empresa.co", username=f"Usuario {i}",
+                 rol="cliente", company=company, password="!")
+            for i in range(start, min(start + 1000, total))
+        ])
+
+    results = {}
+    for label, queryset, model_serializer, values_serializer in (
+        ("empresas", Company.objects.order_by('id'), CompanySerializer, CompanyValuesSerializer),
+        ("usuarios", User.objects.order_by('id'), UserSerializer, UserValuesSerializer),
+    ):
+        for size in sizes:
+            rows = queryset[:size]
+            drf = best_of(lambda: model_serializer(rows, many=True).data, repeat)
+            fast = best_of(lambda: values_serializer.serialize_queryset(rows), repeat)
+            results[(label, size)] = (drf, fast)
+
+    for (label, size), (drf, fast) in results.items():
+        print(f"{label:<10} {size:>6} filas  ModelSerializer {drf * 1000:>8.1f} ms  "
+              f"ValuesSerializer {fast * 1000:>8.1f} ms  x{drf / fast:.1f}")
+    return results
+
+
+if __name__ == "__main__":
+    setup_django()
+    with test_database():
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
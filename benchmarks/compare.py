@@ -0,0 +1,89 @@
+"""
+Compara dos resultados de benchmarks.suite (base y cambio) y marca regresiones:
+caída de peticiones/segundo o subida de la latencia p95 por encima del umbral (%),
+cualquier consulta SQL extra por petición o errores nuevos. Termina con código 1 si
+hay alguna, para usarlo en CI.
+
+Uso:
+    python -m benchmarks.compare base.json cambio.json [--threshold 10]
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def change(base, head):
+    if not base or head is None:
+        return None
+    return (head - base) / base * 100
+
+
+def compare(base, head, threshold=10.0):
+    """
+    Filas (escenario, métrica, base, cambio, variación %, es_regresión) de los
+    escenarios presentes en ambos resultados.
+    """
+    rows = []
+    pairs = [(name, stats, head['scenarios'][name]) for name, stats in base['scenarios'].items()
+             if name in head['scenarios']]
+    pairs.append(('TOTAL', base['total'], head['total']))
+    for name, old, new in pairs:
+        delta = change(old['throughput_rps'], new['throughput_rps'])
+        rows.append((name, 'req/s', old['throughput_rps'], new['throughput_rps'], delta,
+                     delta is not None and delta < -threshold))
+        delta = change(old['latency_ms']['p95'], new['latency_ms']['p95'])
+        rows.append((name, 'p95 ms', old['latency_ms']['p95'], new['latency_ms']['p95'], delta,
+                     delta is not None and delta > threshold))
+        # las consultas no dependen de la máquina: cualquier aumento es una regresión
+        delta = change(old['queries_per_request'], new['queries_per_request'])
+        rows.append((name, 'SQL/pet', old['queries_per_request'], new['queries_per_request'], delta,
+                     (new['queries_per_request'] or 0) > (old['queries_per_request'] or 0)))
+        rows.append((name, 'errores', old['errors'], new['errors'], change(old['errors'], new['errors']),
+                     new['errors'] > old['errors']))
+    return rows
+
+
+def warnings(base, head):
+    # resultados con distinta configuración no son comparables del todo
+    keys = ('transport', 'database', 'requests', 'seed', 'mix')
+    return [f"'{key}' difiere: {base['meta'].get(key)!r} vs {head['meta'].get(key)!r}"
+            for key in keys if base['meta'].get(key) != head['meta'].get(key)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Variación (%%) tolerada en req/s y p95 (por defecto 10)')
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    for warning in warnings(base, head):
+        print(f"AVISO: {warning}")
+    print(f"base={base['meta'].get('commit') or args.base}  cambio={head['meta'].get('commit') or args.head}")
+    print(f"{'escenario':<16}{'métrica':<10}{'base':>10}{'cambio':>10}{'var %':>9}")
+
+    rows = compare(base, head, args.threshold)
+    for name, metric, old, new, delta, regression in rows:
+        delta_text = f"{delta:+.1f}" if delta is not None else '-'
+        flag = '  <- REGRESIÓN' if regression else ''
+        print(f"{name:<16}{metric:<10}{old if old is not None else '-':>10}{new if new is not None else '-':>10}"
+              f"{delta_text:>9}{flag}")
+
+    regressions = sum(1 for *_, regression in rows if regression)
+    if regressions:
+        print(f"{regressions} regresiones (umbral {args.threshold}%)")
+        return 1
+    print("Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,433 @@
+"""
+Reproduce una mezcla realista de peticiones contra la API de autenticación y de
+empresas (login, refresh, perfil, registro, creación de empresa con admin y listado
+de empresas) y reporta, por escenario, peticiones/segundo, latencia p50/p95/p99 y
+consultas SQL por petición. El resultado se guarda en JSON para comparar commits
+con benchmarks.compare.
+
+Transportes:
+    client  django.test.Client (sin HTTP, solo middlewares y vistas)
+    wsgi    servidor WSGI en un hilo (127.0.0.1, puerto libre) con http.client
+    asgi    core.asgi.application llamada en el proceso con un bucle de asyncio
+
+Las peticiones se hacen una tras otra y el orden sale de --seed, así dos corridas con
+la misma semilla hacen exactamente las mismas peticiones. Los límites de tasa
+(commons.throttling) se desactivan durante la corrida.
+
+Uso:
+    DB_ENGINE=django.db.backends.sqlite3 python -m benchmarks.suite \\
+        [--transport client|wsgi|asgi] [--requests 1000] [--seed 42] \\
+        [--mix profile=40,login=20] [--output resultados.json]
+"""
+
+import argparse
+import asyncio
+import http.client
+import io
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_MIX = {
+    'profile': 40,
+    'login': 15,
+    'refresh': 15,
+    'company_list': 15,
+    'register': 10,
+    'company_create': 5,
+}
+
+PASSWORD = 'bench-pass-123'
+
+
+# ---------- transportes ---------- #
+
+class ClientTransport:
+    name = 'client'
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.generic(method, path, data=body or b'', content_type='application/json',
+                                       headers=headers or {})
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, content
+
+    def close(self):
+        pass
+
+
+class WSGITransport:
+    name = 'wsgi'
+
+    def __init__(self):
+        from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+        from core.wsgi import application
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.server = make_server('127.0.0.1', 0, application, server_class=WSGIServer, handler_class=QuietHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.host, self.port = self.server.server_address
+
+    def request(self, method, path, body=None, headers=None):
+        # wsgiref habla HTTP/1.0: una conexión por petición
+        connection = http.client.HTTPConnection(self.host, self.port)
+        try:
+            connection.request(method, path, body=body,
+                               headers={'Content-Type': 'application/json', **(headers or {})})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+class ASGITransport:
+    """
+    Servidor ASGI mínimo en el proceso: arma el scope HTTP y junta los mensajes de
+    respuesta, sin depender de uvicorn o daphne.
+    """
+    name = 'asgi'
+
+    def __init__(self):
+        from core.asgi import application
+
+        self.application = application
+        self.loop = asyncio.new_event_loop()
+
+    def request(self, method, path, body=None, headers=None):
+        return self.loop.run_until_complete(self._request(method, path, body or b'', headers or {}))
+
+    async def _request(self, method, path, body, headers):
+        url = urlsplit(path)
+        headers = {'Content-Type': 'application/json', **headers, 'Content-Length': str(len(body))}
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()],
+            'client': ('127.0.0.1', 50000),
+            'server': ('127.0.0.1', 80),
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = None
+        chunks = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()   # como un cliente que no se desconecta
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.application(scope, receive, send)
+        return status, b''.join(chunks)
+
+    def close(self):
+        self.loop.close()
+
+
+TRANSPORTS = {transport.name: transport for transport in (ClientTransport, WSGITransport, ASGITransport)}
+
+
+# ---------- escenarios ---------- #
+
+class State:
+    """
+    Datos de la corrida: usuarios sembrados con sus tokens y contadores para que los
+    registros y empresas nuevas no choquen.
+    """
+
+    def __init__(self, rng, users, company_id):
+        self.rng = rng
+        self.users = users          # [(email, access, refresh)]
+        self.company_id = company_id
+        self.sequence = 0
+
+    def user(self):
+        return self.rng.choice(self.users)
+
+    def next_id(self):
+        self.sequence += 1
+        return self.sequence
+
+
+def bearer(access):
+    return {'Authorization': f"Bearer {access}"}
+
+
+def scenario_login(state):
+    email, _, _ = state.user()
+    return 'login', 'POST', {'email': email, 'password': PASSWORD}, {}, 200
+
+
+def scenario_refresh(state):
+    _, _, refresh = state.user()
+    return 'token_refresh', 'POST', {'refresh': refresh}, {}, 200
+
+
+def scenario_profile(state):
+    _, access, _ = state.user()
+    return 'profile', 'GET', None, bearer(access), 200
+
+
+def scenario_register(state):
+    number = state.next_id()
+    return 'register', 'POST', {
+        'identification_number': f"r{number}", 'email': f"registro{number}@bench.co", 'username': f"registro {number}",
+        'rol': 'cliente', 'password': PASSWORD, 'company': state.company_id,
+    }, {}, 201
+
+
+def scenario_company_create(state):
+    number = state.next_id()
+    return 'companies/create-with-admin-list', 'POST', {
+        'company_name': f"Empresa {number}", 'nit': f"9{number:08d}", 'cell': '3000000000', 'email': f"empresa{number}@bench.co",
+        'admin': {'identification_number': f"a{number}", 'email': f"admin{number}@bench.co",
+                  'username': f"admin {number}", 'rol': 'admin', 'password': PASSWORD},
+    }, {}, 201
+
+
+def scenario_company_list(state):
+    return 'companies-list', 'GET', None, {}, 200
+
+
+SCENARIOS = {
+    'login': scenario_login,
+    'refresh': scenario_refresh,
+    'profile': scenario_profile,
+    'register': scenario_register,
+    'company_create': scenario_company_create,
+    'company_list': scenario_company_list,
+}
+
+
+def parse_mix(value):
+    """
+    'profile=40,login=20' -> {'profile': 40, 'login': 20}
+    """
+    mix = {}
+    for item in filter(None, value.split(',')):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido '{name}'. Disponibles: {', '.join(SCENARIOS)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Peso inválido para '{name}': '{weight}'")
+    if not mix or sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("La mezcla necesita al menos un escenario con peso positivo")
+    return mix
+
+
+# ---------- corrida ---------- #
+
+def percentile(sorted_values, fraction):
+    # rango más cercano
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, queries):
+    latencies = sorted(latencies)
+    elapsed = sum(latencies)
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': errors,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': round(elapsed / count * 1000, 3) if count else None,
+            **{name: round(percentile(latencies, fraction) * 1000, 3) if count else None
+               for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))},
+            'max': round(latencies[-1] * 1000, 3) if count else None,
+        },
+        'queries_per_request': round(queries / count, 2) if count else None,
+    }
+
+
+def route_queries(snapshot):
+    totals = {}
+    for (name, labels), value in snapshot.counters.items():
+        if name == 'db_queries_total':
+            totals[labels[0]] = totals.get(labels[0], 0) + value
+    return totals
+
+
+def seed_data(users):
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+
+    from companies.models import Company
+    from users.models import User
+    from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+
+    call_command('permisos_roles', stdout=io.StringIO())
+    company = Company.objects.create(company_name='Bench', nit='800000001', cell='3000000000', email='bench@bench.co')
+    password = make_password(PASSWORD)   # un solo hash para todos los usuarios sembrados
+    seeded = []
+    for index in range(users):
+        user = User.objects.create_user(identification_number=f"u{index}", email=f"usuario{index}@bench.co",
+                                        username=f"usuario {index}", rol='admin' if index == 0 else 'cajero',
+                                        company=company, password=None)
+        User.objects.filter(pk=user.pk).update(password=password)
+        refresh = CustomTokenObtainPairSerialier.get_token(user)
+        seeded.append((user.email, str(refresh.access_token), str(refresh)))
+    return company.pk, seeded
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(transport='client', requests=1000, seed=42, mix=None, warmup=50, users=20):
+    import django
+    from django.db import connection
+    from django.urls import reverse
+
+    from commons import metrics
+    from commons.throttling import SlidingWindowRateThrottle
+
+    mix = mix or DEFAULT_MIX
+    rng = random.Random(seed)
+    company_id, seeded = seed_data(users)
+    state = State(rng, seeded, company_id)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    original_rates = SlidingWindowRateThrottle.THROTTLE_RATES
+    SlidingWindowRateThrottle.THROTTLE_RATES = {}
+    driver = TRANSPORTS[transport]()
+    try:
+        def replay(count, record):
+            for name in rng.choices(names, weights=weights, k=count):
+                route, method, payload, headers, expected = SCENARIOS[name](state)
+                body = json.dumps(payload).encode() if payload is not None else None
+                start = time.perf_counter()
+                status, content = driver.request(method, reverse(route), body, headers)
+                elapsed = time.perf_counter() - start
+                if record is not None:
+                    record(name, route, elapsed, status == expected)
+                elif status != expected:
+                    raise RuntimeError(f"{name}: {method} {reverse(route)} respondió {status}: {content[:300]!r}")
+
+        replay(warmup, None)
+
+        metrics.registry.reset()
+        latencies = {name: [] for name in names}
+        errors = dict.fromkeys(names, 0)
+        routes = {}
+
+        def record(name, route, elapsed, ok):
+            latencies[name].append(elapsed)
+            routes[name] = route
+            if not ok:
+                errors[name] += 1
+
+        started = time.perf_counter()
+        replay(requests, record)
+        wall = time.perf_counter() - started
+        queries = route_queries(metrics.registry.snapshot())
+    finally:
+        driver.close()
+        SlidingWindowRateThrottle.THROTTLE_RATES = original_rates
+
+    scenarios = {
+        name: summarize(latencies[name], errors[name], queries.get(routes.get(name), 0))
+        for name in names if latencies[name]
+    }
+    total = summarize([value for values in latencies.values() for value in values], sum(errors.values()),
+                      sum(queries.get(route, 0) for route in set(routes.values())))
+    total['throughput_rps'] = round(requests / wall, 2) if wall else None   # incluye el costo del propio cliente
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'transport': transport,
+            'requests': requests,
+            'warmup': warmup,
+            'seed': seed,
+            'users': users,
+            'mix': mix,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'total': total,
+        'scenarios': scenarios,
+    }
+
+
+def print_report(result):
+    meta = result['meta']
+    print(f"transporte={meta['transport']} bd={meta['database']} peticiones={meta['requests']} semilla={meta['seed']}")
+    print(f"{'escenario':<16}{'n':>6}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'SQL/pet':>9}")
+    for name, stats in (*result['scenarios'].items(), ('TOTAL', result['total'])):
+        latency = stats['latency_ms']
+        print(f"{name:<16}{stats['requests']:>6}{stats['errors']:>5}{stats['throughput_rps']:>10.1f}"
+              f"{latency['p50']:>10.2f}{latency['p95']:>10.2f}{latency['p99']:>10.2f}{stats['queries_per_request']:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--transport', choices=sorted(TRANSPORTS), default='client')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--users', type=int, default=20, help='Usuarios sembrados para login/refresh/perfil')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help=f"Pesos por escenario (por defecto {','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items())})")
+    parser.add_argument('--output', help='Archivo JSON donde guardar el resultado')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    with test_database():
+        result = run(args.transport, args.requests, args.seed, args.mix, args.warmup, args.users)
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(result, file, indent=2)
+        print(f"Resultado guardado en {args.output}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
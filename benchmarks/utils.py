@@ -0,0 +1,44 @@
+# Utilidades comunes para los benchmarks (configuración de Django, BD de prueba, medición)
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def setup_django():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Crea una base de datos de prueba aislada (igual que `manage.py test`) y la
+    destruye al terminar, para no tocar los datos reales.
+    """
+    from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
+        teardown_test_environment()
+
+
+def measure_throughput(fn, requests=2000, warmup=50):
+    """
+    Ejecuta `fn` secuencialmente y devuelve las peticiones por segundo.
+    """
+    for _ in range(warmup):
+        fn()
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    elapsed = time.perf_counter() - start
+    return requests / elapsed
@@ -1,3 +1,29 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    ordering = ('-created_at',)
+    date_hierarchy = 'created_at'
+    readonly_fields = ('subject', 'body', 'from_email', 'to', 'status', 'attempts', 'next_attempt_at',
+                       'last_error', 'created_at', 'sent_at')
+    actions = ['requeue']
+
+    @admin.display(description='destinatarios')
+    def recipients(self, obj):
+        return ', '.join(obj.to)
+
+    # la cola la llenan las vistas (commons.outbox.enqueue), no el admin
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Reencolar los descartados seleccionados')
+    def requeue(self, request, queryset):
+        updated = queryset.filter(status='dead').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"Correos reencolados: {updated}")
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "commons"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from commons import metrics
+
+        # SQL por ruta para /metrics (commons.metrics)
+        connection_created.connect(metrics.install_sql_wrapper, dispatch_uid='commons.metrics.sql')
@@ -0,0 +1,93 @@
+# Vistas async nativas para ASGI
+#
+# DRF (3.16) despacha todas las vistas de forma síncrona: bajo ASGI cada petición pasa
+# por sync_to_async y ocupa un hilo. AsyncAPIView es una vista de Django con handlers
+# async que reproduce lo necesario de APIView para los endpoints calientes: cuerpo JSON,
+# autenticación (clases con aauthenticate), IsAuthenticated, throttles de
+# commons.throttling y errores en el mismo formato que el EXCEPTION_HANDLER de DRF.
+
+import io
+
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+from commons.parsers import FastJSONParser
+from commons.renderers import FastJSONRenderer
+
+JSON_MEDIA_TYPE = 'application/json'
+
+
+class AsyncAPIView(View):
+    """
+    Los handlers (async def get/post...) devuelven self.respond(datos, status).
+    """
+    authentication_classes = ()
+    require_authentication = False
+    throttle_classes = ()
+    throttle_scope = None
+
+    parser = FastJSONParser()
+    renderer = FastJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # como APIView: la autenticación es por token, no por cookie de sesión
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            method = request.method.lower()
+            handler = getattr(self, method, None) if method in self.http_method_names else None
+            if handler is None or method == 'options':
+                raise exceptions.MethodNotAllowed(request.method)
+            # atributos de la Request de DRF que usan throttles y serializadores
+            request.query_params = request.GET
+            request.data = self.parse(request)
+            await self.perform_authentication(request)
+            self.check_throttles(request)
+            return await handler(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    def parse(self, request):
+        if not request.body:
+            return {}
+        if request.content_type != JSON_MEDIA_TYPE:
+            raise exceptions.UnsupportedMediaType(request.content_type)
+        return self.parser.parse(io.BytesIO(request.body), JSON_MEDIA_TYPE, {'encoding': request.encoding or 'utf-8'})
+
+    async def perform_authentication(self, request):
+        for authentication_class in self.authentication_classes:
+            result = await authentication_class().aauthenticate(request)
+            if result is not None:
+                # request.user: lo leen TenantRouter y ReadYourWritesMiddleware
+                request.user, request.auth = result
+                return
+        request.auth = None
+        if self.require_authentication:
+            raise exceptions.NotAuthenticated()
+
+    def check_throttles(self, request):
+        waits = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max((wait for wait in waits if wait is not None), default=None))
+
+    def respond(self, data, status=200, headers=None):
+        return HttpResponse(self.renderer.render(data), status=status, content_type=JSON_MEDIA_TYPE, headers=headers)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)) and self.authentication_classes:
+            # como APIView: 401 con el esquema del autenticador
+            exc.auth_header = self.authentication_classes[0]().authenticate_header(self.request)
+        response = api_settings.EXCEPTION_HANDLER(exc, {'view': self, 'request': self.request})
+        if response is None:
+            raise exc
+        headers = {name: value for name, value in response.headers.items() if name != 'Content-Type'}
+        return self.respond(response.data, response.status_code, headers=headers)
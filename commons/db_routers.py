@@ -0,0 +1,156 @@
+# Router de lectura/escritura: lecturas seguras a réplicas, escrituras a la primaria
+#
+# Solo se leen réplicas durante peticiones HTTP de lectura (GET, HEAD, OPTIONS) que no
+# estén dentro de una transacción y cuyo usuario (o IP) no haya escrito hace poco:
+# tras una escritura, ReadYourWritesMiddleware fija sus lecturas a la primaria durante
+# READ_YOUR_WRITES_WINDOW segundos para que no vea datos desfasados por el retraso
+# de replicación. Fuera de una petición (comandos, tareas) todo va a la primaria.
+#
+# TenantRouter va antes: manda los modelos repartidos por empresa al shard del tenant
+# (commons.tenancy) y deja el resto (o los tenants de 'default') al ReplicaRouter.
+
+import contextvars
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+from commons import tenancy
+
+PIN_KEY = 'db:pin:{ident}'
+
+_request_state = contextvars.ContextVar('db_request_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class RequestDBState:
+    """
+    Estado de la petición en curso: si es de lectura, si escribió y si está fijada.
+    """
+    __slots__ = ('request', 'safe', 'wrote', '_pinned')
+
+    def __init__(self, request, safe):
+        self.request = request
+        self.safe = safe
+        self.wrote = False
+        self._pinned = None
+
+    def pin_keys(self):
+        keys = [PIN_KEY.format(ident=f"ip:{self.request.META.get('REMOTE_ADDR')}")]
+        # DRF asigna request.user al autenticar; el lazy de la sesión no se evalúa aquí
+        # (evaluarlo consultaría la BD desde dentro del router)
+        user = self.request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            user = None
+        if user is not None and user.is_authenticated:
+            keys.append(PIN_KEY.format(ident=f"user:{user.pk}"))
+        return keys
+
+    def is_pinned(self):
+        keys = self.pin_keys()
+        if self._pinned is None or self._pinned[0] != keys:
+            self._pinned = (keys, bool(cache.get_many(keys)))
+        return self._pinned[1]
+
+    def pin(self):
+        window = getattr(settings, 'READ_YOUR_WRITES_WINDOW', 5)
+        cache.set_many({key: 1 for key in self.pin_keys()}, timeout=window)
+
+
+def begin_request(request, safe):
+    return _request_state.set(RequestDBState(request, safe))
+
+
+def end_request(token):
+    state = _request_state.get()
+    _request_state.reset(token)
+    return state
+
+
+class ReplicaRouter:
+    """
+    Envía las lecturas seguras a una réplica (al azar) y el resto a 'default'.
+    Las réplicas se leen de settings.DATABASE_REPLICAS en cada llamada.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas:
+            return DEFAULT_DB_ALIAS
+        state = _request_state.get()
+        if state is None or not state.safe or state.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.is_pinned():
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # el esquema de las réplicas llega por replicación; en pruebas se migran todas
+        return None
+
+
+class TenantRouter:
+    """
+    Lleva las consultas de los modelos de TENANT_SHARDED_MODELS al shard de la empresa
+    actual (tenancy.get_current_tenant). Sin tenant, o si la empresa está en 'default',
+    no decide y el siguiente router aplica. Rechaza las escrituras (TenantMoving)
+    mientras move_tenant congela a la empresa.
+    """
+
+    def _database(self, model, hints):
+        field = tenancy.tenant_field(model)
+        if field is None:
+            return None, None
+        # instance: el objeto que se guarda o, en relaciones, el objeto de origen
+        instance = hints.get('instance')
+        instance_field = tenancy.tenant_field(type(instance)) if instance is not None else None
+        company_id = tenancy.instance_tenant(instance, instance_field) if instance_field else None
+        # uno nuevo va al shard de su empresa: el _state.db que le puso el descriptor de
+        # la FK (company=<Company>) es la base de la empresa, no la del objeto
+        new_with_tenant = company_id is not None and instance._state.adding
+        if company_id is None:
+            company_id = tenancy.get_current_tenant()
+        database, status = tenancy.lookup(company_id) if company_id is not None else (None, None)
+        if instance is not None and instance._state.db and not new_with_tenant:
+            # un objeto leído de un shard se guarda (y se relaciona) en ese shard
+            database = instance._state.db
+        return database, status
+
+    def db_for_read(self, model, **hints):
+        database, _ = self._database(model, hints)
+        return database if database != DEFAULT_DB_ALIAS else None
+
+    def db_for_write(self, model, **hints):
+        database, status = self._database(model, hints)
+        if status == 'moving':
+            raise tenancy.TenantMoving()
+        return database if database != DEFAULT_DB_ALIAS else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # las filas de un shard referencian empresas/grupos que existen en todos
+        if tenancy.tenant_field(type(obj1)) is not None or tenancy.tenant_field(type(obj2)) is not None:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # todos los shards tienen el esquema completo
+        return None
@@ -0,0 +1,41 @@
+# Errores de dominio que las vistas traducen a respuestas HTTP
+#
+# Los modelos y servicios no lanzan APIException (dependerían de DRF y de una petición):
+# lanzan ServiceBusy y exception_handler (REST_FRAMEWORK['EXCEPTION_HANDLER'], también
+# usado por commons.async_views) lo convierte en 503 + Retry-After.
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.views import exception_handler as drf_exception_handler
+
+
+class ServiceBusy(Exception):
+    """
+    Un recurso acotado (pool, cola) está lleno; reintentar en `wait` segundos.
+    """
+    default_detail = "El servicio está ocupado, intenta de nuevo en unos segundos."
+    default_code = 'service_busy'
+    default_wait = None
+
+    def __init__(self, detail=None, code=None, wait=None):
+        self.detail = detail or self.default_detail
+        self.code = code or self.default_code
+        self.wait = wait or self.default_wait
+        super().__init__(self.detail)
+
+
+class ServiceUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = ServiceBusy.default_detail
+    default_code = ServiceBusy.default_code
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        # DRF convierte `wait` en la cabecera Retry-After
+        self.wait = wait
+
+
+def exception_handler(exc, context):
+    if isinstance(exc, ServiceBusy):
+        exc = ServiceUnavailable(exc.detail, exc.code, exc.wait)
+    return drf_exception_handler(exc, context)
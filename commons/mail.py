@@ -0,0 +1,27 @@
+# Backends de correo del proyecto
+
+import time
+
+from django.core.mail.backends.smtp import EmailBackend as SMTPEmailBackend
+
+from commons import metrics
+
+
+class MeteredSMTPEmailBackend(SMTPEmailBackend):
+    """
+    Backend SMTP de Django que registra duración y resultado de cada envío en /metrics.
+    """
+
+    def send_messages(self, email_messages):
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            sent = super().send_messages(email_messages)
+            outcome = 'sent'
+            return sent
+        finally:
+            metrics.observe('smtp_send_duration_seconds', time.perf_counter() - start, (outcome,))
+            if email_messages:
+                sent_count = sent if outcome == 'sent' else 0
+                metrics.inc('smtp_messages_total', ('sent',), sent_count)
+                metrics.inc('smtp_messages_total', ('failed',), len(email_messages) - sent_count)
@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+
+from commons.utils.export import FORMATS, registry, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Exporta usuarios o empresas en NDJSON o CSV (opcionalmente gzip) con memoria constante'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Exportación a generar (p. ej. users, companies)')
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--fields', help='Campos separados por coma (por defecto los del exportador)')
+        parser.add_argument('--company', type=int, help='Exportar solo los datos de esta empresa')
+        parser.add_argument('--gzip', action='store_true', help='Comprimir la salida con gzip')
+        parser.add_argument('--output', help='Archivo de salida (por defecto la salida estándar)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        autodiscover_modules('exports')
+        exporter = registry.get(options['name'])
+        if exporter is None:
+            raise CommandError(f"Exportación desconocida: {options['name']}. Disponibles: {', '.join(sorted(registry))}")
+        try:
+            fields = exporter.parse_fields(options['fields'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        queryset = exporter.queryset(company_id=options['company'])
+        chunks = stream_export(exporter, queryset, fields, fmt=options['format'],
+                               compress=options['gzip'], chunk_size=options['chunk_size'])
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if options['output']:
+                output.close()
+        if options['output']:
+            self.stderr.write(self.style.SUCCESS(f"Exportación '{exporter.name}' escrita en {options['output']}"))
@@ -0,0 +1,181 @@
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.utils import timezone
+
+from commons import tenancy
+from commons.models import TenantShard
+
+
+def copy_fields(model):
+    # columnas que se insertan (las generadas las calcula la base de datos)
+    return [field for field in model._meta.concrete_fields if not field.generated]
+
+
+class Command(BaseCommand):
+    help = 'Mueve los datos de una empresa a otro shard sin detener el servicio'
+
+    def add_arguments(self, parser):
+        parser.add_argument('company_id', type=int)
+        parser.add_argument('target', help='Alias de la base de datos destino (ver TENANT_SHARDS)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--freeze-wait', type=float, default=None,
+                            help='Segundos a esperar tras cambiar el directorio (por defecto TENANT_DIRECTORY_TTL + 1)')
+
+    def handle(self, *args, **options):
+        company_id = options['company_id']
+        target = options['target']
+        self.batch_size = options['batch_size']
+        wait = options['freeze_wait']
+        if wait is None:
+            wait = tenancy.DIRECTORY_TTL + 1
+
+        if target not in tenancy.get_shards() or target not in settings.DATABASES:
+            raise CommandError(f"'{target}' no es un shard. Disponibles: {', '.join(tenancy.get_shards())}")
+        if not apps.get_model('companies', 'Company').objects.using(DEFAULT_DB_ALIAS).filter(pk=company_id).exists():
+            raise CommandError(f"La empresa {company_id} no existe.")
+
+        entry, _ = TenantShard.objects.using(DEFAULT_DB_ALIAS).get_or_create(
+            company_id=company_id, defaults={'database': DEFAULT_DB_ALIAS})
+        if entry.status == 'moving':
+            raise CommandError(f"La empresa {company_id} ya se está moviendo (o un movimiento anterior falló: "
+                               f"revise y ponga su estado en 'active').")
+        source = entry.database
+        if source == target:
+            raise CommandError(f"La empresa {company_id} ya está en '{target}'.")
+
+        tables = self.tables(company_id)
+        started = time.monotonic()
+
+        # 1. copia en caliente: la empresa sigue leyendo y escribiendo en el origen
+        for model, lookup in reversed(tables):
+            self.raw_delete(model.objects.using(target).filter(**lookup))  # restos de un intento anterior
+        try:
+            for model, lookup in tables:
+                copied = self.copy(model, model.objects.using(source).filter(**lookup), source, target)
+                self.stdout.write(f"{model._meta.label}: {copied} filas copiadas")
+        except IntegrityError as e:
+            # los ids de User los reparte el directorio global (UserIdentity) y no chocan;
+            # un choque indica filas creadas en el destino por fuera de esa secuencia
+            raise CommandError(f"Colisión de claves en '{target}' (filas con ids fuera del directorio global): {e}")
+
+        # 2. congelar escrituras y aplicar lo que cambió durante la copia
+        self.set_entry(company_id, status='moving')
+        time.sleep(wait)  # que todos los procesos vean el estado 'moving'
+        try:
+            with transaction.atomic(using=target):
+                for model, lookup in tables:
+                    inserted, updated, deleted = self.sync(model, lookup, source, target)
+                    self.stdout.write(f"{model._meta.label}: {inserted} nuevas, {updated} modificadas, {deleted} eliminadas")
+        except Exception:
+            self.set_entry(company_id, status='active')
+            raise
+
+        # 3. cambiar el directorio y liberar las escrituras
+        self.set_entry(company_id, database=target, status='active')
+        time.sleep(wait)  # nadie sigue leyendo del origen con una entrada vieja
+
+        # 4. borrar los datos del origen (hijos primero)
+        for model, lookup in reversed(tables):
+            self.raw_delete(model.objects.using(source).filter(**lookup))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Empresa {company_id} movida de '{source}' a '{target}' en {time.monotonic() - started:.1f}s"))
+
+    def tables(self, company_id):
+        """
+        (modelo, filtro de la empresa) de los modelos repartidos, padres antes que hijos,
+        cada uno seguido de sus tablas many-to-many.
+        """
+        sharded = {apps.get_model(label): field for label, field in tenancy.get_sharded_models().items()}
+        ordered = []
+        pending = list(sharded)
+        while pending:
+            for model in pending:
+                parents = {field.related_model for field in model._meta.concrete_fields if field.is_relation}
+                if not any(parent in pending and parent is not model for parent in parents):
+                    break
+            pending.remove(model)
+            ordered.append(model)
+
+        tables = []
+        for model in ordered:
+            field = sharded[model]
+            tables.append((model, {field: company_id}))
+            for m2m in model._meta.many_to_many:
+                through = m2m.remote_field.through
+                if through._meta.auto_created:
+                    tables.append((through, {f"{m2m.m2m_field_name()}__{field}": company_id}))
+        return tables
+
+    def copy(self, model, queryset, source, target):
+        """
+        Copia las filas en lotes por pk; devuelve cuántas copió.
+        """
+        fields = copy_fields(model)
+        attnames = [field.attname for field in fields]
+        pk = model._meta.pk.attname
+        queryset = queryset.order_by('pk')
+        copied = 0
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(batch.values(*attnames)[:self.batch_size])
+            if not rows:
+                return copied
+            self.ensure_references(model, rows, target)
+            model.objects.using(target).bulk_create([model(**row) for row in rows])
+            copied += len(rows)
+            last_pk = rows[-1][pk]
+
+    def ensure_references(self, model, rows, target):
+        # empresas, grupos... que no se reparten pero las filas referencian con FK
+        for field in copy_fields(model):
+            related = field.related_model
+            if not field.is_relation or related is None or tenancy.tenant_field(related) is not None:
+                continue
+            ids = {row[field.attname] for row in rows} - {None}
+            if not ids:
+                continue
+            present = set(related.objects.using(target).filter(pk__in=ids).values_list('pk', flat=True))
+            missing = ids - present
+            if missing:
+                self.copy(related, related.objects.using(DEFAULT_DB_ALIAS).filter(pk__in=missing),
+                          DEFAULT_DB_ALIAS, target)
+
+    def sync(self, model, lookup, source, target):
+        """
+        Iguala el destino con el origen (ya congelado); devuelve (insertadas, modificadas, eliminadas).
+        """
+        attnames = [field.attname for field in copy_fields(model)]
+        pk = model._meta.pk.attname
+        source_rows = {row[pk]: row for row in model.objects.using(source).filter(**lookup).values(*attnames)}
+        target_rows = {row[pk]: row for row in model.objects.using(target).filter(**lookup).values(*attnames)}
+
+        deleted = [key for key in target_rows if key not in source_rows]
+        inserted = [row for key, row in source_rows.items() if key not in target_rows]
+        updated = [row for key, row in source_rows.items() if key in target_rows and target_rows[key] != row]
+
+        if deleted:
+            self.raw_delete(model.objects.using(target).filter(pk__in=deleted))
+        if inserted:
+            self.ensure_references(model, inserted, target)
+            model.objects.using(target).bulk_create([model(**row) for row in inserted])
+        for row in updated:
+            self.ensure_references(model, [row], target)
+            model.objects.using(target).filter(pk=row[pk]).update(**{name: value for name, value in row.items() if name != pk})
+        return len(inserted), len(updated), len(deleted)
+
+    def raw_delete(self, queryset):
+        # DELETE directo, sin señales ni cascadas: los datos siguen existiendo en el
+        # otro shard (las señales tocarían, p. ej., el índice de búsqueda)
+        pks = list(queryset.values_list('pk', flat=True))
+        for start in range(0, len(pks), self.batch_size):
+            queryset.model.objects.using(queryset.db).filter(pk__in=pks[start:start + self.batch_size])._raw_delete(queryset.db)
+
+    def set_entry(self, company_id, **values):
+        TenantShard.objects.using(DEFAULT_DB_ALIAS).filter(company_id=company_id).update(updated_at=timezone.now(), **values)
+        tenancy.invalidate(company_id)
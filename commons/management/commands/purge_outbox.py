@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from commons import outbox
+
+
+class Command(BaseCommand):
+    help = 'Borra los correos ya enviados de la cola más viejos que la retención'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=outbox.RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = outbox.purge_outbox(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Correos eliminados: {deleted}"))
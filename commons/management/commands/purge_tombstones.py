@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from commons.utils import sync
+
+
+class Command(BaseCommand):
+    help = 'Borra los registros de objetos eliminados más viejos que la retención de la sincronización'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=sync.TOMBSTONE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        deleted = sync.purge_tombstones(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Tombstones eliminados: {deleted}"))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from commons.search import registry
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de tokens de búsqueda (todos los índices o los indicados)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kinds', nargs='*', help='Índices a reconstruir (por defecto todos)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        kinds = options['kinds'] or sorted(registry)
+        unknown = set(kinds) - set(registry)
+        if unknown:
+            raise CommandError(f"Índices desconocidos: {', '.join(sorted(unknown))}. Disponibles: {', '.join(sorted(registry))}")
+
+        for kind in kinds:
+            total = registry[kind].rebuild(chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f"Índice '{kind}' reconstruido: {total} objetos"))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from commons import outbox
+
+
+class Command(BaseCommand):
+    help = 'Entrega por SMTP los correos pendientes de la cola (commons.OutboxEmail)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=outbox.BATCH_SIZE, help='Correos por conexión SMTP')
+        parser.add_argument('--loop', action='store_true', help='No terminar: revisar la cola cada --interval segundos')
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            totals = outbox.send_pending(batch_size=options['batch_size'])
+            if any(totals.values()) or not options['loop']:
+                self.stdout.write(
+                    f"Enviados: {totals['sent']}, reintentos: {totals['retry']}, descartados: {totals['dead']}"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
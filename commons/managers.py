@@ -0,0 +1,24 @@
+# Managers y querysets compartidos por los modelos del proyecto
+
+from django.db import models
+
+
+class TenantQuerySet(models.QuerySet):
+    """
+    QuerySet de modelos con la empresa en una columna propia (tenant_field).
+    """
+    tenant_field = 'company_id'
+
+    def for_tenant(self, company_id=None):
+        """
+        Filas de la empresa indicada o, por defecto, la del contexto (ninguna si no hay).
+        Filtra por la columna: sin JOIN ni consulta a la empresa.
+        """
+        # aquí y no arriba: commons.tenancy importa el backend de auth (y este, el modelo User)
+        from commons import tenancy
+
+        if company_id is None:
+            company_id = tenancy.get_current_tenant()
+        if company_id is None:
+            return self.none()
+        return self.filter(**{self.tenant_field: company_id})
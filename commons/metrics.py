@@ -0,0 +1,316 @@
+# Métricas del proceso en formato de texto de Prometheus (endpoint /metrics)
+#
+# Cada hilo acumula en su propio fragmento (sin locks al registrar) y el endpoint suma
+# los fragmentos al leer. Con varios workers (gunicorn), METRICS['MULTIPROCESS_DIR']
+# activa el modo multiproceso: cada proceso vuelca su acumulado a un archivo JSON
+# propio cada FLUSH_INTERVAL segundos y el endpoint suma los archivos de todos.
+#
+# Qué se mide: latencia por ruta (nombre de la URL), tiempo antes de la vista
+# (middlewares + resolución de URL), consultas y tiempo de SQL por ruta y base de datos,
+# y los hooks de JWT, permisos, hash de contraseñas y SMTP.
+
+import bisect
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+_settings = getattr(settings, 'METRICS', {})
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# límites superiores (segundos) de los buckets de los histogramas
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nombre -> (tipo, ayuda, etiquetas)
+METRICS = {
+    'http_requests_total': ('counter', 'Peticiones atendidas.', ('route', 'method', 'status')),
+    'http_request_duration_seconds': ('histogram', 'Latencia de la petición hasta tener la respuesta.', ('route', 'method')),
+    'http_routing_duration_seconds': ('histogram', 'Middlewares y resolución de URL antes de la vista.', ('route',)),
+    'db_queries_total': ('counter', 'Consultas SQL ejecutadas por las peticiones.', ('route', 'database')),
+    'db_query_seconds_total': ('counter', 'Tiempo en SQL de las peticiones.', ('route', 'database')),
+    'jwt_decode_duration_seconds': ('histogram', 'Validación del JWT (tokens que no estaban en la LRU).', ()),
+    'permission_check_duration_seconds': ('histogram', 'Resolución de permisos contra la matriz.', ()),
+    'password_hash_duration_seconds': ('histogram', 'Hash y verificación de contraseñas.', ('operation',)),
+    'smtp_send_duration_seconds': ('histogram', 'Envíos por SMTP (una conexión por lote).', ('outcome',)),
+    'smtp_messages_total': ('counter', 'Correos entregados al servidor SMTP.', ('outcome',)),
+    'outbox_messages_total': ('counter', 'Resultado de cada intento de la cola de correos.', ('outcome',)),
+}
+
+UNRESOLVED_ROUTE = 'unresolved'
+
+
+class _Shard:
+    """
+    Acumulado de un hilo: solo ese hilo escribe en él.
+    """
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters = {}
+        # clave -> [conteo por bucket..., conteo en +Inf, suma]
+        self.histograms = {}
+
+    def merge(self, counters, histograms):
+        for key, value in counters:
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in histograms:
+            current = self.histograms.get(key)
+            if current is None:
+                self.histograms[key] = list(values)
+            else:
+                for index, value in enumerate(values):
+                    current[index] += value
+
+
+class Registry:
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []          # (hilo, fragmento)
+        self._retired = _Shard()   # acumulado de hilos que ya terminaron
+        self._last_flush = 0.0
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:  # una vez por hilo
+                self._shards.append((threading.current_thread(), shard))
+            return shard
+
+    def inc(self, name, labels=(), value=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, seconds, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(BUCKETS) + 2)
+        values[bisect.bisect_left(BUCKETS, seconds)] += 1
+        values[-1] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, name, labels=()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, labels)
+
+    def snapshot(self):
+        """
+        Suma de los fragmentos de todos los hilos del proceso.
+        """
+        total = _Shard()
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                # list() copia el dict de una vez (el hilo dueño puede seguir escribiendo)
+                counters, histograms = list(shard.counters.items()), list(shard.histograms.items())
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                    total.merge(counters, histograms)
+                else:
+                    self._retired.merge(counters, histograms)
+            self._shards = alive
+            total.merge(self._retired.counters.items(), self._retired.histograms.items())
+        return total
+
+    def reset(self):
+        with self._lock:
+            self._local = threading.local()
+            self._shards = []
+            self._retired = _Shard()
+
+    # ---------- modo multiproceso ---------- #
+
+    def flush(self, force=False):
+        """
+        Vuelca el acumulado del proceso a MULTIPROCESS_DIR (a lo sumo cada FLUSH_INTERVAL s).
+        """
+        directory = _settings.get('MULTIPROCESS_DIR')
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < _settings.get('FLUSH_INTERVAL', 5):
+            return
+        self._last_flush = now
+        snapshot = self.snapshot()
+        data = {
+            'counters': [[name, list(labels), value] for (name, labels), value in snapshot.counters.items()],
+            'histograms': [[name, list(labels), values] for (name, labels), values in snapshot.histograms.items()],
+        }
+        path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)   # quien lea nunca ve un archivo a medias
+
+    def collect(self):
+        """
+        Acumulado a exponer: el del proceso o, en modo multiproceso, el de todos.
+        """
+        total = self.snapshot()
+        directory = _settings.get('MULTIPROCESS_DIR')
+        if not directory:
+            return total
+        own = f"metrics_{os.getpid()}.json"
+        for filename in os.listdir(directory):
+            if not filename.startswith('metrics_') or not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as file:
+                    data = json.load(file)
+            except (OSError, ValueError):
+                continue
+            total.merge([((name, tuple(labels)), value) for name, labels, value in data['counters']],
+                        [((name, tuple(labels)), values) for name, labels, values in data['histograms']])
+        return total
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
+
+# tras un fork el hijo no debe reportar lo acumulado por el padre
+os.register_at_fork(after_in_child=registry.reset)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def render(snapshot):
+    """
+    Formato de exposición de texto de Prometheus (0.0.4).
+    """
+    lines = []
+    for name, (kind, help_text, label_names) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == 'counter':
+            for (metric, labels), value in sorted(snapshot.counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_labels(label_names, labels)} {value}")
+            continue
+        for (metric, labels), values in sorted(snapshot.histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, '+Inf'), values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(label_names, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(label_names, labels)} {values[-1]}")
+            lines.append(f"{name}_count{_labels(label_names, labels)} {cumulative}")
+    return '\n'.join(lines) + '\n'
+
+
+# ---------- SQL por petición ---------- #
+
+_request_sql = contextvars.ContextVar('metrics_request_sql', default=None)
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    stats = _request_sql.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        alias = context['connection'].alias
+        count, seconds = stats.get(alias, (0, 0.0))
+        stats[alias] = (count + 1, seconds + time.perf_counter() - start)
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """
+    Receptor de connection_created: mide las consultas de cada conexión nueva. El
+    contexto de la petición viaja con contextvars, también a los hilos de sync_to_async.
+    """
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+# ---------- Middleware ---------- #
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED_ROUTE
+    return match.view_name or match.route
+
+
+class MetricsMiddleware:
+    """
+    Registra latencia, tiempo antes de la vista y SQL por ruta. Va primero en
+    MIDDLEWARE para medir también a los demás middlewares. En respuestas en
+    streaming mide hasta tener la respuesta, no hasta enviar el último byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        token = _request_sql.set({})
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self._record(request, response, start, token)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        token = _request_sql.set({})
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self._record(request, response, start, token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_start = time.perf_counter()
+        return None
+
+    def _record(self, request, response, start, token):
+        elapsed = time.perf_counter() - start
+        sql = _request_sql.get()
+        _request_sql.reset(token)
+
+        route = _route(request)
+        status = response.status_code if response is not None else 500
+        inc('http_requests_total', (route, request.method, str(status)))
+        observe('http_request_duration_seconds', elapsed, (route, request.method))
+        view_start = getattr(request, '_metrics_view_start', None)
+        if view_start is not None:
+            observe('http_routing_duration_seconds', view_start - start, (route,))
+        for alias, (count, seconds) in sql.items():
+            inc('db_queries_total', (route, alias), count)
+            inc('db_query_seconds_total', (route, alias), seconds)
+        registry.flush()
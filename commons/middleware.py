@@ -0,0 +1,43 @@
+# Middlewares transversales del proyecto
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from commons import db_routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReadYourWritesMiddleware:
+    """
+    Da al ReplicaRouter el contexto de la petición y, si la petición escribió en la
+    BD, fija las lecturas de ese usuario (y de su IP) a la primaria durante
+    READ_YOUR_WRITES_WINDOW segundos.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = db_routers.begin_request(request, safe=request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(token)
+
+    async def __acall__(self, request):
+        token = db_routers.begin_request(request, safe=request.method in SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._finish(token)
+
+    def _finish(self, token):
+        state = db_routers.end_request(token)
+        if state is not None and state.wrote and db_routers.get_replicas():
+            state.pin()
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchToken",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=20)),
+                ("object_id", models.BigIntegerField()),
+                ("company_id", models.BigIntegerField(null=True)),
+                ("field", models.CharField(max_length=30)),
+                ("token", models.CharField(max_length=64)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["kind", "company_id", "token"], name="search_tenant_token_idx"), models.Index(fields=["kind", "token"], name="search_token_idx"), models.Index(fields=["kind", "object_id"], name="search_object_idx")],
+            },
+        ),
+    ]
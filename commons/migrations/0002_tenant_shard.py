@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("commons", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TenantShard",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("company_id", models.BigIntegerField(unique=True)),
+                ("database", models.CharField(max_length=50)),
+                ("status", models.CharField(choices=[("active", "Activo"), ("moving", "Moviéndose")], default="active", max_length=10)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
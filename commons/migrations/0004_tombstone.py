@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("commons", "0003_outbox_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("kind", models.CharField(max_length=20)),
+                ("object_id", models.BigIntegerField()),
+                ("company_id", models.BigIntegerField(null=True)),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["kind", "company_id", "deleted_at"], name="tombstone_tenant_idx"), models.Index(fields=["kind", "deleted_at"], name="tombstone_kind_idx")],
+            },
+        ),
+    ]
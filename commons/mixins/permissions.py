@@ -1,5 +1,8 @@
 # permissions.py, views_mixins.py, (vistas, permisos, etc.)
 
+import hmac
+
+from django.conf import settings
 from rest_framework.permissions import BasePermission
 
 class IsAdminOrReadOnly(BasePermission):
@@ -9,4 +12,36 @@ class IsAdminOrReadOnly(BasePermission):
     def has_permission(self, request, view):
         if request.method in ('GET', 'HEAD', 'OPTIONS'):
             return True
-        return request.user and request.user.is_staff
\ No newline at end of file
+        return request.user and request.user.is_staff
+
+class IsCompanyAdminOrStaff(BasePermission):
+    """
+    Permite el acceso al staff o al administrador de la empresa indicada en la URL (company_id).
+    Si la ruta no lleva company_id, basta con ser administrador (la vista acota a su empresa).
+    """
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_staff:
+            return True
+        if user.rol != 'admin':
+            return False
+        if 'company_id' not in view.kwargs:
+            return user.company_id is not None
+        return str(user.company_id) == str(view.kwargs['company_id'])
+
+
+class IsStaffOrMetricsScraper(BasePermission):
+    """
+    Solo lectura para el staff o para un scraper con la cabecera X-Metrics-Token
+    igual a METRICS['TOKEN'] (si está configurado).
+    """
+    def has_permission(self, request, view):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return False
+        if request.user and request.user.is_staff:
+            return True
+        token = getattr(settings, 'METRICS', {}).get('TOKEN')
+        provided = request.META.get('HTTP_X_METRICS_TOKEN', '')
+        return bool(token) and hmac.compare_digest(provided.encode(), token.encode())
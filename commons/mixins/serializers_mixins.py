@@ -0,0 +1,97 @@
+from django.db import models
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_sparse_fields(request):
+    """
+    Lee ?fields=a,b y ?omit=c de la petición; devuelve (fields o None, omit).
+    """
+    if request is None:
+        return None, set()
+    params = request.query_params
+    fields = {name.strip() for name in params.get('fields', '').split(',') if name.strip()} or None
+    omit = {name.strip() for name in params.get('omit', '').split(',') if name.strip()}
+    return fields, omit
+
+
+class SparseFieldsetMixin:
+    """
+    Permite al cliente pedir solo algunos campos con ?fields=id,company_name o
+    excluir otros con ?omit=address,phone. Los nombres desconocidos se ignoran.
+
+    Solo aplica al serializador raíz de la petición (no a los anidados). En lecturas
+    los campos descartados ni siquiera se construyen; en escrituras se validan todos
+    y solo se recorta la respuesta.
+    """
+
+    def _sparse_selection(self):
+        root = self.root
+        if not (self is root or (self.parent is root and isinstance(root, serializers.ListSerializer))):
+            return None, set()
+        return parse_sparse_fields(self.context.get('request'))
+
+    def _prune(self, names):
+        fields, omit = self._sparse_selection()
+        return [name for name in names if (fields is None or name in fields) and name not in omit]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and request.method in SAFE_METHODS:
+            keep = set(self._prune(fields))
+            fields = {name: field for name, field in fields.items() if name in keep}
+        return fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        if request is not None and request.method not in SAFE_METHODS:
+            keep = set(self._prune(data))
+            data = {name: value for name, value in data.items() if name in keep}
+        return data
+
+
+def sparse_only_fields(serializer, model, select_related=()):
+    """
+    Columnas que necesita el serializador para un .only(); None si algún campo
+    depende de algo que no se puede deducir (source='*', propiedades...).
+    """
+    only = {model._meta.pk.name}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        attrs = field.source_attrs
+        try:
+            model_field = model._meta.get_field(attrs[0])
+        except Exception:
+            # atributos calculados en Python (p. ej. search_score) no necesitan columnas
+            if getattr(model, attrs[0], None) is not None:
+                return None
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            continue  # se resuelven con prefetch_related
+        only.add(attrs[0])
+        if len(attrs) > 1 and model_field.is_relation and attrs[0] in select_related:
+            only.add('__'.join(attrs))
+    return only
+
+
+class LowercaseEmailField(serializers.EmailField):
+    """
+    Correo en minúsculas desde to_internal_value: los validadores del campo (p. ej. el
+    UniqueValidator del modelo) comparan ya el valor que se guardará.
+    """
+
+    def to_internal_value(self, data):
+        return super().to_internal_value(data).lower()
+
+
+class LowercaseEmailMixin:
+    """
+    ModelSerializer cuyos EmailField del modelo se generan como LowercaseEmailField.
+    """
+    serializer_field_mapping = {**serializers.ModelSerializer.serializer_field_mapping,
+                                models.EmailField: LowercaseEmailField}
@@ -0,0 +1,167 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from commons import tenancy
+from commons.mixins.serializers_mixins import parse_sparse_fields, sparse_only_fields
+from commons.utils import response_cache
+
+
+class VersionedCacheMixin:
+    """
+    Cachea las respuestas de list/retrieve de un viewset ya renderizadas.
+
+    La clave incluye la versión del recurso (o la de los listados), la ruta completa
+    con su query string y el tipo de contenido negociado. Con If-None-Match o
+    If-Modified-Since vigentes responde 304 sin consultar la base de datos si la
+    respuesta está cacheada; si no, la construye antes (un objeto inexistente da 404).
+    Solo las respuestas 200 llevan ETag y admiten 304. La versión se incrementa con
+    response_cache.bump_version(cache_namespace, pk) desde las señales del modelo.
+
+    Solo sirve para recursos cuya representación no depende del usuario: en un
+    acierto no se ejecuta get_object() ni, por tanto, los permisos por objeto.
+    """
+    cache_namespace = None
+    cache_timeout = 300
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_namespace:
+            response_cache.namespaces.add(cls.cache_namespace)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, response_cache.LIST_SCOPE,
+                                    lambda: super(VersionedCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        scope = str(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return self.cached_response(request, scope,
+                                    lambda: super(VersionedCacheMixin, self).retrieve(request, *args, **kwargs))
+
+    def cached_response(self, request, scope, handler):
+        renderer = request.accepted_renderer
+        if isinstance(renderer, BrowsableAPIRenderer):
+            # la API navegable depende del usuario y del formulario; no se cachea
+            return handler()
+
+        namespace = self.cache_namespace
+        version = response_cache.get_version(namespace, scope)
+        variant = f"{request.get_full_path()}|{request.accepted_media_type}"
+        etag = response_cache.make_etag(namespace, scope, version, variant)
+        last_modified = response_cache.last_modified_header(version)
+
+        # la versión existe aunque el objeto no: solo se responde 304 si la respuesta ya
+        # está cacheada o handler() no lanzó 404 al construirla
+        conditional = response_cache.is_not_modified(request, etag, version) or response_cache.matches_any(request)
+        cached = response_cache.get_cached(namespace, scope, version, variant) if conditional else None
+        if cached is not None and cached[2] == 200:
+            response_cache.record(namespace, 'not_modified')
+            response = HttpResponseNotModified()
+        else:
+            def build():
+                response = handler()
+                context = self.get_renderer_context()
+                context['response'] = response
+                content = renderer.render(response.data, request.accepted_media_type, context)
+                content_type = f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+                return content, content_type, response.status_code
+
+            content, content_type, status = response_cache.get_or_build(
+                namespace, scope, version, variant, build, timeout=self.cache_timeout)
+            if status != 200:
+                return HttpResponse(content, content_type=content_type, status=status)
+            if conditional:
+                response_cache.record(namespace, 'not_modified')
+                response = HttpResponseNotModified()
+            else:
+                response = HttpResponse(content, content_type=content_type)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = last_modified
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class SparseFieldsetQuerysetMixin:
+    """
+    Lleva ?fields= / ?omit= al queryset con .only(), para que las columnas que el
+    serializador (con SparseFieldsetMixin) no va a devolver tampoco se lean.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, omit = parse_sparse_fields(self.request)
+        if self.request.method not in SAFE_METHODS or (fields is None and not omit):
+            return queryset
+
+        serializer = self.get_serializer()
+        select_related = queryset.query.select_related
+        select_related = tuple(select_related) if isinstance(select_related, dict) else ()
+        only = sparse_only_fields(serializer, queryset.model, select_related=select_related)
+        if only is None:
+            return queryset
+
+        # relaciones que ya no se devuelven: ni JOIN ni prefetch
+        used = {field.source_attrs[0] for field in serializer.fields.values() if field.source_attrs}
+        queryset = queryset.select_related(None).select_related(*[name for name in select_related if name in used])
+        prefetch = [lookup for lookup in queryset._prefetch_related_lookups
+                    if str(getattr(lookup, 'prefetch_through', lookup)).split('__')[0] in used]
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetch)
+
+        # la paginación por cursor lee los campos de orden de la última fila
+        only.update(getattr(self, 'cursor_ordering_fields', ()))
+        return queryset.only(*only)
+
+
+class ValuesReadMixin:
+    """
+    list/retrieve con un ValuesSerializer (commons.serializers): una consulta .values()
+    y el transformador precompilado, sin instanciar modelos ni recorrer campos de DRF.
+
+    En retrieve no se ejecutan los permisos por objeto (no hay instancia); usar solo
+    en vistas que no los tengan.
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        extra_lookups = ()
+        if self.paginator is not None:
+            # la paginación por cursor lee la posición de la última fila
+            extra_lookups = ('id', *getattr(self, 'cursor_ordering_fields', ()))
+        plan = self.values_serializer_class.for_request(request, extra_lookups=extra_lookups)
+
+        rows = queryset.values(*plan.lookups)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response([plan.transform(row) for row in page])
+        return Response([plan.transform(row) for row in rows])
+
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.values_serializer_class.for_request(request)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).values(*plan.lookups)
+        row = get_object_or_404(queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return Response(plan.transform(row))
+
+
+class TenantFromURLMixin:
+    """
+    Usa como tenant la empresa de la URL (p. ej. companies/<company_id>/users/) en vez
+    de la del usuario, para que el staff consulte el shard de otra empresa. Se fija
+    después de los permisos, que ya restringen a los demás a su propia empresa.
+    """
+    tenant_url_kwarg = 'company_id'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._tenant_token = tenancy.set_tenant(kwargs[self.tenant_url_kwarg])
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_tenant_token', None)
+        if token is not None:
+            tenancy.reset_tenant(token)
+            self._tenant_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
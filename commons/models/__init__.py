@@ -1,5 +1,13 @@
 from .timeStampedModel import TimeStampedModel
+from .searchToken import SearchToken
+from .tenantShard import TenantShard
+from .outboxEmail import OutboxEmail
+from .tombstone import Tombstone
 
 __all__= [
-    "TimeStampedModel"
-]
\ No newline at end of file
+    "TimeStampedModel",
+    "SearchToken",
+    "TenantShard",
+    "OutboxEmail",
+    "Tombstone"
+]
@@ -0,0 +1,32 @@
+from django.db import models
+from django.utils import timezone
+
+OUTBOX_STATUS = (
+    ('pending', 'Pendiente'),
+    ('sent', 'Enviado'),
+    ('dead', 'Descartado'),   # agotó los reintentos: queda para revisión manual
+)
+
+class OutboxEmail(models.Model):
+    """
+    Correo en cola. Las vistas lo encolan con commons.outbox.enqueue() y el comando
+    send_outbox lo entrega por SMTP en lotes, con reintentos y backoff.
+    """
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField()                                           # lista de destinatarios
+    status = models.CharField(max_length=10, choices=OUTBOX_STATUS, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)      # también sirve de lease del lote reclamado
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),  # lote de pendientes vencidos
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
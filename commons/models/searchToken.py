@@ -0,0 +1,22 @@
+from django.db import models
+
+class SearchToken(models.Model):
+    """
+    Token normalizado (minúsculas, sin tildes) de un campo buscable.
+    Lo mantiene commons.search al guardar/eliminar los objetos indexados.
+    """
+    kind = models.CharField(max_length=20)                  # índice al que pertenece ('user', 'company')
+    object_id = models.BigIntegerField()                    # pk del objeto indexado
+    company_id = models.BigIntegerField(null=True)          # empresa (tenant) del objeto
+    field = models.CharField(max_length=30)                 # campo de origen del token
+    token = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'company_id', 'token'], name='search_tenant_token_idx'),  # búsquedas por empresa
+            models.Index(fields=['kind', 'token'], name='search_token_idx'),                       # búsquedas globales (staff)
+            models.Index(fields=['kind', 'object_id'], name='search_object_idx'),                  # reindexar / rankear
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} {self.field}={self.token}"
@@ -0,0 +1,20 @@
+from django.db import models
+
+TENANT_STATUS = (
+    ('active', 'Activo'),
+    ('moving', 'Moviéndose'),   # escrituras bloqueadas mientras se copia a otro shard
+)
+
+class TenantShard(models.Model):
+    """
+    Directorio de tenants: base de datos (alias de DATABASES) donde viven los datos
+    de cada empresa. Las empresas sin entrada están en 'default'.
+    Lo consulta commons.tenancy (con caché) y lo mantiene el comando move_tenant.
+    """
+    company_id = models.BigIntegerField(unique=True)
+    database = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=TENANT_STATUS, default='active')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"empresa {self.company_id} -> {self.database} ({self.status})"
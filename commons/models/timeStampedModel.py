@@ -3,7 +3,9 @@ from django.utils import timezone
 
 class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(default=timezone.now)  # Fecha de creación
-    updated_at = models.DateTimeField(default=timezone.now)# Fecha de última modificación
+    # Fecha de última modificación: la pone save() (también en bulk_create); bulk_update()
+    # y queryset.update() deben incluirla. La usa la sincronización incremental (commons.utils.sync)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True  # No se crea una tabla para esta clase
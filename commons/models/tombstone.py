@@ -0,0 +1,22 @@
+from django.db import models
+from django.utils import timezone
+
+class Tombstone(models.Model):
+    """
+    Registro de un objeto eliminado, para que la sincronización incremental
+    (commons.utils.sync) informe los borrados. Lo escriben las señales post_delete;
+    el comando purge_tombstones borra los más viejos que la retención.
+    """
+    kind = models.CharField(max_length=20)                  # feed al que pertenece ('user', 'company')
+    object_id = models.BigIntegerField()                    # pk del objeto eliminado
+    company_id = models.BigIntegerField(null=True)          # empresa (tenant) del objeto
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'company_id', 'deleted_at'], name='tombstone_tenant_idx'),  # delta por empresa
+            models.Index(fields=['kind', 'deleted_at'], name='tombstone_kind_idx'),                  # delta global (staff)
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.object_id} eliminado {self.deleted_at:%Y-%m-%d %H:%M}"
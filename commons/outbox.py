@@ -0,0 +1,172 @@
+# Cola de correos salientes (commons.OutboxEmail)
+#
+# Las vistas no hablan con el servidor SMTP: enqueue() inserta el correo y responde.
+# El comando send_outbox reclama lotes de pendientes vencidos con
+# SELECT ... FOR UPDATE SKIP LOCKED (varios workers no se pisan), los entrega por una
+# sola conexión SMTP por lote y reprograma los fallidos con backoff exponencial; al
+# agotar MAX_ATTEMPTS quedan en estado 'dead'. Entrega al menos una vez: el resultado
+# de cada correo se guarda apenas se conoce y, si el worker muere a mitad de lote, los
+# que faltaban se reintentan al vencer la reserva (claim_timeout()).
+#
+# Los enviados quedan sin cuerpo (los enlaces de recuperación de contraseña no se
+# guardan más de lo necesario) y purge_outbox() los borra tras RETENTION_DAYS.
+
+import contextlib
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from commons import metrics
+from commons.models import OutboxEmail
+
+_outbox_settings = getattr(settings, 'EMAIL_OUTBOX', {})
+
+BATCH_SIZE = _outbox_settings.get('BATCH_SIZE', 50)
+MAX_ATTEMPTS = _outbox_settings.get('MAX_ATTEMPTS', 6)
+BACKOFF_BASE = _outbox_settings.get('BACKOFF_BASE', 30)          # segundos antes del primer reintento
+BACKOFF_MAX = _outbox_settings.get('BACKOFF_MAX', 3600)
+CLAIM_TIMEOUT = _outbox_settings.get('CLAIM_TIMEOUT', 300)       # reserva mínima de un lote (segundos)
+RETENTION_DAYS = _outbox_settings.get('RETENTION_DAYS', 7)       # días que se guardan los enviados
+
+RESULT_FIELDS = ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'body']
+
+
+class NotSent(Exception):
+    """
+    send_messages() no lanzó error pero devolvió 0 mensajes enviados.
+    """
+
+
+def enqueue(subject, message, recipient_list, from_email=None):
+    """
+    Mismos argumentos que send_mail(); devuelve el OutboxEmail creado.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or '',
+        to=list(recipient_list),
+    )
+
+
+def backoff(attempts):
+    """
+    Segundos hasta el siguiente intento tras `attempts` fallos (con jitter).
+    """
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim_timeout(batch_size=BATCH_SIZE):
+    """
+    Segundos que se reserva un lote: el peor caso de entregarlo (cada correo puede
+    agotar EMAIL_TIMEOUT al enviar y otra vez al reconectar), y nunca menos de
+    CLAIM_TIMEOUT. Sin EMAIL_TIMEOUT no hay cota y se usa CLAIM_TIMEOUT.
+    """
+    timeout = getattr(settings, 'EMAIL_TIMEOUT', None) or 0
+    return max(CLAIM_TIMEOUT, (2 * batch_size + 1) * timeout)
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Reserva hasta batch_size correos vencidos moviendo su próximo intento
+    claim_timeout() hacia adelante; otro worker no los verá mientras dure la reserva.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboxEmail.objects.filter(id__in=ids).update(next_attempt_at=now + timedelta(seconds=claim_timeout(batch_size)))
+    return list(OutboxEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def deliver(batch, connection=None):
+    """
+    Envía el lote por una conexión SMTP y guarda el resultado de cada correo en
+    cuanto se conoce. Devuelve el conteo por resultado ('sent', 'retry', 'dead').
+    """
+    connection = connection or get_connection()
+    outcomes = {'sent': 0, 'retry': 0, 'dead': 0}
+    try:
+        connection.open()
+    except Exception:
+        # servidor caído: send_messages vuelve a intentar abrir y cada correo registra el error
+        pass
+    try:
+        for email in batch:
+            message = EmailMessage(email.subject, email.body, email.from_email, email.to, connection=connection)
+            try:
+                # 0 = no se envió (fail_silently, conexión que no abrió): no es 'sent'
+                if connection.send_messages([message]) == 0:
+                    raise NotSent("El backend de correo no envió el mensaje")
+            except Exception as exc:
+                outcome = _record_failure(email, exc)
+                _reopen(connection)
+            else:
+                outcome = 'sent'
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                email.body = ''
+            email.save(update_fields=RESULT_FIELDS)
+            outcomes[outcome] += 1
+            metrics.inc('outbox_messages_total', (outcome,))
+    finally:
+        with contextlib.suppress(Exception):
+            connection.close()
+    return outcomes
+
+
+def send_pending(batch_size=BATCH_SIZE, max_batches=None, connection=None):
+    """
+    Entrega lotes hasta vaciar los pendientes vencidos (o hasta max_batches).
+    """
+    totals = {'sent': 0, 'retry': 0, 'dead': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+        for outcome, count in deliver(batch, connection).items():
+            totals[outcome] += count
+        batches += 1
+    return totals
+
+
+def purge_outbox(days=RETENTION_DAYS):
+    """
+    Borra los correos enviados hace más de `days` días; devuelve cuántos. Los 'dead'
+    se conservan para revisión manual.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxEmail.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    return deleted
+
+
+def _record_failure(email, exc):
+    email.attempts += 1
+    email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+    if email.attempts >= MAX_ATTEMPTS:
+        email.status = 'dead'
+        return 'dead'
+    email.next_attempt_at = timezone.now() + timedelta(seconds=backoff(email.attempts))
+    return 'retry'
+
+
+def _reopen(connection):
+    # tras un error la sesión SMTP puede haber quedado inservible
+    with contextlib.suppress(Exception):
+        connection.close()
+    with contextlib.suppress(Exception):
+        connection.open()
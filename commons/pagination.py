@@ -0,0 +1,120 @@
+# Paginación por cursor (keyset) reutilizable para los viewsets
+
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginación por cursor sobre una clave indexada: cada página es un
+    `WHERE clave > cursor ORDER BY clave LIMIT n`, así que la página 1000 cuesta
+    lo mismo que la primera.
+
+    La vista puede permitir otros órdenes con `cursor_ordering_fields`
+    (p. ej. ('company_name',)); se piden con ?ordering=company_name o
+    ?ordering=-company_name y siempre se desempatan por id. Con esos órdenes la
+    posición del cursor guarda (valor, id) y la página siguiente es
+    `WHERE (campo, id) > (valor, id)`: los valores repetidos no se recorren con
+    OFFSET (CursorPagination de DRF solo guarda el primer campo). Los campos de
+    orden no admiten NULL.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('id',)
+    ordering_query_param = 'ordering'
+
+    def get_ordering(self, request, queryset, view):
+        requested = request.query_params.get(self.ordering_query_param)
+        allowed = getattr(view, 'cursor_ordering_fields', ())
+        if requested and requested.lstrip('-') in allowed:
+            direction = '-' if requested.startswith('-') else ''
+            return (requested, f'{direction}id')
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # igual que CursorPagination.paginate_queryset salvo el filtro por la posición
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.after(ordering, current_position))
+
+        # una fila de más para saber si hay página siguiente
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_following_position = len(results) > len(self.page)
+        following_position = (self._get_position_from_instance(results[-1], self.ordering)
+                              if has_following_position else None)
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def after(self, ordering, position):
+        """
+        Filas posteriores a `position` en `ordering` (comparación de tuplas expandida:
+        a > x OR (a = x AND b > y) ...).
+        """
+        values = self.decode_position(position)
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            name = field.lstrip('-')
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_position(self, position):
+        if len(self.ordering) == 1:
+            return [position]
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        if len(ordering) == 1:
+            return super()._get_position_from_instance(instance, ordering)
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values, ensure_ascii=False)
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
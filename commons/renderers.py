@@ -0,0 +1,79 @@
+# Renderers rápidos: JSON con orjson (si está instalado) y MessagePack (opcional)
+#
+# Ambos producen los mismos valores que el JSONRenderer de DRF: fechas con hora en la
+# zona horaria del proyecto (America/Bogota), Decimal como número y textos perezosos
+# (gettext_lazy) como cadenas. Sin orjson se usa la implementación estándar de DRF.
+
+import datetime
+
+from django.utils import timezone
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+
+class LocalJSONEncoder(encoders.JSONEncoder):
+    """
+    JSONEncoder de DRF que expresa las fechas con hora en la zona horaria local.
+    """
+
+    def default(self, obj):
+        if isinstance(obj, datetime.datetime) and timezone.is_aware(obj):
+            obj = timezone.localtime(obj)
+        return super().default(obj)
+
+
+_encoder = LocalJSONEncoder()
+
+
+def encode_default(obj):
+    # tipos que orjson/msgpack no conocen: misma conversión que el JSONEncoder de DRF
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer sobre orjson. Conserva la negociación de indentación de DRF
+    (solo admite 2 espacios) y el escape de U+2028/U+2029.
+    """
+    encoder_class = LocalJSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=encode_default, option=option)
+
+        # igual que DRF: separadores de línea escapados para poder incrustar el JSON en JS
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    MessagePack (Accept: application/msgpack). Requiere el paquete `msgpack`.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True, datetime=False)
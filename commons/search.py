@@ -0,0 +1,187 @@
+# Búsqueda por prefijo sobre una tabla de tokens normalizados e indexados
+#
+# Cada campo buscable se parte en tokens (palabras, partes del correo, documento sin
+# separadores) que se guardan en SearchToken. Buscar es un rango sobre el índice
+# (kind, company_id, token) con LIKE 'prefijo%', en lugar de un icontains que recorre
+# toda la tabla. Los resultados se rankean por peso del campo y coincidencia exacta.
+#
+# La intersección de los términos y el ranking se resuelven en una sola consulta
+# (GROUP BY object_id con un puntaje por término en HAVING), así que el límite se
+# aplica a los objetos que ya cumplen todos los términos y no a los tokens leídos.
+
+import functools
+import operator
+import re
+import unicodedata
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, Max, Q, Value, When
+
+from commons.models import SearchToken
+
+TOKEN_MAX_LENGTH = 64
+MAX_TERMS = 5
+
+_word_split = re.compile(r'[^0-9a-z]+')
+
+# índices registrados (kind -> SearchIndex), para el comando rebuild_search_index
+registry = {}
+
+
+def normalize(value):
+    value = unicodedata.normalize('NFKD', str(value))
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return value.lower().strip()
+
+
+def split_words(value):
+    return [word for word in _word_split.split(normalize(value)) if word]
+
+
+def field_tokens(field, value):
+    """
+    Tokens de un valor según el tipo de campo.
+    """
+    if value in (None, ''):
+        return set()
+
+    normalized = normalize(value)
+    if field == 'email':
+        local, _, domain = normalized.partition('@')
+        tokens = {normalized, local, domain, *split_words(local)}
+    elif field in ('identification_number', 'nit'):
+        tokens = {''.join(split_words(value))}  # documento sin puntos, guiones ni espacios
+    else:
+        words = split_words(value)
+        tokens = {*words, ' '.join(words)}  # palabras + frase completa (prefijo del nombre)
+    return {token[:TOKEN_MAX_LENGTH] for token in tokens if token}
+
+
+class SearchIndex:
+    """
+    Índice de búsqueda de un modelo: qué campos se tokenizan, con qué peso y
+    de dónde sale la empresa (tenant) de cada objeto.
+    """
+
+    def __init__(self, kind, model, fields, tenant_field):
+        self.kind = kind
+        self.model_label = model
+        self.fields = fields              # {campo: peso}
+        self.tenant_field = tenant_field  # 'company_id' o 'pk'
+        registry[kind] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def build_tokens(self, obj):
+        company_id = getattr(obj, self.tenant_field)
+        return [
+            SearchToken(kind=self.kind, object_id=obj.pk, company_id=company_id, field=field, token=token)
+            for field in self.fields
+            for token in field_tokens(field, getattr(obj, field))
+        ]
+
+    def index(self, objects):
+        objects = [obj for obj in objects if obj.pk is not None]
+        if not objects:
+            return
+        with transaction.atomic():
+            SearchToken.objects.filter(kind=self.kind, object_id__in=[obj.pk for obj in objects]).delete()
+            SearchToken.objects.bulk_create([token for obj in objects for token in self.build_tokens(obj)])
+
+    def remove(self, object_ids):
+        SearchToken.objects.filter(kind=self.kind, object_id__in=list(object_ids)).delete()
+
+    def needs_reindex(self, update_fields):
+        # save(update_fields=['password']) o ['last_login'] no cambian los tokens
+        if update_fields is None:
+            return True
+        return bool(set(update_fields) & {*self.fields, self.tenant_field, 'company'})
+
+    def rebuild(self, chunk_size=2000):
+        """
+        Reconstruye los tokens por tramos de pk, cada uno reemplazado en su transacción:
+        la búsqueda sigue respondiendo mientras tanto y, si falla a medias, los tramos
+        pendientes conservan sus tokens anteriores.
+        """
+        total, chunk, after = 0, [], None
+        for obj in self.model.objects.order_by('pk').iterator(chunk_size=chunk_size):
+            chunk.append(obj)
+            if len(chunk) >= chunk_size:
+                self._replace_range(chunk, after, until=chunk[-1].pk)
+                total += len(chunk)
+                after = chunk[-1].pk
+                chunk = []
+        # el último tramo llega hasta el final: borra los tokens de objetos ya eliminados
+        self._replace_range(chunk, after, until=None)
+        return total + len(chunk)
+
+    def _replace_range(self, objects, after, until):
+        stale = SearchToken.objects.filter(kind=self.kind)
+        if after is not None:
+            stale = stale.filter(object_id__gt=after)
+        if until is not None:
+            stale = stale.filter(object_id__lte=until)
+        with transaction.atomic():
+            stale.delete()
+            SearchToken.objects.bulk_create([token for obj in objects for token in self.build_tokens(obj)])
+
+    def search(self, query, company_id=None, limit=20):
+        """
+        Devuelve [(object_id, puntaje)] ordenado de mayor a menor relevancia.
+        Todos los términos de la consulta deben coincidir (como prefijo) con algún token,
+        o bien la consulta sin separadores: los documentos se indexan así ("1.234.567"
+        -> "1234567") y sus partes sueltas no coinciden con el token.
+        Si company_id es None, busca en todas las empresas (solo para staff).
+        """
+        words = split_words(query)
+        terms = list(dict.fromkeys(words))[:MAX_TERMS]
+        if not terms:
+            return []
+        joined = ''.join(words)[:TOKEN_MAX_LENGTH] if len(words) > 1 else None
+
+        tokens = SearchToken.objects.filter(kind=self.kind)
+        if company_id is not None:
+            tokens = tokens.filter(company_id=company_id)
+        prefixes = [*terms, joined] if joined else terms
+        tokens = tokens.filter(functools.reduce(operator.or_, (Q(token__startswith=term) for term in prefixes)))
+
+        # puntaje de cada término en cada objeto: el de su mejor token; 0 = no coincide
+        scores = {f'term_{index}': Max(self.term_score(term)) for index, term in enumerate(terms)}
+        matches = Q(**{f'{name}__gt': 0 for name in scores})
+        if joined:
+            scores['joined'] = Max(self.term_score(joined))
+            matches |= Q(joined__gt=0)
+        ranked = (tokens.values('object_id').annotate(**scores)
+                  .filter(matches)
+                  .annotate(score=sum(F(name) for name in scores))
+                  .order_by('-score', 'object_id')
+                  .values_list('object_id', 'score')[:limit])
+        return list(ranked)
+
+    def term_score(self, term):
+        """
+        Puntaje de un token para `term`: el peso de su campo, doble si coincide exacto.
+        """
+        whens = []
+        for field, weight in self.fields.items():
+            whens.append(When(field=field, token=term, then=Value(weight * 2)))
+            whens.append(When(field=field, token__startswith=term, then=Value(weight)))
+        return Case(*whens, default=Value(0))
+
+    def search_queryset(self, query, queryset=None, company_id=None, limit=20):
+        """
+        Objetos encontrados, en orden de relevancia (con el puntaje en `search_score`).
+        """
+        ranked = self.search(query, company_id=company_id, limit=limit)
+        queryset = self.model.objects.all() if queryset is None else queryset
+        objects = queryset.in_bulk([object_id for object_id, _ in ranked])
+        results = []
+        for object_id, score in ranked:
+            obj = objects.get(object_id)
+            if obj is not None:
+                obj.search_score = score
+                results.append(obj)
+        return results
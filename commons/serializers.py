@@ -0,0 +1,163 @@
+# Serialización de solo lectura sin instanciar modelos
+#
+# Un ValuesSerializer se declara a partir de un ModelSerializer existente y compila
+# sus campos una sola vez en: la lista de lookups para .values() y un transformador
+# fila -> dict con los conversores ya resueltos (solo los tipos que DRF transforma,
+# p. ej. fechas o decimales; el resto se copia tal cual). La salida es la misma que
+# la del ModelSerializer, sin crear instancias ni recorrer campos en cada fila.
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+
+from commons.mixins.serializers_mixins import parse_sparse_fields
+from commons.utils.cache import LRUCache
+
+# campos cuya representación es el mismo valor que devuelve la base de datos
+PASSTHROUGH_FIELDS = (drf_fields.CharField, drf_fields.ChoiceField, drf_fields.IntegerField,
+                      drf_fields.BooleanField, drf_fields.FloatField, relations.PrimaryKeyRelatedField)
+
+
+class ValuesPlan:
+    """
+    Plan compilado: lookups de .values() y transformación de cada fila.
+    """
+
+    def __init__(self, specs, extra_lookups=(), guards=()):
+        # specs: (nombre de salida, lookup de values(), ruta de atributos, conversor o None)
+        # guards: (nombre, lookup del FK intermedio, allow_null) para campos como
+        # 'company.company_name': si el FK es nulo DRF omite el campo (o devuelve None)
+        self.specs = specs
+        self.names = [name for name, _, _, _ in specs]
+        self.guards = list(guards)
+        lookups = [lookup for _, lookup, _, _ in specs]
+        extra_lookups = [*extra_lookups, *(lookup for _, lookup, _ in self.guards)]
+        # columnas que no se devuelven pero hacen falta (p. ej. para la paginación por cursor)
+        extra_lookups = [lookup for lookup in extra_lookups if lookup not in lookups]
+        self.lookups = lookups + extra_lookups
+        self.converters = [(name, converter) for name, _, _, converter in specs if converter is not None]
+        # si los nombres coinciden con los lookups y nada se convierte, la fila ya es la salida
+        self.passthrough = (not self.converters and not extra_lookups
+                            and all(name == lookup for name, lookup, _, _ in specs))
+        self.keys = [(name, lookup) for name, lookup, _, _ in specs]
+
+    def transform(self, row):
+        if self.passthrough:
+            return row
+        data = {name: row[lookup] for name, lookup in self.keys}
+        for name, converter in self.converters:
+            value = data[name]
+            if value is not None:
+                data[name] = converter(value)
+        for name, lookup, allow_null in self.guards:
+            if row[lookup] is None:
+                if allow_null:
+                    data[name] = None
+                else:
+                    del data[name]
+        return data
+
+    def serialize_object(self, instance):
+        """
+        Misma salida a partir de un objeto ya cargado (p. ej. el TokenPrincipal del JWT).
+        """
+        data = {}
+        allow_null = {name: allowed for name, _, allowed in self.guards}
+        for name, _, path, converter in self.specs:
+            value = instance
+            for attr in path[:-1]:
+                value = getattr(value, attr)
+                if value is None:
+                    break
+            if value is None:
+                if allow_null[name]:
+                    data[name] = None
+                continue
+            value = getattr(value, path[-1])
+            data[name] = converter(value) if converter is not None and value is not None else value
+        return data
+
+
+class ValuesSerializer:
+    """
+    Serializador declarativo de solo lectura:
+
+        class CompanyValuesSerializer(ValuesSerializer):
+            serializer_class = CompanySerializer
+
+    Solo admite campos que sean columnas del modelo (o de un FK con su pk); los
+    campos calculados, anidados o many-to-many deben seguir usando el ModelSerializer.
+    """
+    serializer_class = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # acotada: las combinaciones de ?fields= / ?omit= las elige el cliente
+        cls._plans = LRUCache(max_size=256, ttl=24 * 3600)
+
+    @classmethod
+    def get_plan(cls, fields=None, omit=(), extra_lookups=()):
+        key = (frozenset(fields) if fields is not None else None, frozenset(omit), tuple(extra_lookups))
+        plan = cls._plans.get(key)
+        if plan is None:
+            plan = cls._compile(fields, omit, extra_lookups)
+            cls._plans.set(key, plan)
+        return plan
+
+    @classmethod
+    def for_request(cls, request, extra_lookups=()):
+        """
+        Plan que respeta ?fields= / ?omit= (igual que SparseFieldsetMixin).
+        """
+        fields, omit = parse_sparse_fields(request)
+        return cls.get_plan(fields, omit, extra_lookups)
+
+    @classmethod
+    def _compile(cls, fields, omit, extra_lookups):
+        serializer = cls.serializer_class()
+        model = serializer.Meta.model
+        specs = []
+        guards = []
+        for name, field in serializer.fields.items():
+            if field.write_only or (fields is not None and name not in fields) or name in omit:
+                continue
+            if field.source == '*' or isinstance(field, (serializers.BaseSerializer, relations.ManyRelatedField)):
+                raise ImproperlyConfigured(f"{cls.__name__}: el campo '{name}' no se puede leer con .values()")
+
+            lookup, path = cls._resolve(model, field.source_attrs, name)
+            converter = None if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+            specs.append((name, lookup, path, converter))
+            if len(path) > 1:
+                guards.append((name, field.source_attrs[0], field.allow_null))
+        return ValuesPlan(specs, extra_lookups, guards)
+
+    @classmethod
+    def _resolve(cls, model, attrs, name):
+        # recorre la ruta de atributos por las relaciones del modelo
+        path = []
+        current = model
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(f"{cls.__name__}: '{name}' no es una columna de {current.__name__}")
+            last = index == len(attrs) - 1
+            if model_field.many_to_many or model_field.one_to_many:
+                raise ImproperlyConfigured(f"{cls.__name__}: '{name}' es una relación múltiple")
+            if last and model_field.is_relation:
+                # PrimaryKeyRelatedField: values() ya devuelve la clave
+                path.append(model_field.attname)
+            else:
+                path.append(attr)
+            if not last:
+                current = model_field.related_model
+        return '__'.join(attrs), path
+
+    @classmethod
+    def serialize_queryset(cls, queryset, plan=None):
+        plan = plan or cls.get_plan()
+        return [plan.transform(row) for row in queryset.values(*plan.lookups)]
+
+    @classmethod
+    def serialize_object(cls, instance, plan=None):
+        return (plan or cls.get_plan()).serialize_object(instance)
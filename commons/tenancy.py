@@ -0,0 +1,333 @@
+# Ubicación de los datos por empresa (tenant) en varias bases de datos (shards)
+#
+# El directorio (commons.models.TenantShard) dice en qué alias de DATABASES viven los
+# datos de cada empresa; las que no tienen entrada están en 'default'. Solo se reparten
+# los modelos de settings.TENANT_SHARDED_MODELS ('app.Modelo' -> campo de la empresa);
+# el resto (empresas, grupos, permisos, directorio) se queda en 'default'.
+#
+# El tenant de la petición sale del principal autenticado (request.user.company_id) y
+# TenantRouter (commons.db_routers) lleva a su shard las consultas de esos modelos.
+# Fuera de una petición (comandos, tareas) se fija con use_tenant(company_id).
+#
+# request_tenant(request) da además los datos básicos de la empresa de la petición
+# (Tenant o None) leídos de una LRU local con TTL respaldada por la caché compartida, que
+# las señales de Company invalidan. Los managers de commons.managers filtran por el id
+# del tenant (for_tenant()) sin JOIN a la empresa.
+
+import contextlib
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from commons.utils.cache import LRUCache
+
+DIRECTORY_KEY = 'tenant:shard:{company_id}'
+COMPANY_KEY = 'tenant:company:{company_id}'
+
+# segundos que un proceso confía en su copia local del directorio; move_tenant espera
+# al menos esto tras cambiar una entrada para que todos los procesos la vean
+DIRECTORY_TTL = getattr(settings, 'TENANT_DIRECTORY_TTL', 2)
+
+_directory = LRUCache(max_size=10000, ttl=DIRECTORY_TTL)
+
+# segundos que un proceso reutiliza su copia de los datos de una empresa (request_tenant);
+# en el proceso que guarda la empresa se invalida al instante
+COMPANY_TTL = getattr(settings, 'TENANT_COMPANY_TTL', 30)
+# una empresa inexistente se recuerda como mucho esto también en la caché compartida:
+# si se crea sin pasar por las señales (p. ej. un restore), vuelve a verse sola
+MISSING_COMPANY_TTL = getattr(settings, 'TENANT_MISSING_COMPANY_TTL', COMPANY_TTL)
+
+_companies = LRUCache(max_size=10000, ttl=COMPANY_TTL)
+
+_tenant = contextvars.ContextVar('tenant', default=None)
+_request = contextvars.ContextVar('tenant_request', default=None)
+
+
+class TenantMoving(APIException):
+    """
+    Escritura rechazada mientras los datos de la empresa se mueven de shard.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Los datos de la empresa se están moviendo; intenta de nuevo en unos segundos."
+    default_code = 'tenant_moving'
+
+    def __init__(self, detail=None, code=None, wait=None):
+        super().__init__(detail, code)
+        self.wait = wait or DIRECTORY_TTL
+
+
+def get_sharded_models():
+    return getattr(settings, 'TENANT_SHARDED_MODELS', {})
+
+
+def get_shards():
+    return getattr(settings, 'TENANT_SHARDS', [DEFAULT_DB_ALIAS])
+
+
+def tenant_field(model):
+    """
+    Campo de la empresa si el modelo está repartido por shards, None si no.
+    Las tablas intermedias many-to-many van con el modelo que las declara.
+    """
+    owner = model._meta.auto_created or model
+    return get_sharded_models().get(owner._meta.label)
+
+
+def instance_tenant(instance, field):
+    """
+    Empresa de un objeto siguiendo `field` ('company_id', 'user__company_id'...) solo
+    por relaciones ya cargadas; None si habría que consultar la BD.
+    """
+    value = instance
+    *path, last = field.split('__')
+    for attr in path:
+        if not type(value)._meta.get_field(attr).is_cached(value):
+            return None
+        value = getattr(value, attr)
+        if value is None:
+            return None
+    return getattr(value, last, None)
+
+
+@contextlib.contextmanager
+def use_tenant(company_id):
+    """
+    Fija el tenant del bloque (comandos, tareas o vistas de staff sobre otra empresa).
+    """
+    token = _tenant.set(company_id)
+    try:
+        yield
+    finally:
+        _tenant.reset(token)
+
+
+def set_tenant(company_id):
+    return _tenant.set(company_id)
+
+
+def reset_tenant(token):
+    _tenant.reset(token)
+
+
+def get_current_tenant():
+    """
+    Empresa del contexto: la fijada con use_tenant o la del usuario de la petición.
+    """
+    return request_tenant_id(_request.get())
+
+
+def request_tenant_id(request):
+    company_id = _tenant.get()
+    if company_id is not None or request is None:
+        return company_id
+    # DRF asigna request.user al autenticar; el lazy de la sesión no se evalúa aquí
+    # (evaluarlo consultaría la BD desde dentro del router)
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return getattr(user, 'company_id', None)
+
+
+def lookup(company_id):
+    """
+    (alias, estado) de la empresa según el directorio; caché local y compartida.
+    """
+    entry = _directory.get(company_id)
+    if entry is not None:
+        return entry
+    key = DIRECTORY_KEY.format(company_id=company_id)
+    entry = cache.get(key)
+    if entry is None:
+        from commons.models import TenantShard
+
+        row = (TenantShard.objects.using(DEFAULT_DB_ALIAS)
+               .filter(company_id=company_id).values_list('database', 'status').first())
+        entry = tuple(row) if row else (DEFAULT_DB_ALIAS, 'active')
+        cache.set(key, entry, timeout=None)
+    _directory.set(company_id, entry)
+    return entry
+
+
+def tenant_database(company_id):
+    return lookup(company_id)[0]
+
+
+def invalidate(company_id):
+    """
+    Publica la entrada actual del directorio en la caché compartida (la local de los
+    demás procesos caduca en DIRECTORY_TTL segundos).
+    """
+    cache.delete(DIRECTORY_KEY.format(company_id=company_id))
+    _directory.delete(company_id)
+    return lookup(company_id)
+
+
+def database_for(model, company_id):
+    """
+    Alias donde están las filas de `model` de una empresa; None si el modelo no está
+    repartido (para queryset.using(), que con None vuelve a consultar los routers).
+    """
+    if company_id is None or tenant_field(model) is None:
+        return None
+    return tenant_database(company_id)
+
+
+class Tenant:
+    """
+    Datos básicos de la empresa de la petición (request_tenant).
+    """
+    __slots__ = ('id', 'company_name', 'nit', 'email')
+
+    def __init__(self, id, company_name, nit, email):
+        self.id = id
+        self.company_name = company_name
+        self.nit = nit
+        self.email = email
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def database(self):
+        # del directorio solo si se pide: quien lee el nombre no paga su consulta
+        return tenant_database(self.id)
+
+    def __eq__(self, other):
+        return isinstance(other, Tenant) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return self.company_name
+
+
+def get_tenant(company_id):
+    """
+    Tenant de la empresa (None si no existe); LRU local, caché compartida y, si
+    ninguna lo tiene, una consulta a 'default'.
+    """
+    if company_id is None:
+        return None
+    row = _companies.get(company_id)
+    if row is None:
+        key = COMPANY_KEY.format(company_id=company_id)
+        row = cache.get(key)
+        if row is None:
+            Company = apps.get_model('companies', 'Company')
+            row = (Company.objects.using(DEFAULT_DB_ALIAS).filter(pk=company_id)
+                   .values('id', 'company_name', 'nit', 'email').first()) or {}
+            cache.set(key, row, timeout=None if row else MISSING_COMPANY_TTL)
+        _companies.set(company_id, row, ttl=None if row else MISSING_COMPANY_TTL)
+    if not row:
+        return None
+    return Tenant(**row)
+
+
+def request_tenant(request):
+    """
+    Tenant de la petición (None sin empresa), resuelto una vez por petición y empresa.
+
+    Se resuelve en el primer uso, como request.user: en las vistas de DRF, después de
+    autenticar (y de TenantFromURLMixin, que cambia la empresa y con ella el resultado).
+    """
+    request = getattr(request, '_request', request)   # Request de DRF -> HttpRequest
+    company_id = request_tenant_id(request)
+    cached = request.__dict__.get('_tenant_cache')
+    if cached is None or cached[0] != company_id:
+        cached = request._tenant_cache = (company_id, get_tenant(company_id))
+    return cached[1]
+
+
+def invalidate_tenant(company_id):
+    """
+    Descarta los datos cacheados de la empresa (señales de Company).
+    """
+    cache.delete(COMPANY_KEY.format(company_id=company_id))
+    _companies.delete(company_id)
+
+
+class TenantModelBackend(ModelBackend):
+    """
+    ModelBackend que busca al usuario en el shard de su empresa: en el login todavía no
+    se conoce la empresa, la da el directorio global de usuarios (UserManager.located).
+    El usuario queda ligado a la base donde se encontró.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if tenant_field(UserModel) is None:
+            return super().authenticate(request, username, password, **kwargs)
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            manager = UserModel._default_manager.located(**{UserModel.USERNAME_FIELD: username})
+            user = manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # mismo costo que un usuario existente (ver ModelBackend.authenticate)
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        # el hash se espera fuera del bucle de eventos (User.acheck_password / aset_password)
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        manager = UserModel._default_manager
+        if tenant_field(UserModel) is not None:
+            manager = await manager.alocated(**{UserModel.USERNAME_FIELD: username})
+        try:
+            user = await manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            await UserModel().aset_password(password)
+            return None
+        if await user.acheck_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class TenantMiddleware:
+    """
+    Expone la petición en curso para que el TenantRouter (y request_tenant) resuelvan
+    su empresa a partir del usuario autenticado.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request.reset(token)
+
+    async def __acall__(self, request):
+        token = _request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _request.reset(token)
@@ -0,0 +1,155 @@
+# Presupuestos de consultas SQL por ruta para la suite de pruebas
+#
+# ROUTE_BUDGETS fija, para cada ruta con nombre de users/urls_user.py y
+# companies/urls_company.py, el máximo de consultas y de milisegundos en SQL que puede
+# gastar una petición. query_budget() mide un bloque (como context manager o como
+# decorador) y, si se pasa, falla con el SQL ejecutado para ver de dónde sale el N+1.
+# Al agregar una ruta hay que darle presupuesto: commons.tests recorre todas.
+#
+# El número de consultas se verifica siempre. El tiempo depende de la máquina (CI
+# compartida, SQLite en disco), así que solo se verifica con QUERY_BUDGET_CHECK_TIME=1
+# en el entorno, p. ej. en una corrida de rendimiento dedicada.
+
+import os
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver
+
+
+CHECK_TIME = os.getenv('QUERY_BUDGET_CHECK_TIME', '').lower() in ('1', 'true')
+
+
+class QueryBudget:
+    """
+    Máximo de consultas y de tiempo en SQL (ms) de una petición.
+    """
+    __slots__ = ('queries', 'time_ms')
+
+    def __init__(self, queries, time_ms=200):
+        self.queries = queries
+        self.time_ms = time_ms
+
+    def __repr__(self):
+        return f"QueryBudget(queries={self.queries}, time_ms={self.time_ms})"
+
+
+# nombre de la ruta -> presupuesto (datos de prueba pequeños; cachés frías)
+ROUTE_BUDGETS = {
+    # users/urls_user.py
+    'register': QueryBudget(16),
+    'login': QueryBudget(2),
+    'token_refresh': QueryBudget(2),
+    'logout': QueryBudget(7),
+    'profile': QueryBudget(0),
+    'update': QueryBudget(11),
+    'change-password': QueryBudget(7),
+    'async-login': QueryBudget(2),
+    'async-token_refresh': QueryBudget(2),
+    'async-logout': QueryBudget(7),
+    'async-profile': QueryBudget(0),
+    'request-reset-password': QueryBudget(3),
+    'password-reset-confirm': QueryBudget(1),
+    'set-new-password': QueryBudget(7),
+    'users-search': QueryBudget(3),
+    'users-export': QueryBudget(1),
+    'users-changes': QueryBudget(2),
+    'company-users': QueryBudget(3),   # + empresa del tenant con la caché fría
+    'users-import': QueryBudget(16),
+    # companies/urls_company.py
+    'companies-bulk-create-with-admin': QueryBudget(19),
+    'companies-search': QueryBudget(3),
+    'companies-export': QueryBudget(1),
+    'companies-changes': QueryBudget(2),
+    'companies/create-with-admin-list': QueryBudget(26),
+    'companies/create-with-admin-detail': QueryBudget(0),
+    'companies-list': QueryBudget(1),
+    'companies-detail': QueryBudget(1),
+    'api-root': QueryBudget(0),
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget(ContextDecorator):
+    """
+    Falla si el bloque ejecuta más de `max_queries` consultas o pasa más de
+    `max_time_ms` en SQL (sumando las conexiones de `using`):
+
+        with query_budget(3, label='profile'):
+            client.get(url)
+
+        @query_budget(5)
+        def test_algo(self): ...
+    """
+
+    def __init__(self, max_queries=None, max_time_ms=None, using=(DEFAULT_DB_ALIAS,), label=None):
+        self.max_queries = max_queries
+        self.max_time_ms = max_time_ms
+        self.using = (using,) if isinstance(using, str) else tuple(using)
+        self.label = label
+        self.captured = []
+
+    @classmethod
+    def for_route(cls, url_name, **kwargs):
+        try:
+            budget = ROUTE_BUDGETS[url_name]
+        except KeyError:
+            raise QueryBudgetExceeded(f"La ruta '{url_name}' no tiene presupuesto en commons.testing.ROUTE_BUDGETS")
+        return cls(budget.queries, budget.time_ms if CHECK_TIME else None, label=url_name, **kwargs)
+
+    def __enter__(self):
+        self._contexts = [CaptureQueriesContext(connections[alias]) for alias in self.using]
+        for context in self._contexts:
+            context.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for context in self._contexts:
+            context.__exit__(exc_type, exc_value, traceback)
+        self.captured = [query for context in self._contexts for query in context.captured_queries]
+        if exc_type is None:
+            self.check()
+        return False
+
+    @property
+    def num_queries(self):
+        return len(self.captured)
+
+    @property
+    def time_ms(self):
+        return sum(float(query['time']) for query in self.captured) * 1000
+
+    def check(self):
+        problems = []
+        if self.max_queries is not None and self.num_queries > self.max_queries:
+            problems.append(f"{self.num_queries} consultas (máximo {self.max_queries})")
+        if self.max_time_ms is not None and self.time_ms > self.max_time_ms:
+            problems.append(f"{self.time_ms:.1f} ms en SQL (máximo {self.max_time_ms} ms)")
+        if problems:
+            label = f"'{self.label}': " if self.label else ''
+            lines = [f"Presupuesto de SQL excedido {label}{', '.join(problems)}"]
+            lines += [f"  {index}. [{float(query['time']) * 1000:.1f} ms] {query['sql']}"
+                      for index, query in enumerate(self.captured, start=1)]
+            raise QueryBudgetExceeded('\n'.join(lines))
+
+
+def route_names(*urlconfs):
+    """
+    Nombres de las rutas de los módulos de URLs (incluidos los include()).
+    """
+    names = []
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name and pattern.name not in names:
+                names.append(pattern.name)
+
+    for urlconf in urlconfs:
+        walk(urlconf.urlpatterns)
+    return names
@@ -1,3 +1,944 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import smtplib
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import smart_bytes
+from django.utils.http import urlsafe_base64_encode
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from commons import db_routers, metrics, outbox, search, tenancy
+from commons.middleware import ReadYourWritesMiddleware
+from commons.parsers import FastJSONParser, MessagePackParser
+from commons.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+from commons import testing
+from commons.testing import ROUTE_BUDGETS, QueryBudgetExceeded, query_budget, route_names
+from commons.throttling import IPRateThrottle, SlidingWindowRateThrottle
+from commons.models import OutboxEmail, SearchToken, TenantShard, Tombstone
+from commons.utils import sync
+from commons.utils.validators import validate_user_company
+from companies.models import Company
+from users.models import User, UserIdentity
+from users.search import user_index
+from users.serializers import UserUpdateSerializer
+from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+from users.services import UserImporter
+from users.tests import auth_header
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], READ_YOUR_WRITES_WINDOW=5)
+class ReplicaRouterTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.router = db_routers.ReplicaRouter()
+        # cada base tiene una empresa distinta para saber de dónde se leyó
+        Company.objects.using('default').create(company_name='Primaria', nit='1', cell='3000000000', email='primaria@test.co')
+        Company.objects.using('replica').create(company_name='Replica', nit='2', cell='3000000000', email='replica@test.co')
+
+    def in_request(self, method):
+        request = getattr(RequestFactory(), method.lower())('/')
+        return db_routers.begin_request(request, safe=method in ('GET', 'HEAD', 'OPTIONS'))
+
+    def list_names(self):
+        response = self.client.get(reverse('companies-list'))
+        self.assertEqual(response.status_code, 200)
+        return [company['company_name'] for company in response.json()['results']]
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Company), 'default')
+
+    def test_safe_requests_read_from_replica(self):
+        token = self.in_request('GET')
+        try:
+            self.assertEqual(self.router.db_for_read(Company), 'replica')
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Company), 'default')
+        finally:
+            db_routers.end_request(token)
+
+    def test_unsafe_requests_and_writes_use_primary(self):
+        token = self.in_request('POST')
+        try:
+            self.assertEqual(self.router.db_for_read(Company), 'default')
+            self.assertEqual(self.router.db_for_write(Company), 'default')
+        finally:
+            state = db_routers.end_request(token)
+        self.assertTrue(state.wrote)
+
+    def test_replicas_disabled_without_setting(self):
+        token = self.in_request('GET')
+        try:
+            with self.settings(DATABASE_REPLICAS=[]):
+                self.assertEqual(self.router.db_for_read(Company), 'default')
+        finally:
+            db_routers.end_request(token)
+
+    def test_list_endpoint_reads_replica(self):
+        self.assertEqual(self.list_names(), ['Replica'])
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        response = self.client.post('/api/v1/companies/create-with-admin/', {
+            'company_name': 'Nueva', 'nit': '3', 'cell': '3000000000', 'email': 'nueva@test.co',
+            'admin': {'identification_number': '10', 'email': 'admin@nueva.co', 'username': 'admin',
+                      'rol': 'admin', 'password': 'secreta-123'},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+        # dentro de la ventana: primaria (ve su propia escritura)
+        self.assertEqual(self.list_names(), ['Primaria', 'Nueva'])
+
+        # vencida la ventana (la caché expira la marca): vuelve a la réplica
+        cache.clear()
+        self.assertEqual(self.list_names(), ['Replica'])
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], READ_YOUR_WRITES_WINDOW=5)
+class ReadYourWritesMiddlewareTests(TransactionTestCase):
+    # sin la transacción de TestCase: dentro de un bloque atómico todo se lee de la primaria
+
+    def setUp(self):
+        cache.clear()
+        self.router = db_routers.ReplicaRouter()
+        self.user = User(pk=42, email='escribe@test.co')
+
+    def request(self, method='post', ip='10.0.0.1', user=None):
+        request = getattr(RequestFactory(), method)('/', REMOTE_ADDR=ip)
+        if user is not None:
+            request.user = user
+        return request
+
+    def write(self, request):
+        self.router.db_for_write(Company)
+        return 'ok'
+
+    def read_database(self, request):
+        return self.router.db_for_read(Company)
+
+    def pins(self, *idents):
+        return sorted(key.removeprefix('db:pin:') for key in
+                      cache.get_many([db_routers.PIN_KEY.format(ident=ident) for ident in idents]))
+
+    def test_a_write_pins_the_ip_and_the_user(self):
+        ReadYourWritesMiddleware(self.write)(self.request(user=self.user))
+        self.assertEqual(self.pins('ip:10.0.0.1', f'user:{self.user.pk}'), ['ip:10.0.0.1', f'user:{self.user.pk}'])
+
+        middleware = ReadYourWritesMiddleware(self.read_database)
+        self.assertEqual(middleware(self.request('get')), 'default')                            # misma IP
+        self.assertEqual(middleware(self.request('get', ip='10.0.0.2', user=self.user)), 'default')  # mismo usuario
+        self.assertEqual(middleware(self.request('get', ip='10.0.0.2')), 'replica')
+
+    def test_requests_without_writes_do_not_pin(self):
+        ReadYourWritesMiddleware(lambda request: 'ok')(self.request(user=self.user))
+        self.assertEqual(self.pins('ip:10.0.0.1', f'user:{self.user.pk}'), [])
+        self.assertEqual(ReadYourWritesMiddleware(self.read_database)(self.request('get')), 'replica')
+
+    def test_nothing_is_pinned_without_replicas(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            ReadYourWritesMiddleware(self.write)(self.request())
+        self.assertEqual(self.pins('ip:10.0.0.1'), [])
+
+    async def test_async_requests_pin_too(self):
+        async def write(request):
+            return self.write(request)
+
+        self.assertEqual(await ReadYourWritesMiddleware(write)(self.request()), 'ok')
+        self.assertEqual(self.pins('ip:10.0.0.1'), ['ip:10.0.0.1'])
+
+
+SHARDED_MODELS = {
+    'users.User': 'company_id',
+    'token_blacklist.OutstandingToken': 'user__company_id',
+    'token_blacklist.BlacklistedToken': 'token__user__company_id',
+}
+
+
+@override_settings(TENANT_SHARDS=['default', 'shard_1'], TENANT_SHARDED_MODELS=SHARDED_MODELS)
+class TenantShardingTests(TransactionTestCase):
+    databases = {'default', 'shard_1'}
+
+    def setUp(self):
+        cache.clear()
+        tenancy._directory.clear()
+        Group.objects.create(name='Administradores')
+        self.company = Company.objects.create(company_name='Movida', nit='1', cell='3000000000', email='movida@test.co')
+        self.other = Company.objects.create(company_name='Quieta', nit='2', cell='3000000000', email='quieta@test.co')
+        self.admin = User.objects.create_user(identification_number='1', email='admin@movida.co', username='admin',
+                                              rol='admin', company=self.company, password='secreta-123')
+        User.objects.create(identification_number='2', email='cajero@movida.co', username='cajero',
+                            rol='cajero', company=self.company, password='!')
+        User.objects.create(identification_number='3', email='cajero@quieta.co', username='otro',
+                            rol='cajero', company=self.other, password='!')
+
+    def move(self):
+        call_command('move_tenant', self.company.pk, 'shard_1', freeze_wait=0, stdout=StringIO())
+
+    def test_move_copies_rows_and_updates_directory(self):
+        self.move()
+        self.assertEqual(User.objects.using('shard_1').filter(company_id=self.company.pk).count(), 2)
+        self.assertEqual(User.groups.through.objects.using('shard_1').count(), 1)
+        self.assertTrue(Company.objects.using('shard_1').filter(pk=self.company.pk).exists())
+        self.assertFalse(User.objects.using('default').filter(company_id=self.company.pk).exists())
+        self.assertTrue(User.objects.using('default').filter(company_id=self.other.pk).exists())
+        self.assertEqual(TenantShard.objects.values_list('database', 'status').get(company_id=self.company.pk),
+                         ('shard_1', 'active'))
+
+    def test_router_follows_current_tenant(self):
+        self.move()
+        with tenancy.use_tenant(self.company.pk):
+            self.assertEqual(User.objects.count(), 2)
+            User.objects.filter(pk=self.admin.pk).update(username='renombrado')
+        with tenancy.use_tenant(self.other.pk):
+            self.assertEqual(User.objects.count(), 1)
+        self.assertEqual(User.objects.using('shard_1').get(pk=self.admin.pk).username, 'renombrado')
+
+    def test_login_and_company_users_from_shard(self):
+        self.move()
+        response = self.client.post(reverse('login'), {'email': 'admin@movida.co', 'password': 'secreta-123'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {response.json()['access']}"}
+        refresh = response.json()['refresh']
+
+        response = self.client.get(reverse('company-users', kwargs={'company_id': self.company.pk}), **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(user['username'] for user in response.json()['results']), ['admin', 'cajero'])
+
+        # el refresh token quedó registrado en el shard (lista negra de simplejwt)
+        self.assertEqual(OutstandingToken.objects.using('shard_1').count(), 1)
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_email_and_identification_unique_across_shards(self):
+        self.move()
+        data = {'identification_number': '9', 'email': 'ADMIN@movida.co', 'username': 'copia', 'rol': 'cajero',
+                'password': 'secreta-123', 'company': self.other.pk}
+        response = self.client.post(reverse('register'), data, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+        response = self.client.post(reverse('register'), {**data, 'email': 'copia@quieta.co', 'identification_number': '1'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('identification_number', response.json())
+
+        # la restricción vale aunque se salte la validación (carreras, otros caminos)
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user(identification_number='9', email='admin@movida.co', username='copia',
+                                     rol='cajero', company=self.other, password='secreta-123')
+        self.assertFalse(User.objects.using('default').filter(username='copia').exists())
+        self.assertEqual(UserIdentity.objects.get(email='admin@movida.co').company_id, self.company.pk)
+
+    def test_new_users_go_to_the_company_shard(self):
+        self.move()
+        self.assertEqual(db_routers.TenantRouter().db_for_write(User, instance=User(company=self.company)), 'shard_1')
+
+        response = self.client.post(reverse('register'), {
+            'identification_number': '6', 'email': 'registrado@movida.co', 'username': 'registrado',
+            'rol': 'cajero', 'password': 'secreta-123', 'company': self.company.pk,
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        created = User.objects.create_user(identification_number='7', email='creado@movida.co', username='creado',
+                                           rol='cajero', company=self.company, password='secreta-123')
+        report = UserImporter(self.company).run([{'identification_number': '8', 'email': 'importado@movida.co',
+                                                  'username': 'importado', 'rol': 'cliente'}])
+        self.assertEqual(report['created'], 1, report)
+
+        for email in ('registrado@movida.co', 'creado@movida.co', 'importado@movida.co'):
+            self.assertTrue(User.objects.using('shard_1').filter(email=email).exists())
+            self.assertFalse(User.objects.using('default').filter(email=email).exists())
+        self.assertEqual(created._state.db, 'shard_1')
+
+    def test_user_ids_unique_across_shards(self):
+        self.move()
+        with tenancy.use_tenant(self.company.pk):
+            moved = User.objects.create(identification_number='4', email='nuevo@movida.co', username='nuevo',
+                                        rol='cajero', company=self.company, password='!')
+        stayed = User.objects.create(identification_number='5', email='nuevo@quieta.co', username='nuevo',
+                                     rol='cajero', company=self.other, password='!')
+
+        self.assertTrue(User.objects.using('shard_1').filter(pk=moved.pk).exists())
+        self.assertTrue(User.objects.using('default').filter(pk=stayed.pk).exists())
+        # el id de cada usuario es el de su identidad en el directorio global
+        ids = [*User.objects.using('shard_1').values_list('pk', flat=True),
+               *User.objects.using('default').values_list('pk', flat=True)]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(sorted(ids), sorted(UserIdentity.objects.values_list('pk', flat=True)))
+        self.assertEqual(UserIdentity.objects.get(pk=moved.pk).email, 'nuevo@movida.co')
+
+    def test_update_and_delete_keep_directory(self):
+        self.move()
+        other_user = User.objects.using('default').get(email='cajero@quieta.co')
+        serializer = UserUpdateSerializer(other_user, data={'email': 'cajero@movida.co'}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('email', serializer.errors)
+
+        with tenancy.use_tenant(self.company.pk):
+            User.objects.get(email='cajero@movida.co').delete()
+        serializer = UserUpdateSerializer(other_user, data={'email': 'cajero@movida.co'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(UserIdentity.objects.get(pk=other_user.pk).email, 'cajero@movida.co')
+
+    def test_writes_rejected_while_moving(self):
+        self.move()
+        headers = auth_header(self.admin)
+        TenantShard.objects.filter(company_id=self.company.pk).update(status='moving')
+        tenancy.invalidate(self.company.pk)
+
+        with tenancy.use_tenant(self.company.pk):
+            admin = User.objects.get(pk=self.admin.pk)   # las lecturas siguen funcionando
+            with self.assertRaises(tenancy.TenantMoving):
+                admin.save()
+
+        response = self.client.patch(reverse('update', kwargs={'id': self.admin.pk}), {'username': 'nuevo'},
+                                     content_type='application/json', **headers)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(tenancy.DIRECTORY_TTL))
+
+
+class TenantContextTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Contexto', nit='1', cell='3000000000', email='contexto@test.co')
+        cls.other = Company.objects.create(company_name='Otra', nit='2', cell='3000000000', email='otra@test.co')
+        cls.admin = User.objects.create(identification_number='1', email='admin@contexto.co', username='admin',
+                                        rol='admin', company=cls.company, password='!')
+        User.objects.create(identification_number='2', email='cajero@otra.co', username='cajero',
+                            rol='cajero', company=cls.other, password='!')
+
+    def setUp(self):
+        cache.clear()
+        tenancy._companies.clear()
+        tenancy._directory.clear()
+
+    def resolve(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return tenancy.TenantMiddleware(tenancy.request_tenant)(request)
+
+    def test_request_tenant_is_cached_and_invalidated_on_save(self):
+        with self.assertNumQueries(2):   # empresa + directorio de shards
+            tenant = self.resolve(self.admin)
+            self.assertEqual((tenant.id, tenant.company_name, tenant.database), (self.company.pk, 'Contexto', 'default'))
+        with self.assertNumQueries(0):
+            self.resolve(self.admin)
+        # otro proceso (LRU locales vacías) lo toma de la caché compartida
+        tenancy._companies.clear()
+        tenancy._directory.clear()
+        with self.assertNumQueries(0):
+            self.resolve(self.admin)
+
+        self.company.company_name = 'Renombrada'
+        self.company.save()
+        self.assertEqual(self.resolve(self.admin).company_name, 'Renombrada')
+
+        staff = User(email='staff@test.co', is_staff=True)
+        self.assertIs(self.resolve(staff), None)
+        with tenancy.use_tenant(self.other.pk):
+            self.assertEqual(self.resolve(staff).company_name, 'Otra')
+
+    def test_missing_company_is_remembered_for_a_short_time(self):
+        missing_id = self.other.pk + 100
+        restore = lambda: Company.objects.bulk_create([   # sin señales, como un restore
+            Company(pk=missing_id, company_name='Restaurada', nit='3', cell='3000000000', email='r@test.co')])
+        self.assertIsNone(tenancy.get_tenant(missing_id))
+        restore()
+        with self.assertNumQueries(0):
+            self.assertIsNone(tenancy.get_tenant(missing_id))
+
+        Company.objects.filter(pk=missing_id).delete()
+        cache.clear()
+        tenancy._companies.clear()
+        with mock.patch.object(tenancy, 'MISSING_COMPANY_TTL', 0):
+            self.assertIsNone(tenancy.get_tenant(missing_id))
+            restore()
+            self.assertEqual(tenancy.get_tenant(missing_id).company_name, 'Restaurada')
+
+    def test_tenant_manager_and_validators_use_company_id(self):
+        self.assertEqual(list(User.objects.for_tenant(self.company.pk).values_list('email', flat=True)),
+                         ['admin@contexto.co'])
+        with tenancy.use_tenant(self.other.pk):
+            self.assertEqual(User.objects.for_tenant().count(), 1)
+        self.assertEqual(User.objects.for_tenant().count(), 0)
+
+        user = User.objects.get(pk=self.admin.pk)
+        with self.assertNumQueries(0):
+            validate_user_company(user)
+            serializer = UserUpdateSerializer(user, data={'username': 'nuevo'}, partial=True)
+            self.assertEqual(serializer.validate({'username': 'nuevo'}), {'username': 'nuevo'})
+
+
+class RouteQueryBudgetTests(TestCase):
+    """
+    Recorre todas las rutas de users y companies con datos de prueba y verifica que
+    cada petición cumpla su presupuesto de commons.testing.ROUTE_BUDGETS.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Administradores', 'Cajeros', 'Clientes', 'Proveedores'):
+            Group.objects.create(name=name)
+        cls.company = Company.objects.create(company_name='Presupuesto', nit='100', cell='3000000000', email='presupuesto@test.co')
+        cls.admin = User.objects.create_user(identification_number='1', email='admin@presupuesto.co', username='admin',
+                                             rol='admin', company=cls.company, password='secreta-123')
+        for i in range(10):
+            User.objects.create_user(identification_number=f'c{i}', email=f'cliente{i}@presupuesto.co',
+                                     username=f'cliente {i}', rol='cliente', company=cls.company, password=None)
+        cls.staff = User.objects.create(identification_number='s1', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+        tenancy._companies.clear()
+        tenancy._directory.clear()
+
+    def requests(self):
+        """
+        (ruta, método, kwargs de reverse, argumentos del cliente, estado esperado) en
+        un orden en que cada petición deja los datos que necesita la siguiente (el token
+        de recuperación deja de valer tras el login o el cambio de contraseña).
+        """
+        company = {'company_id': self.company.pk}
+        admin = auth_header(self.admin)
+        staff = auth_header(self.staff)
+        refresh = str(CustomTokenObtainPairSerialier.get_token(self.admin))
+        async_refresh = str(CustomTokenObtainPairSerialier.get_token(self.admin))
+        uidb64 = urlsafe_base64_encode(smart_bytes(self.admin.pk))
+        reset_token = PasswordResetTokenGenerator().make_token(self.admin)
+        json = {'content_type': 'application/json'}
+        csv = SimpleUploadedFile('usuarios.csv', b'identification_number,email,username,rol\n'
+                                 b'i1,importado1@presupuesto.co,importado 1,cliente\n'
+                                 b'i2,importado2@presupuesto.co,importado 2,cajero\n')
+        new_company = {'company_name': 'Nueva', 'nit': '200', 'cell': '3000000000', 'email': 'nueva@test.co',
+                       'admin': {'identification_number': '20', 'email': 'admin@nueva.co', 'username': 'admin nueva',
+                                 'rol': 'admin', 'password': 'secreta-123'}}
+        bulk = [{'company_name': f'Lote {i}', 'nit': f'30{i}', 'cell': '3000000000', 'email': f'lote{i}@test.co',
+                 'admin': {'identification_number': f'3{i}', 'email': f'admin@lote{i}.co', 'username': f'admin {i}'}}
+                for i in range(3)]
+        return [
+            ('api-root', 'get', {}, {}, 200),
+            ('profile', 'get', {}, admin, 200),
+            ('companies-list', 'get', {}, {}, 200),
+            ('companies-detail', 'get', {'pk': self.company.pk}, {}, 200),
+            ('companies-search', 'get', {}, {'data': {'q': 'presu'}, **admin}, 200),
+            ('companies-export', 'get', {}, admin, 200),
+            ('users-search', 'get', {}, {'data': {'q': 'cliente'}, **admin}, 200),
+            ('users-export', 'get', {}, admin, 200),
+            ('users-changes', 'get', {}, {'data': {'updated_since': sync.encode_cursor(timezone.now())}, **admin}, 200),
+            ('companies-changes', 'get', {}, {'data': {'updated_since': sync.encode_cursor(timezone.now())}, **admin}, 200),
+            ('company-users', 'get', company, admin, 200),
+            ('password-reset-confirm', 'get', {'uidb64': uidb64, 'token': reset_token}, {}, 200),
+            ('set-new-password', 'patch', {}, {'data': {'password': 'nueva-secreta-789', 'uidb64': uidb64,
+                                                        'token': reset_token}, **json}, 200),
+            ('token_refresh', 'post', {}, {'data': {'refresh': refresh}, **json}, 200),
+            ('async-token_refresh', 'post', {}, {'data': {'refresh': refresh}, **json}, 200),
+            ('async-profile', 'get', {}, admin, 200),
+            ('login', 'post', {}, {'data': {'email': 'admin@presupuesto.co', 'password': 'nueva-secreta-789'}, **json}, 200),
+            ('async-login', 'post', {}, {'data': {'email': 'admin@presupuesto.co', 'password': 'nueva-secreta-789'}, **json}, 200),
+            ('register', 'post', {}, {'data': {'identification_number': '50', 'email': 'nuevo@presupuesto.co',
+                                               'username': 'nuevo', 'rol': 'cliente', 'password': 'secreta-123',
+                                               'company': self.company.pk}, **json}, 201),
+            ('update', 'patch', {'id': self.admin.pk}, {'data': {'username': 'admin renombrado'}, **json, **admin}, 200),
+            ('users-import', 'post', company, {'data': {'file': csv}, **admin}, 200),
+            ('companies/create-with-admin-list', 'post', {}, {'data': new_company, **json}, 201),
+            ('companies/create-with-admin-detail', 'post', {'pk': self.company.pk}, json, 405),
+            ('companies-bulk-create-with-admin', 'post', {}, {'data': bulk, **json, **staff}, 200),
+            ('request-reset-password', 'post', {}, {'data': {'email': 'admin@presupuesto.co'}, **json}, 200),
+            ('change-password', 'put', {}, {'data': {'current_password': 'nueva-secreta-789', 'new_password': 'otra-secreta-456'},
+                                            **json, **admin}, 200),
+            ('async-logout', 'post', {}, {'data': {'refresh': async_refresh}, **json, **admin}, 200),
+            ('logout', 'post', {}, {'data': {'refresh': refresh}, **json, **admin}, 200),
+        ]
+
+    def test_every_route_has_a_budget(self):
+        import companies.urls_company
+        import users.urls_user
+
+        names = route_names(users.urls_user, companies.urls_company)
+        self.assertEqual(sorted(set(names) - set(ROUTE_BUDGETS)), [])
+        self.assertEqual(sorted(names), sorted(name for name, *_ in self.requests()))
+
+    def test_time_limit_is_opt_in_and_query_count_is_strict(self):
+        with mock.patch.object(testing, 'CHECK_TIME', False):
+            self.assertIsNone(query_budget.for_route('companies-list').max_time_ms)
+        with mock.patch.object(testing, 'CHECK_TIME', True):
+            self.assertEqual(query_budget.for_route('companies-list').max_time_ms, ROUTE_BUDGETS['companies-list'].time_ms)
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 consultas (máximo 1)'):
+            with query_budget(1, label='prueba'):
+                Company.objects.count()
+                Company.objects.exists()
+
+    def test_routes_stay_within_budget(self):
+        for name, method, kwargs, client_kwargs, expected_status in self.requests():
+            with self.subTest(route=name):
+                url = reverse(name, kwargs=kwargs)
+                with query_budget.for_route(name):
+                    response = getattr(self.client, method)(url, **client_kwargs)
+                    if response.streaming:
+                        b''.join(response.streaming_content)   # las exportaciones consultan al iterar
+                self.assertEqual(response.status_code, expected_status, getattr(response, 'data', None))
+
+
+@mock.patch.object(sync, 'SAFETY_LAG', 0)
+class DeltaSyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Delta', nit='1', cell='3000000000', email='delta@test.co')
+        cls.other = Company.objects.create(company_name='Otra', nit='2', cell='3000000000', email='otra@test.co')
+        cls.admin = User.objects.create(identification_number='1', email='admin@delta.co', username='admin',
+                                        rol='admin', company=cls.company, password='!')
+        cls.clients = [User.objects.create(identification_number=f'c{i}', email=f'cliente{i}@delta.co',
+                                           username=f'cliente {i}', rol='cliente', company=cls.company, password='!')
+                       for i in range(2)]
+        User.objects.create(identification_number='x', email='ajeno@otra.co', username='ajeno', rol='admin',
+                            company=cls.other, password='!')
+        cls.staff = User.objects.create(identification_number='s', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+        tenancy._companies.clear()
+        tenancy._directory.clear()
+        self.admin_headers, self.staff_headers = auth_header(self.admin), auth_header(self.staff)
+
+    def pull(self, name, headers, **params):
+        response = self.client.get(reverse(name), params, **headers)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_users_delta_pages_then_returns_only_changes_and_deletes(self):
+        first = self.pull('users-changes', self.admin_headers, limit=2)
+        self.assertTrue(first['has_more'])
+        rest = self.pull('users-changes', self.admin_headers, updated_since=first['cursor'], limit=2)
+        self.assertFalse(rest['has_more'])
+        emails = [row['email'] for row in first['results'] + rest['results']]
+        self.assertEqual(sorted(emails), ['admin@delta.co', 'cliente0@delta.co', 'cliente1@delta.co'])
+
+        renamed, removed = self.clients
+        before = renamed.updated_at
+        renamed.username = 'renombrado'
+        renamed.save()
+        self.assertGreater(renamed.updated_at, before)
+        removed_pk = removed.pk
+        removed.delete()
+
+        with self.assertNumQueries(2):   # filas + tombstones
+            delta = self.pull('users-changes', self.admin_headers, updated_since=rest['cursor'])
+        self.assertEqual([row['username'] for row in delta['results']], ['renombrado'])
+        self.assertEqual(delta['deleted'], [removed_pk])
+        empty = self.pull('users-changes', self.admin_headers, updated_since=delta['cursor'])
+        self.assertEqual((empty['results'], empty['deleted']), ([], []))
+
+        url = reverse('users-changes')
+        self.assertEqual(self.client.get(url, {'updated_since': 'no-es-cursor'}, **self.admin_headers).status_code, 400)
+        expired = sync.encode_cursor(timezone.now() - timedelta(days=sync.TOMBSTONE_RETENTION_DAYS + 1))
+        self.assertEqual(self.client.get(url, {'updated_since': expired}, **self.admin_headers).status_code, 410)
+
+    def test_companies_delta_is_scoped_to_the_tenant(self):
+        own = self.pull('companies-changes', self.admin_headers)
+        self.assertEqual([row['id'] for row in own['results']], [self.company.pk])
+        everything = self.pull('companies-changes', self.staff_headers)
+        self.assertEqual({row['id'] for row in everything['results']}, {self.company.pk, self.other.pk})
+
+        other_pk = self.other.pk
+        self.other.delete()   # también sus usuarios
+        delta = self.pull('companies-changes', self.staff_headers, updated_since=everything['cursor'])
+        self.assertEqual(delta['deleted'], [other_pk])
+        self.assertEqual(self.pull('companies-changes', self.admin_headers, updated_since=own['cursor'])['deleted'], [])
+        self.assertTrue(Tombstone.objects.filter(kind='user', company_id=other_pk).exists())
+
+    def test_user_moved_to_another_company_is_deleted_from_the_old_feed(self):
+        own = self.pull('users-changes', self.admin_headers)
+        moved = User.objects.get(pk=self.clients[0].pk)
+        moved.company = self.other
+        moved.save()
+        moved.username = 'sin cambio de empresa'
+        moved.save()
+        self.assertEqual(Tombstone.objects.filter(kind='user', object_id=moved.pk).count(), 1)
+
+        delta = self.pull('users-changes', self.admin_headers, updated_since=own['cursor'])
+        self.assertEqual((delta['results'], delta['deleted']), ([], [moved.pk]))
+
+        # instancia armada sin leerla: la empresa anterior se consulta en pre_save
+        User(pk=moved.pk, identification_number=moved.identification_number, email=moved.email,
+             username=moved.username, rol=moved.rol, company=self.company, password='!').save()
+        self.assertTrue(Tombstone.objects.filter(kind='user', object_id=moved.pk, company_id=self.other.pk).exists())
+
+
+class MetricsEndpointTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Métricas', nit='1', cell='3000000000', email='metricas@test.co')
+        cls.staff = User.objects.create(identification_number='1', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+        tenancy._companies.clear()
+        tenancy._directory.clear()
+        metrics.registry.reset()
+
+    def test_records_routes_sql_and_hooks(self):
+        headers = auth_header(self.staff)
+        self.client.get(reverse('companies-list'))
+        self.client.get(reverse('profile'), **headers)
+
+        response = self.client.get('/metrics', **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('http_requests_total{route="companies-list",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{route="profile",method="GET"} 1', body)
+        self.assertIn('db_queries_total{route="companies-list",database="default"} 1', body)
+        self.assertIn('jwt_decode_duration_seconds_count 1', body)
+
+    def test_requires_staff_or_scraper_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        with self.settings(METRICS={'TOKEN': 'secreto'}):
+            self.assertEqual(self.client.get('/metrics', HTTP_X_METRICS_TOKEN='otro').status_code, 401)
+            self.assertEqual(self.client.get('/metrics', HTTP_X_METRICS_TOKEN='secreto').status_code, 200)
+
+    def test_merges_process_files(self):
+        metrics.inc('smtp_messages_total', ('sent',), 2)
+        with tempfile.TemporaryDirectory() as directory:
+            with mock.patch.dict(metrics._settings, MULTIPROCESS_DIR=directory):
+                metrics.registry.flush(force=True)
+                # otro worker con su propio archivo
+                os.rename(os.path.join(directory, f"metrics_{os.getpid()}.json"),
+                          os.path.join(directory, 'metrics_1.json'))
+                metrics.inc('smtp_messages_total', ('sent',), 3)
+                snapshot = metrics.registry.collect()
+        self.assertEqual(snapshot.counters[('smtp_messages_total', ('sent',))], 2 + 5)
+
+
+class EmailOutboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(company_name='Correo', nit='1', cell='3000000000', email='correo@test.co')
+        User.objects.create(identification_number='1', email='admin@correo.co', username='admin', rol='admin',
+                            company=company, password='!')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_reset_view_enqueues_and_command_delivers(self):
+        response = self.client.post(reverse('request-reset-password'), {'email': 'admin@correo.co'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        queued = OutboxEmail.objects.get()
+        self.assertEqual((queued.status, queued.to), ('pending', ['admin@correo.co']))
+
+        outbox.enqueue('Otro', 'cuerpo', ['otro@correo.co'])
+        with mock.patch.object(locmem.EmailBackend, 'open', autospec=True) as open_connection:
+            call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(open_connection.call_count, 1)   # una conexión para todo el lote
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertIn('/password-reset/', mail.outbox[0].body)
+        self.assertEqual(set(OutboxEmail.objects.values_list('status', 'attempts', 'body')), {('sent', 1, '')})
+
+    @override_settings(EMAIL_TIMEOUT=10)
+    def test_results_persist_per_message_under_a_batch_sized_lease(self):
+        self.assertEqual(outbox.claim_timeout(50), max(outbox.CLAIM_TIMEOUT, 101 * 10))
+        for index in range(2):
+            outbox.enqueue('Aviso', 'cuerpo', [f'u{index}@correo.co'])
+        # el worker muere tras el primer envío: el primero ya quedó guardado
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', side_effect=[1, KeyboardInterrupt()]):
+            with self.assertRaises(KeyboardInterrupt):
+                outbox.send_pending()
+        first, second = OutboxEmail.objects.order_by('id')
+        self.assertEqual((first.status, first.body), ('sent', ''))
+        self.assertEqual(second.status, 'pending')
+        self.assertGreater(second.next_attempt_at, timezone.now() + timedelta(seconds=outbox.CLAIM_TIMEOUT))
+        self.assertEqual(outbox.claim_batch(), [])
+
+    def test_purge_keeps_recent_and_dead(self):
+        old = timezone.now() - timedelta(days=outbox.RETENTION_DAYS + 1)
+        OutboxEmail.objects.create(subject='viejo', body='', from_email='', to=['a@correo.co'], status='sent', sent_at=old)
+        OutboxEmail.objects.create(subject='nuevo', body='', from_email='', to=['a@correo.co'], status='sent',
+                                   sent_at=timezone.now())
+        OutboxEmail.objects.create(subject='muerto', body='x', from_email='', to=['a@correo.co'], status='dead',
+                                   created_at=old)
+        call_command('purge_outbox', stdout=StringIO())
+        self.assertEqual(sorted(OutboxEmail.objects.values_list('subject', flat=True)), ['muerto', 'nuevo'])
+
+    def test_failures_back_off_then_dead_letter(self):
+        for index in range(2):
+            outbox.enqueue('Aviso', 'cuerpo', [f'u{index}@correo.co'])
+        failure = smtplib.SMTPServerDisconnected('caído')
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', side_effect=failure):
+            self.assertEqual(outbox.send_pending(), {'sent': 0, 'retry': 2, 'dead': 0})
+            # aún no vence el backoff
+            self.assertEqual(outbox.send_pending(), {'sent': 0, 'retry': 0, 'dead': 0})
+            email = OutboxEmail.objects.first()
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            self.assertIn('caído', email.last_error)
+
+            OutboxEmail.objects.update(attempts=outbox.MAX_ATTEMPTS - 1, next_attempt_at=timezone.now())
+            self.assertEqual(outbox.send_pending(), {'sent': 0, 'retry': 0, 'dead': 2})
+        self.assertEqual(outbox.send_pending(), {'sent': 0, 'retry': 0, 'dead': 0})
+        self.assertEqual(mail.outbox, [])
+
+    def test_silent_backend_failure_is_retried(self):
+        outbox.enqueue('Aviso', 'cuerpo', ['u@correo.co'])
+        # un backend con fail_silently (o sin conexión) no lanza: devuelve 0 enviados
+        with mock.patch.object(locmem.EmailBackend, 'send_messages', return_value=0):
+            self.assertEqual(outbox.send_pending(), {'sent': 0, 'retry': 1, 'dead': 0})
+        email = OutboxEmail.objects.get()
+        self.assertEqual((email.status, email.body, email.attempts), ('pending', 'cuerpo', 1))
+        self.assertIn('NotSent', email.last_error)
+
+
+class SlidingWindowThrottleTests(TestCase):
+
+    class View:
+        throttle_scope = 'prueba'
+
+    def setUp(self):
+        cache.clear()
+
+    def request(self, ip='198.51.100.1', **extra):
+        return RequestFactory().post('/', REMOTE_ADDR=ip, **extra)
+
+    @mock.patch.object(SlidingWindowRateThrottle, 'THROTTLE_RATES', {'prueba_ip': '3/min'})
+    def test_previous_window_is_weighted_and_rejections_do_not_count(self):
+        timer = mock.Mock(return_value=6000.0)   # inicio de una ventana de 60 s
+        with mock.patch.object(SlidingWindowRateThrottle, 'timer', timer):
+            allowed = [IPRateThrottle().allow_request(self.request(), self.View()) for _ in range(4)]
+            self.assertEqual(allowed, [True, True, True, False])
+
+            # mitad de la ventana siguiente: la anterior pesa 3 * 0.5
+            timer.return_value = 6090.0
+            self.assertTrue(IPRateThrottle().allow_request(self.request(), self.View()))
+            throttle = IPRateThrottle()
+            self.assertFalse(throttle.allow_request(self.request(), self.View()))
+            self.assertAlmostEqual(throttle.wait(), 10.0)
+            for _ in range(5):
+                IPRateThrottle().allow_request(self.request(), self.View())
+
+            # la anterior ya pesa 0.5: pasa porque los rechazos no se contaron
+            timer.return_value = 6110.0
+            self.assertTrue(IPRateThrottle().allow_request(self.request(), self.View()))
+            # otra IP tiene su propio contador
+            self.assertTrue(IPRateThrottle().allow_request(self.request('198.51.100.2'), self.View()))
+
+
+class LoginThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(company_name='Límites', nit='1', cell='3000000000', email='limites@test.co')
+        User.objects.create(identification_number='1', email='victima@test.co', username='victima', rol='admin',
+                            company=company, password='!')
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, ip, forwarded_for=None, email='victima@test.co'):
+        extra = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for else {}
+        return self.client.post(reverse('login'), {'email': email, 'password': 'incorrecta'},
+                                content_type='application/json', REMOTE_ADDR=ip, **extra)
+
+    @mock.patch.object(SlidingWindowRateThrottle, 'THROTTLE_RATES', {'login_ip': '2/min'})
+    def test_spoofed_forwarded_for_does_not_bypass_the_ip_limit(self):
+        statuses = [self.login('203.0.113.7', forwarded_for=f'10.0.0.{i}').status_code for i in range(3)]
+        self.assertEqual(statuses, [401, 401, 429])
+        response = self.login('203.0.113.7', forwarded_for='10.0.0.99')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(1 <= int(response['Retry-After']) <= 60)
+
+        # detrás de un proxy de confianza cuenta la IP que agregó el proxy (la última)
+        cache.clear()
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            statuses = [self.login('10.0.0.1', forwarded_for=f'1.1.1.{i}, 203.0.113.7').status_code for i in range(3)]
+        self.assertEqual(statuses, [401, 401, 429])
+
+    @mock.patch.object(SlidingWindowRateThrottle, 'THROTTLE_RATES', {'login_ip_email': '2/min'})
+    def test_email_limit_is_per_ip_so_others_cannot_lock_the_account(self):
+        statuses = [self.login('203.0.113.7').status_code for _ in range(3)]
+        self.assertEqual(statuses, [401, 401, 429])
+        self.assertEqual(self.login('198.51.100.20').status_code, 401)
+
+
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Búsqueda', nit='1', cell='3000000000', email='busqueda@test.co')
+        cls.other = Company.objects.create(company_name='Otra', nit='2', cell='3000000000', email='otra@test.co')
+        cls.ana = User.objects.create(identification_number='10.200-3', email='ana.perez@correo.co', username='Ana Pérez',
+                                      rol='cajero', company=cls.company, password='!')
+        cls.anabel = User.objects.create(identification_number='20', email='anabel@correo.co', username='Anabel Ruiz',
+                                         rol='cajero', company=cls.company, password='!')
+        cls.outsider = User.objects.create(identification_number='30', email='ana@otra.co', username='Ana Gómez',
+                                           rol='cajero', company=cls.other, password='!')
+        cls.staff = User.objects.create(identification_number='0', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+        tenancy._companies.clear()
+        tenancy._directory.clear()
+
+    def test_tokenization(self):
+        self.assertEqual(search.field_tokens('email', 'Ana.Perez@Correo.co'),
+                         {'ana.perez@correo.co', 'ana.perez', 'correo.co', 'ana', 'perez'})
+        self.assertEqual(search.field_tokens('identification_number', '10.200-3'), {'102003'})
+        self.assertEqual(search.field_tokens('username', 'Ana  Pérez'), {'ana', 'perez', 'ana perez'})
+        self.assertEqual(search.field_tokens('username', ''), set())
+
+    def test_all_terms_must_match_and_exact_tokens_rank_first(self):
+        self.assertEqual([object_id for object_id, _ in user_index.search('ana', company_id=self.company.pk)],
+                         [self.ana.pk, self.anabel.pk])
+        self.assertEqual(user_index.search('ana ruiz', company_id=self.company.pk), [(self.anabel.pk, 4 + 3 * 2)])   # prefijo del correo + nombre exacto
+        self.assertEqual(user_index.search('ana zz', company_id=self.company.pk), [])
+        # la identificación (peso 5) pesa más que el nombre
+        self.assertEqual(user_index.search('102003'), [(self.ana.pk, 5 * 2)])
+
+    def test_formatted_document_matches_the_joined_token(self):
+        # el documento se indexa sin separadores: '10.200-3' -> '102003'
+        for query in ('10.200-3', '10.200', '10 200 3'):
+            self.assertEqual([object_id for object_id, _ in user_index.search(query, company_id=self.company.pk)],
+                             [self.ana.pk], query)
+        self.assertEqual(user_index.search('10.201', company_id=self.company.pk), [])
+
+    def test_rebuild_replaces_tokens_per_range(self):
+        SearchToken.objects.filter(kind='user', object_id=self.anabel.pk).delete()
+        SearchToken.objects.create(kind='user', object_id=10 ** 9, company_id=self.company.pk,
+                                   field='username', token='huerfano')   # objeto ya eliminado
+        self.assertEqual(user_index.rebuild(chunk_size=2), 4)
+        self.assertEqual([object_id for object_id, _ in user_index.search('anabel')], [self.anabel.pk])
+        self.assertEqual(user_index.search('huerfano'), [])
+
+        # un fallo a medias deja los tramos pendientes con sus tokens anteriores
+        build_tokens = user_index.build_tokens
+
+        def failing(obj):
+            if obj.pk == self.outsider.pk:
+                raise RuntimeError('fallo')
+            return build_tokens(obj)
+
+        with mock.patch.object(user_index, 'build_tokens', failing), self.assertRaises(RuntimeError):
+            user_index.rebuild(chunk_size=1)
+        self.assertEqual([object_id for object_id, _ in user_index.search('gomez')], [self.outsider.pk])
+        self.assertEqual(len(user_index.search('staff')), 1)
+
+    def test_limit_applies_after_intersecting_terms(self):
+        # más tokens 'ana...' que cualquier límite de candidatos, antes que el que buscamos
+        users = User.objects.bulk_create([
+            User(identification_number=f'c{i}', email=f'ana{i:03d}@correo.co', username=f'ana{i:03d}',
+                 rol='cliente', company=self.company, password='!')
+            for i in range(250)
+        ])
+        user_index.index(users)
+        self.assertEqual([object_id for object_id, _ in user_index.search('ana ruiz', company_id=self.company.pk)],
+                         [self.anabel.pk])
+
+    def test_company_scoping(self):
+        self.assertNotIn(self.outsider.pk, [object_id for object_id, _ in user_index.search('ana', company_id=self.company.pk)])
+
+        url = reverse('users-search')
+        response = self.client.get(url, {'q': 'ana'}, **auth_header(self.ana))
+        self.assertEqual({user['id'] for user in response.json()}, {self.ana.pk, self.anabel.pk})
+
+        staff = auth_header(self.staff)
+        response = self.client.get(url, {'q': 'ana'}, **staff)
+        self.assertEqual(len(response.json()), 3)
+        response = self.client.get(url, {'q': 'ana', 'company': self.other.pk}, **staff)
+        self.assertEqual([user['id'] for user in response.json()], [self.outsider.pk])
+        response = self.client.get(url, {'q': 'ana', 'company': 'abc'}, **staff)
+        self.assertEqual(response.status_code, 400)
+
+
+class RendererParityTests(TestCase):
+    """
+    FastJSONRenderer (orjson) y MessagePackRenderer dan los mismos valores que el
+    JSONRenderer de DRF con el mismo encoder (el camino sin orjson).
+    """
+    data = {
+        'aware': datetime.datetime(2026, 1, 2, 15, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+        'naive': datetime.datetime(2026, 1, 2, 10, 4, 5),
+        'date': datetime.date(2026, 1, 2),
+        'time': datetime.time(10, 4, 5, 250000),
+        'decimal': Decimal('12.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'lazy': gettext_lazy('Invalid cursor'),
+        'text': 'Ñandú \u2028 fin',
+        'nested': [{1: None, 'ok': True}, (1, 2.5)],
+    }
+
+    def drf_render(self, data, renderer_context=None):
+        with mock.patch('commons.renderers.orjson', None):
+            return FastJSONRenderer().render(data, 'application/json', renderer_context)
+
+    def test_json_output_matches_drf(self):
+        expected = self.drf_render(self.data)
+        self.assertEqual(FastJSONRenderer().render(self.data, 'application/json'), expected)
+        values = json.loads(expected)
+        self.assertEqual(values['aware'], '2026-01-02T10:04:05.123456-05:00')   # zona del proyecto
+        self.assertEqual((values['decimal'], values['uuid']), (12.5, '12345678-1234-5678-1234-567812345678'))
+        self.assertIn(b'\\u2028', expected)
+
+        indented = FastJSONRenderer().render(self.data, 'application/json; indent=2')
+        self.assertEqual(json.loads(indented), values)
+        self.assertIn(b'\n  "aware"', indented)
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_msgpack_output_matches_drf(self):
+        packed = MessagePackRenderer().render(self.data)
+        self.assertEqual(msgpack.unpackb(packed, raw=False, strict_map_key=False),
+                         {**json.loads(self.drf_render(self.data)), 'nested': [{1: None, 'ok': True}, [1, 2.5]]})
+
+    def test_endpoints_negotiate_msgpack(self):
+        company = Company.objects.create(company_name='Pack', nit='1', cell='3000000000', email='pack@test.co')
+        url = reverse('companies-detail', kwargs={'pk': company.pk})
+        as_json = self.client.get(url).json()
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), as_json)
+
+    def test_parsers_report_malformed_bodies_as_400(self):
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            FastJSONParser().parse(io.BytesIO(b'{"email": '), 'application/json', {})
+        with self.assertRaisesMessage(ParseError, 'MessagePack parse error'):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'), 'application/msgpack', {})
+        # otras codificaciones: el JSONParser de DRF
+        body = '{"nombre": "Ñandú"}'.encode('latin-1')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body), 'application/json', {'encoding': 'latin-1'}),
+                         {'nombre': 'Ñandú'})
+
+        for content_type, body in (('application/json', b'{"email": '), ('application/msgpack', b'\xc1')):
+            response = self.client.post(reverse('login'), body, content_type=content_type)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('parse error', response.json()['detail'])
+
+        packed = msgpack.packb({'email': 'nadie@test.co', 'password': 'x'})
+        self.assertEqual(self.client.post(reverse('login'), packed, content_type='application/msgpack').status_code, 401)
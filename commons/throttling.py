@@ -0,0 +1,160 @@
+# Throttling con ventana deslizante sobre contadores atómicos en la caché compartida
+#
+# Cada vista define `throttle_scope` (p. ej. 'register') y las tasas se configuran en
+# REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] como '<scope>_<clave>': 'register_ip',
+# 'register_email', 'register_identification_number'... Si una clave no tiene tasa
+# configurada, ese throttle no aplica a la vista.
+#
+# La IP es la que ve el servidor (REMOTE_ADDR) o, detrás de proxies, la que agregó el
+# último proxy de confianza a X-Forwarded-For: REST_FRAMEWORK['NUM_PROXIES'] debe
+# coincidir con los proxies del despliegue (sin él, DRF usaría el encabezado completo,
+# que el cliente puede cambiar en cada petición).
+
+import contextlib
+import hashlib
+
+from django.core.cache import cache as default_cache
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import SimpleRateThrottle
+
+from commons.utils.cache import incr_counter
+
+STATS_KEY = 'throttle:stats:{scope}:{outcome}'
+
+
+def record_outcome(scope, allowed, cache=default_cache):
+    incr_counter(cache, STATS_KEY.format(scope=scope, outcome='allowed' if allowed else 'rejected'), timeout=None)
+
+
+def get_stats(scopes, cache=default_cache):
+    """
+    Contadores de peticiones aceptadas/rechazadas por scope.
+    """
+    keys = {scope: (STATS_KEY.format(scope=scope, outcome='allowed'),
+                    STATS_KEY.format(scope=scope, outcome='rejected')) for scope in scopes}
+    values = cache.get_many([key for pair in keys.values() for key in pair])
+    return {
+        scope: {'allowed': values.get(allowed, 0), 'rejected': values.get(rejected, 0)}
+        for scope, (allowed, rejected) in keys.items()
+    }
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Ventana deslizante aproximada: contador de la ventana actual + contador de la
+    ventana anterior ponderado por el tiempo que aún la solapa. Solo usa add/incr,
+    así que el límite se respeta entre procesos aunque lleguen peticiones en paralelo.
+    """
+    cache = default_cache
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)s'
+    key_name = None
+
+    def __init__(self):
+        # La tasa depende del scope de la vista; se resuelve en allow_request()
+        pass
+
+    def get_ident_value(self, request):
+        raise NotImplementedError('.get_ident_value() must be overridden')
+
+    def allow_request(self, request, view):
+        view_scope = getattr(view, 'throttle_scope', None)
+        if not view_scope:
+            return True
+
+        self.scope = f"{view_scope}_{self.key_name}"
+        self.rate = self.THROTTLE_RATES.get(self.scope)
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        value = self.get_ident_value(request)
+        if not value:
+            return True
+        ident = hashlib.md5(str(value).encode()).hexdigest()
+
+        self.now = self.timer()
+        window, elapsed = divmod(self.now, self.duration)
+        current_key = self.cache_format % {'scope': self.scope, 'ident': ident, 'window': int(window)}
+        previous_key = self.cache_format % {'scope': self.scope, 'ident': ident, 'window': int(window) - 1}
+
+        count = incr_counter(self.cache, current_key, timeout=self.duration * 2)
+        previous = self.cache.get(previous_key, 0)
+        weight = 1 - elapsed / self.duration
+
+        if previous * weight + count > self.num_requests:
+            if count > self.num_requests:
+                self.wait_seconds = self.duration - elapsed
+            else:
+                # tiempo hasta que el peso de la ventana anterior deje pasar la petición
+                excess = previous * weight + count - self.num_requests
+                self.wait_seconds = excess / previous * self.duration
+            # las peticiones rechazadas no cuentan: un cliente que insiste no alarga su bloqueo
+            with contextlib.suppress(ValueError):
+                self.cache.decr(current_key)
+            record_outcome(self.scope, allowed=False, cache=self.cache)
+            return False
+
+        record_outcome(self.scope, allowed=True, cache=self.cache)
+        return True
+
+    def wait(self):
+        return max(1, self.wait_seconds)
+
+
+class IPRateThrottle(SlidingWindowRateThrottle):
+    key_name = 'ip'
+
+    def get_ident_value(self, request):
+        # get_ident() respeta REST_FRAMEWORK['NUM_PROXIES'] (ver arriba)
+        return self.get_ident(request)
+
+
+class DataFieldRateThrottle(SlidingWindowRateThrottle):
+    """
+    Usa como clave el primer campo presente del cuerpo de la petición
+    (admite rutas anidadas como 'admin.email').
+    """
+    fields = ()
+
+    def get_ident_value(self, request):
+        try:
+            data = request.data
+        except APIException:
+            # cuerpo mal formado: DRF ya lo descartó y la vista solo vería un cuerpo vacío;
+            # se responde el mismo error de parseo que daría la vista (400/415)
+            raise
+        except Exception:
+            return None
+        for path in self.fields:
+            value = data
+            for part in path.split('.'):
+                value = value.get(part) if hasattr(value, 'get') else None
+            if value:
+                return str(value).strip().lower()
+        return None
+
+
+class EmailRateThrottle(DataFieldRateThrottle):
+    key_name = 'email'
+    fields = ('email', 'admin.email')
+
+
+class IPEmailRateThrottle(EmailRateThrottle):
+    """
+    Clave (IP, correo): limita los intentos sobre una cuenta desde una misma IP sin
+    que otra IP pueda bloquear al dueño de la cuenta (p. ej. en el login).
+    """
+    key_name = 'ip_email'
+
+    def get_ident_value(self, request):
+        email = super().get_ident_value(request)
+        return f"{self.get_ident(request)}|{email}" if email else None
+
+
+class IdentificationRateThrottle(DataFieldRateThrottle):
+    key_name = 'identification_number'
+    fields = ('identification_number', 'admin.identification_number')
+
+
+# Throttles para los endpoints anónimos (login, registro, recuperación de contraseña...)
+ANON_ENDPOINT_THROTTLES = [IPRateThrottle, EmailRateThrottle, IPEmailRateThrottle, IdentificationRateThrottle]
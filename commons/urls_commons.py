@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import ResponseCacheStatsView, ThrottleStatsView
+
+urlpatterns = [
+    path('throttle/stats/', ThrottleStatsView.as_view(), name='throttle-stats'),
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='response-cache-stats'),
+]
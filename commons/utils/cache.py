@@ -0,0 +1,69 @@
+# Caché LRU en memoria del proceso, acotada en tamaño y con expiración (TTL)
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Caché LRU local al proceso con TTL por entrada.
+
+    Es segura entre hilos y nunca supera `max_size` entradas: al insertar una
+    nueva se descarta la menos usada recientemente.
+    """
+
+    def __init__(self, max_size=1024, ttl=300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def incr_counter(cache, key, timeout=None):
+    """
+    Incremento atómico de un contador en la caché compartida (la crea si no existe).
+    """
+    # incr es atómico en Redis/Memcached; add() crea la clave si aún no existe
+    cache.add(key, 0, timeout=timeout)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # la clave expiró entre add() e incr()
+        cache.set(key, 1, timeout=timeout)
+        return 1
@@ -0,0 +1,137 @@
+# Exportación en streaming (NDJSON o CSV, opcionalmente gzip) con memoria constante
+#
+# Las filas se leen con .values() en lotes por clave (WHERE pk > último ORDER BY pk
+# LIMIT n): con mysqlclient, iterator() no usa cursores del lado del servidor y el
+# driver cargaría el resultado completo, así que se pagina por pk para que la memoria
+# no dependa del tamaño de la tabla.
+
+import csv
+import datetime
+import json
+import zlib
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+from commons import tenancy
+
+FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+CHUNK_BYTES = 64 * 1024
+
+# nombre -> Exporter (se llena al importar los módulos exports.py de cada app)
+registry = {}
+
+
+class _Echo:
+    # csv.writer escribe en un "archivo" que solo devuelve la línea
+    def write(self, value):
+        return value
+
+
+class Exporter:
+    """
+    Qué campos de un modelo se pueden exportar y cómo se filtra por empresa (tenant).
+    """
+
+    def __init__(self, name, model, fields, default_fields, tenant_field):
+        self.name = name
+        self.model_label = model
+        self.fields = tuple(fields)
+        self.default_fields = tuple(default_fields)
+        self.tenant_field = tenant_field
+        registry[name] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def parse_fields(self, value):
+        """
+        Campos pedidos ('a,b,c'); lanza ValueError si alguno no es exportable.
+        """
+        if not value:
+            return self.default_fields
+        fields = tuple(field.strip() for field in value.split(',') if field.strip())
+        invalid = [field for field in fields if field not in self.fields]
+        if invalid:
+            raise ValueError(f"Campos no exportables: {', '.join(invalid)}. Disponibles: {', '.join(self.fields)}")
+        return fields
+
+    def queryset(self, company_id=None):
+        queryset = self.model.objects.all()
+        if company_id is not None:
+            # los modelos repartidos por empresa se leen del shard del tenant
+            queryset = queryset.using(tenancy.database_for(self.model, company_id))
+            queryset = queryset.filter(**{self.tenant_field: company_id})
+        return queryset
+
+    def iter_rows(self, queryset, fields, chunk_size=2000):
+        datetime_fields = {
+            field for field in fields
+            if isinstance(self.model._meta.get_field(field), models.DateTimeField)
+        }
+        queryset = queryset.order_by('pk')
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(batch.values('pk', *fields)[:chunk_size])
+            if not rows:
+                return
+            last_pk = rows[-1]['pk']
+            for row in rows:
+                if 'pk' not in fields:
+                    del row['pk']
+                for field in datetime_fields:
+                    if isinstance(row[field], datetime.datetime):
+                        row[field] = timezone.localtime(row[field]).isoformat()
+                yield row
+            if len(rows) < chunk_size:
+                return
+
+
+def iter_ndjson(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def iter_csv(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([row[field] for field in fields])
+
+
+def iter_bytes(lines, compress=False):
+    """
+    Agrupa las líneas en bloques de ~64 KB y, si se pide, los comprime con gzip.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: formato gzip
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_BYTES:
+            chunk = b''.join(buffer)
+            buffer, size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+    chunk = b''.join(buffer)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def stream_export(exporter, queryset, fields, fmt='ndjson', compress=False, chunk_size=2000):
+    rows = exporter.iter_rows(queryset, fields, chunk_size=chunk_size)
+    lines = iter_csv(rows, fields) if fmt == 'csv' else iter_ndjson(rows)
+    return iter_bytes(lines, compress=compress)
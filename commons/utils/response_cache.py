@@ -0,0 +1,161 @@
+# Caché de respuestas versionada con ETag/Last-Modified y protección contra estampidas
+#
+# Cada recurso tiene una versión en la caché compartida (marca de tiempo en ms) que se
+# incrementa desde señales al modificar el objeto; la versión forma parte de la clave
+# de la respuesta, así que nunca hay que borrar respuestas: las viejas simplemente
+# dejan de consultarse y expiran solas. Como la versión es una marca de tiempo,
+# sirve también de Last-Modified, y el ETag se calcula sin tocar el ORM.
+
+import hashlib
+import time
+
+from django.core.cache import cache as default_cache
+from django.utils.http import http_date, parse_http_date_safe
+
+from commons.utils.cache import incr_counter
+
+VERSION_KEY = 'rc:version:{namespace}:{scope}'
+RESPONSE_KEY = 'rc:response:{namespace}:{scope}:{version}:{variant}'
+LOCK_KEY = 'rc:lock:{namespace}:{scope}:{version}:{variant}'
+STATS_KEY = 'rc:stats:{namespace}:{outcome}'
+OUTCOMES = ('hit', 'miss', 'stampede', 'not_modified')
+
+# scope de las respuestas de listado (cambia con cualquier objeto del namespace)
+LIST_SCOPE = 'list'
+
+# namespaces con caché de respuestas (para el endpoint de estadísticas)
+namespaces = set()
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def get_version(namespace, scope, cache=default_cache):
+    """
+    Versión actual de un recurso; si no existe (caché fría o desalojada) se inicializa
+    con la hora actual, lo que solo provoca una reconstrucción.
+    """
+    key = VERSION_KEY.format(namespace=namespace, scope=scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _now_ms(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace, *scopes, cache=default_cache):
+    """
+    Invalida los recursos indicados y los listados del namespace.
+    """
+    now = _now_ms()
+    keys = [VERSION_KEY.format(namespace=namespace, scope=scope) for scope in (*scopes, LIST_SCOPE)]
+    current = cache.get_many(keys)
+    # estrictamente creciente aunque haya dos cambios en el mismo milisegundo
+    cache.set_many({key: max(now, current.get(key, 0) + 1) for key in keys}, timeout=None)
+
+
+def record(namespace, outcome, cache=default_cache):
+    incr_counter(cache, STATS_KEY.format(namespace=namespace, outcome=outcome))
+
+
+def get_stats(names=None, cache=default_cache):
+    """
+    Contadores de aciertos, fallos, estampidas evitadas y 304 por namespace.
+    """
+    names = sorted(names or namespaces)
+    keys = {(name, outcome): STATS_KEY.format(namespace=name, outcome=outcome)
+            for name in names for outcome in OUTCOMES}
+    values = cache.get_many(list(keys.values()))
+    return {
+        name: {outcome: values.get(keys[(name, outcome)], 0) for outcome in OUTCOMES}
+        for name in names
+    }
+
+
+def make_etag(namespace, scope, version, variant):
+    digest = hashlib.md5(f"{namespace}:{scope}:{version}:{variant}".encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def last_modified_header(version):
+    return http_date(version // 1000)
+
+
+def matches_any(request):
+    """
+    If-None-Match: * ("cualquier representación actual"). Como con is_not_modified,
+    solo vale 304 si el recurso existe: la respuesta está cacheada o se construyó.
+    """
+    return request.META.get('HTTP_IF_NONE_MATCH', '').strip() == '*'
+
+
+def is_not_modified(request, etag, version):
+    """
+    Evalúa If-None-Match (prioritario) o If-Modified-Since contra el ETag y la versión.
+    If-None-Match: * no se resuelve aquí (ver matches_any). La versión existe aunque el
+    recurso no: el llamador confirma que existe antes de responder 304.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        if if_none_match.strip() == '*':
+            return False
+        # comparación débil: se ignora el prefijo W/
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in tags
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return if_modified_since is not None and version // 1000 <= if_modified_since
+
+
+def _response_key(namespace, scope, version, variant):
+    variant_hash = hashlib.md5(variant.encode()).hexdigest()
+    return (RESPONSE_KEY.format(namespace=namespace, scope=scope, version=version, variant=variant_hash),
+            LOCK_KEY.format(namespace=namespace, scope=scope, version=version, variant=variant_hash))
+
+
+def get_cached(namespace, scope, version, variant, cache=default_cache):
+    """
+    Respuesta ya cacheada o None, sin construirla ni contar aciertos.
+    """
+    key, _ = _response_key(namespace, scope, version, variant)
+    return cache.get(key)
+
+
+def get_or_build(namespace, scope, version, variant, build, timeout=300,
+                 lock_timeout=10, wait_timeout=5, poll_interval=0.05, cache=default_cache):
+    """
+    Devuelve la respuesta cacheada o la construye con `build()`.
+
+    Single-flight: ante una ráfaga de fallos sobre la misma clave, solo quien obtiene
+    el lock (cache.add) reconstruye; el resto espera a que aparezca el valor. Si el
+    constructor tarda más de `wait_timeout`, los que esperan construyen sin cachear.
+    """
+    key, lock_key = _response_key(namespace, scope, version, variant)
+
+    value = cache.get(key)
+    if value is not None:
+        record(namespace, 'hit', cache=cache)
+        return value
+
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        record(namespace, 'miss', cache=cache)
+        try:
+            value = build()
+            cache.set(key, value, timeout=timeout)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    record(namespace, 'stampede', cache=cache)
+    deadline = time.monotonic() + wait_timeout
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if cache.get(lock_key) is None:
+            # el constructor terminó (o falló) entre las dos lecturas
+            value = cache.get(key)
+            break
+    return value if value is not None else build()
@@ -0,0 +1,160 @@
+# Sincronización incremental (?updated_since=<cursor>)
+#
+# Cada DeltaFeed devuelve las filas de un modelo modificadas desde el cursor, en orden
+# (updated_at, id) por el índice de esas columnas, y los ids eliminados en el mismo
+# intervalo (commons.Tombstone). El cursor es opaco: codifica el último (updated_at, id)
+# entregado o, al terminar, el instante hasta el que se sincronizó, así que siempre
+# avanza. Sin cursor, el feed es la sincronización completa paginada.
+#
+# updated_at es auto_now: lo pone save(), pero save(update_fields=[...]) solo lo guarda
+# si 'updated_at' está en la lista, y queryset.update() / bulk_update() no lo tocan. Quien
+# modifique campos sincronizados así debe incluirlo (update_fields=[..., 'updated_at'] o
+# update(..., updated_at=timezone.now())) o el cambio no llega a los clientes.
+#
+# updated_at lo pone save() antes de que la transacción confirme: las filas con
+# updated_at más reciente que SAFETY_LAG segundos se dejan para la siguiente petición
+# para no saltar una transacción lenta que confirme después con una marca anterior.
+
+import base64
+import binascii
+import datetime
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from commons import tenancy
+from commons.models import Tombstone
+
+_sync_settings = getattr(settings, 'SYNC', {})
+
+SAFETY_LAG = _sync_settings.get('SAFETY_LAG', 5)                              # segundos
+TOMBSTONE_RETENTION_DAYS = _sync_settings.get('TOMBSTONE_RETENTION_DAYS', 30)
+PAGE_SIZE = _sync_settings.get('PAGE_SIZE', 500)
+MAX_PAGE_SIZE = _sync_settings.get('MAX_PAGE_SIZE', 2000)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+# nombre -> DeltaFeed (se llena al importar los módulos sync.py de cada app)
+registry = {}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorExpired(Exception):
+    """
+    El cursor es anterior a la retención de los tombstones: hay que sincronizar todo.
+    """
+
+
+def encode_cursor(updated_at, pk=None):
+    micros = (updated_at - EPOCH) // timedelta(microseconds=1)
+    value = f"{micros}:{'' if pk is None else pk}"
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    (updated_at, pk o None); lanza InvalidCursor si no es un cursor de este módulo.
+    """
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        micros, pk = value.split(':')
+        return EPOCH + timedelta(microseconds=int(micros)), int(pk) if pk else None
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        raise InvalidCursor(cursor)
+
+
+class DeltaFeed:
+    """
+    Campos de un modelo que se sincronizan y cómo se filtra por empresa (tenant).
+    """
+
+    def __init__(self, kind, model, fields, tenant_field):
+        self.kind = kind
+        self.model_label = model
+        self.fields = tuple(fields)
+        self.tenant_field = tenant_field
+        registry[kind] = self
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def queryset(self, company_id=None):
+        queryset = self.model.objects.all()
+        if company_id is not None:
+            # los modelos repartidos por empresa se leen del shard del tenant
+            queryset = queryset.using(tenancy.database_for(self.model, company_id))
+            queryset = queryset.filter(**{self.tenant_field: company_id})
+        return queryset
+
+    def changes(self, cursor=None, company_id=None, limit=PAGE_SIZE):
+        """
+        {'results': filas modificadas, 'deleted': ids eliminados, 'cursor', 'has_more'}.
+        """
+        now = timezone.now()
+        upper = now - timedelta(seconds=SAFETY_LAG)
+        since, after_pk = decode_cursor(cursor) if cursor else (None, None)
+        if since is not None and since < now - timedelta(days=TOMBSTONE_RETENTION_DAYS):
+            raise CursorExpired()
+
+        queryset = self.queryset(company_id).filter(updated_at__lte=upper)
+        if since is not None:
+            newer = Q(updated_at__gt=since)
+            if after_pk is not None:
+                newer |= Q(updated_at=since, pk__gt=after_pk)
+            queryset = queryset.filter(newer)
+        rows = list(queryset.order_by('updated_at', 'pk').values('pk', *self.fields)[:limit + 1])
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if has_more:
+            until, next_cursor = rows[-1]['updated_at'], encode_cursor(rows[-1]['updated_at'], rows[-1]['pk'])
+        else:
+            # todo lo anterior a `upper` ya se entregó; no retroceder si el cursor es más nuevo
+            until = max(upper, since) if since is not None else upper
+            next_cursor = encode_cursor(until)
+
+        return {
+            'results': [self.transform(row) for row in rows],
+            'deleted': self.deleted(since, until, company_id) if since is not None else [],
+            'cursor': next_cursor,
+            'has_more': has_more,
+        }
+
+    def deleted(self, since, until, company_id=None):
+        queryset = Tombstone.objects.filter(kind=self.kind, deleted_at__gt=since, deleted_at__lte=until)
+        if company_id is not None:
+            queryset = queryset.filter(company_id=company_id)
+        return list(queryset.order_by('deleted_at', 'id').values_list('object_id', flat=True))
+
+    def transform(self, row):
+        if 'pk' not in self.fields:
+            del row['pk']
+        for field, value in row.items():
+            if isinstance(value, datetime.datetime):
+                row[field] = timezone.localtime(value).isoformat()
+        return row
+
+    def tombstone(self, instance, company_id=None):
+        """
+        Registra el borrado de `instance` (receivers de post_delete) o, con `company_id`,
+        su salida de esa empresa: para el feed de la empresa anterior es un borrado.
+        """
+        if company_id is None:
+            company_id = instance.pk if self.tenant_field == 'pk' else tenancy.instance_tenant(instance, self.tenant_field)
+        return Tombstone.objects.create(kind=self.kind, object_id=instance.pk, company_id=company_id)
+
+
+def purge_tombstones(days=TOMBSTONE_RETENTION_DAYS):
+    """
+    Borra los tombstones más viejos que la retención; devuelve cuántos.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -4,5 +4,6 @@ def validate_user_company(user_instance):
     """
     Valida que un usuario no superusuario tenga asociada una empresa.
     """
-    if not user_instance.is_superuser and not user_instance.company:
+    # company_id: sin cargar la empresa
+    if not user_instance.is_superuser and user_instance.company_id is None:
         raise ValidationError("Solo el superusuario puede no tener empresa.")
\ No newline at end of file
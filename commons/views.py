@@ -1,3 +1,102 @@
-from django.shortcuts import render
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
-# Create your views here.
+from commons import metrics
+from commons.mixins.permissions import IsCompanyAdminOrStaff, IsStaffOrMetricsScraper
+from commons.throttling import get_stats
+from commons.utils import response_cache, sync
+from commons.utils.export import FORMATS, stream_export
+
+
+# contadores de peticiones aceptadas/rechazadas por los throttles
+class ThrottleStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        scopes = sorted(api_settings.DEFAULT_THROTTLE_RATES)
+        return Response(get_stats(scopes))
+
+
+# contadores de la caché de respuestas (aciertos, fallos, estampidas evitadas y 304)
+class ResponseCacheStatsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(response_cache.get_stats())
+
+
+# métricas del servicio en formato de texto de Prometheus (commons.metrics)
+class MetricsView(APIView):
+    permission_classes = [IsStaffOrMetricsScraper]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(metrics.registry.collect()), content_type=metrics.CONTENT_TYPE)
+
+
+# exportación en streaming (NDJSON o CSV, opcionalmente gzip) de un Exporter
+class ExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsCompanyAdminOrStaff]
+    exporter = None
+    filename = 'export'
+
+    def get(self, request):
+        params = request.query_params
+        # 'output' y no 'format': DRF reserva ?format= para la negociación de contenido
+        fmt = params.get('output', 'ndjson').lower()
+        if fmt not in FORMATS:
+            return Response({"output": "Formato no soportado. Use 'ndjson' o 'csv'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fields = self.exporter.parse_fields(params.get('fields'))
+        except ValueError as e:
+            return Response({"fields": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        compress = params.get('gzip', '').lower() in ('1', 'true')
+
+        # el staff puede exportar todo o una empresa; el resto solo la suya
+        company_id = params.get('company') if request.user.is_staff else request.user.company_id
+        if company_id is not None and not str(company_id).isdigit():
+            return Response({"company": "Debe ser un id numérico."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.exporter.queryset(company_id=company_id)
+        content_type, extension = FORMATS[fmt]
+        filename = f"{self.filename}.{extension}"
+        if compress:
+            content_type, filename = 'application/gzip', f"{filename}.gz"
+
+        response = StreamingHttpResponse(
+            stream_export(self.exporter, queryset, fields, fmt=fmt, compress=compress),
+            content_type=content_type,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+# sincronización incremental: filas modificadas y eliminadas desde ?updated_since=<cursor>
+class DeltaSyncView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsCompanyAdminOrStaff]
+    feed = None
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            limit = min(int(params.get('limit', sync.PAGE_SIZE)), sync.MAX_PAGE_SIZE)
+        except ValueError:
+            limit = sync.PAGE_SIZE
+        if limit < 1:
+            limit = sync.PAGE_SIZE
+
+        # el staff puede sincronizar todo o una empresa; el resto solo la suya
+        company_id = params.get('company') if request.user.is_staff else request.user.company_id
+        if company_id is not None and not str(company_id).isdigit():
+            return Response({"company": "Debe ser un id numérico."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            data = self.feed.changes(params.get('updated_since'), company_id=company_id, limit=limit)
+        except sync.InvalidCursor:
+            return Response({"updated_since": "Cursor inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        except sync.CursorExpired:
+            return Response({"detail": "El cursor expiró; sincronice de nuevo sin updated_since."},
+                            status=status.HTTP_410_GONE)
+        return Response(data)
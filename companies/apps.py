@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class CompanysConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "companies"
\ No newline at end of file
+    name = "companies"
+
+    def ready(self):
+        from companies import signals  # noqa: F401  registra los receivers
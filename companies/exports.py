@@ -0,0 +1,9 @@
+from commons.utils.export import Exporter
+
+company_exporter = Exporter(
+    name='companies',
+    model='companies.Company',
+    fields=('id', 'company_name', 'nit', 'address', 'cell', 'phone', 'email'),
+    default_fields=('id', 'company_name', 'nit', 'address', 'cell', 'phone', 'email'),
+    tenant_field='pk',
+)
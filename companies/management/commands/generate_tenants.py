@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from companies import synthetic
+from companies.models import Company
+from users.models.user import ROL_GRUPO_MAP
+
+
+def _setup_worker():
+    # con 'spawn' el proceso hijo arranca sin Django configurado
+    import django
+    django.setup()
+
+
+def _run_chunk(seed, start, stop, mean_users, password, batch_size, index_search):
+    return synthetic.insert_companies(seed, range(start, stop), mean_users, password, batch_size, index_search)
+
+
+class Command(BaseCommand):
+    help = 'Genera empresas y usuarios sintéticos (deterministas según la semilla) para pruebas de escala'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=1000)
+        parser.add_argument('--users-per-company', type=float, default=100,
+                            help='Media de usuarios por empresa (el tamaño sigue una log-normal)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--start', type=int, default=0,
+                            help='Índice de la primera empresa (para ampliar un conjunto ya generado)')
+        parser.add_argument('--password', default=synthetic.DEFAULT_PASSWORD, help='Contraseña de todos los usuarios')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Filas por INSERT')
+        parser.add_argument('--chunk-size', type=int, default=100, help='Empresas por transacción')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='Procesos en paralelo (0 = en este proceso; no sirve con SQLite en memoria)')
+        parser.add_argument('--skip-index', action='store_true',
+                            help='No indexar para la búsqueda (luego: rebuild_search_index)')
+
+    def handle(self, *args, **options):
+        seed, start = options['seed'], options['start']
+        stop = start + options['companies']
+        chunk_size = max(1, options['chunk_size'])
+        if options['companies'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--companies y --batch-size deben ser mayores que 0")
+
+        first_nit = synthetic.generate_company(seed, start, 1)[0]['nit']
+        if Company.objects.filter(nit=first_nit).exists():
+            raise CommandError(f"La empresa {start} de la semilla {seed} ya existe: use otra --seed o --start")
+
+        for name in ROL_GRUPO_MAP.values():
+            Group.objects.get_or_create(name=name)   # sin permisos: los asigna permisos_roles
+        password = synthetic.password_hash(seed, options['password'])
+
+        chunks = [(chunk, min(chunk + chunk_size, stop)) for chunk in range(start, stop, chunk_size)]
+        arguments = (options['users_per_company'], password, options['batch_size'], not options['skip_index'])
+        totals = dict.fromkeys(('companies', 'users', 'memberships'), 0)
+        started = time.perf_counter()
+
+        def report(counts):
+            for table, count in counts.items():
+                totals[table] += count
+            elapsed = time.perf_counter() - started
+            rows = sum(totals.values())
+            self.stdout.write(f"{totals['companies']}/{stop - start} empresas, {totals['users']} usuarios "
+                              f"({rows / elapsed:,.0f} filas/s)")
+
+        if options['workers'] > 0:
+            connections.close_all()   # los procesos hijos abren sus propias conexiones
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_setup_worker) as executor:
+                futures = [executor.submit(_run_chunk, seed, first, last, *arguments) for first, last in chunks]
+                for future in as_completed(futures):
+                    report(future.result())
+        else:
+            for first, last in chunks:
+                report(_run_chunk(seed, first, last, *arguments))
+
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Generadas {totals['companies']} empresas, {totals['users']} usuarios y {totals['memberships']} "
+            f"membresías de grupo en {elapsed:.1f}s ({rows / elapsed:,.0f} filas/s, semilla {seed})"
+        ))
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from companies.provisioning import provision_companies
+
+
+class Command(BaseCommand):
+    help = 'Crea empresas con su usuario administrador desde un archivo JSON (lista) o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo .json con una lista de empresas o .jsonl (una por línea)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo valida, no inserta nada')
+        parser.add_argument('--report', help='Ruta donde guardar el resultado por ítem en JSON')
+
+    def handle(self, *args, **options):
+        with open(options['path'], encoding='utf-8-sig') as stream:
+            if options['path'].endswith('.jsonl'):
+                items = [json.loads(line) for line in stream if line.strip()]
+            else:
+                items = json.load(stream)
+
+        if not isinstance(items, list):
+            raise CommandError("El archivo debe contener una lista de empresas")
+
+        results = provision_companies(items, dry_run=options['dry_run'])
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as out:
+                json.dump(results, out, ensure_ascii=False, indent=2)
+
+        failed = [result for result in results if result['status'] == 'error']
+        for result in failed[:20]:
+            self.stdout.write(self.style.WARNING(f"Ítem {result['index']}: {result['errors']}"))
+
+        status = 'validadas' if options['dry_run'] else 'creadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(results) - len(failed)} de {len(results)} empresas {status} ({len(failed)} con errores)"
+        ))
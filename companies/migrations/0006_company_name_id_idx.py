@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0005_alter_company_address"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(fields=["company_name", "id"], name="company_name_id_idx"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0006_company_name_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name="company",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(fields=["updated_at", "id"], name="company_updated_idx"),
+        ),
+    ]
@@ -1,12 +1,22 @@
 from django.db import models
 
-class Company(models.Model):
+from commons.models import TimeStampedModel
+
+class Company(TimeStampedModel):
     company_name = models.CharField(max_length=255)
     nit = models.CharField(max_length=20, unique=True, null=True)
     address = models.CharField(max_length=255, null=True, blank=True)
     cell = models.CharField(max_length=12)
     phone = models.CharField(max_length=12, null=True, blank=True)
     email = models.EmailField(max_length=100, unique=True)
+    
+    class Meta:
+        indexes = [
+            # búsqueda por prefijo del nombre y paginación por cursor ordenada por nombre
+            models.Index(fields=['company_name', 'id'], name='company_name_id_idx'),
+            # sincronización incremental: WHERE (updated_at, id) > cursor ORDER BY updated_at, id
+            models.Index(fields=['updated_at', 'id'], name='company_updated_idx'),
+        ]
             
     def __str__(self):
         return self.company_name
\ No newline at end of file
@@ -0,0 +1,142 @@
+# Alta masiva de empresas con su usuario administrador (migración desde el sistema legado)
+#
+# Todos los NIT, correos de empresa, correos de admin y números de identificación se
+# validan con un puñado de consultas IN, y las empresas válidas se insertan junto a
+# sus administradores con bulk_create dentro de una única transacción.
+
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+from commons.mixins.serializers_mixins import LowercaseEmailField
+from commons.utils.response_cache import bump_version
+from companies.models import Company
+from companies.search import company_index
+from users import passwords
+from users.models import User, UserIdentity
+from users.services import bulk_insert_users
+
+
+class BulkAdminSerializer(serializers.Serializer):
+    identification_number = serializers.CharField(max_length=20)
+    email = LowercaseEmailField()
+    username = serializers.CharField(max_length=100)
+    password = serializers.CharField(min_length=6, required=False, allow_blank=True, write_only=True)
+
+
+class BulkCompanySerializer(serializers.Serializer):
+    """
+    Validación por ítem sin consultas; la unicidad se valida para todo el lote.
+    """
+    company_name = serializers.CharField(max_length=255)
+    nit = serializers.CharField(max_length=20, required=False, allow_null=True)
+    address = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+    cell = serializers.CharField(max_length=12)
+    phone = serializers.CharField(max_length=12, required=False, allow_null=True, allow_blank=True)
+    email = LowercaseEmailField(max_length=100)
+    admin = BulkAdminSerializer()
+
+
+def provision_companies(items, dry_run=False):
+    """
+    Valida e inserta un lote de empresas + admin. Devuelve un resultado por ítem
+    (en el mismo orden de entrada).
+    """
+    results = [None] * len(items)
+    valid = []
+    for index, item in enumerate(items):
+        serializer = BulkCompanySerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+    nits = [data['nit'] for _, data in valid if data.get('nit')]
+    company_emails = [data['email'] for _, data in valid]
+    admin_emails = [data['admin']['email'] for _, data in valid]
+    identifications = [data['admin']['identification_number'] for _, data in valid]
+
+    # los correos guardados antes de normalizarlos pueden tener mayúsculas: en MySQL la
+    # collation ya compara sin distinguirlas y aquí se igualan en minúsculas
+    taken_nits = set(Company.objects.filter(nit__in=nits).values_list('nit', flat=True))
+    taken_company_emails = {email.lower() for email in
+                            Company.objects.filter(email__in=company_emails).values_list('email', flat=True)}
+    taken_admin_emails = {email.lower() for email in
+                          UserIdentity.objects.filter(email__in=admin_emails).values_list('email', flat=True)}
+    taken_identifications = set(UserIdentity.objects.filter(
+        identification_number__in=identifications).values_list('identification_number', flat=True))
+
+    accepted = []
+    for index, data in valid:
+        # la primera aparición dentro del lote gana; las repetidas se rechazan
+        errors = {}
+        if data.get('nit') in taken_nits:
+            errors['nit'] = ["Ya existe una empresa con este NIT."]
+        if data['email'] in taken_company_emails:
+            errors['email'] = ["Ya existe una empresa registrada con este correo."]
+        admin_errors = {}
+        if data['admin']['email'] in taken_admin_emails:
+            admin_errors['email'] = ["Ya existe un usuario con este correo electrónico."]
+        if data['admin']['identification_number'] in taken_identifications:
+            admin_errors['identification_number'] = ["Ya existe un usuario con este número de identificación."]
+        if admin_errors:
+            errors['admin'] = admin_errors
+
+        if errors:
+            results[index] = {'index': index, 'status': 'error', 'errors': errors}
+        else:
+            accepted.append((index, data))
+            if data.get('nit'):
+                taken_nits.add(data['nit'])
+            taken_company_emails.add(data['email'])
+            taken_admin_emails.add(data['admin']['email'])
+            taken_identifications.add(data['admin']['identification_number'])
+
+    if accepted and not dry_run:
+        hashes = passwords.make_passwords(data['admin'].get('password') for _, data in accepted)
+
+        try:
+            with transaction.atomic():
+                companies, admins = _insert_companies_with_admins(accepted, hashes)
+        except IntegrityError:
+            # otra petición insertó los mismos datos entre la validación y el INSERT
+            for index, _ in accepted:
+                results[index] = {'index': index, 'status': 'error',
+                                  'errors': {'non_field_errors': ["Conflicto de unicidad al insertar el lote, reintente."]}}
+            return results
+
+        for (index, _), company, admin in zip(accepted, companies, admins):
+            results[index] = {'index': index, 'status': 'created', 'company_id': company.pk, 'admin_id': admin.pk}
+    else:
+        for index, _ in accepted:
+            results[index] = {'index': index, 'status': 'valid'}
+
+    return results
+
+
+def _insert_companies_with_admins(accepted, hashes):
+    companies = [
+        Company(**{field: value for field, value in data.items() if field != 'admin'})
+        for _, data in accepted
+    ]
+    Company.objects.bulk_create(companies)
+    if any(company.pk is None for company in companies):
+        ids = dict(Company.objects.filter(email__in=[c.email for c in companies]).values_list('email', 'id'))
+        for company in companies:
+            company.pk = ids[company.email]
+    company_index.index(companies)
+    # bulk_create no emite señales: se invalidan los listados de CompanyViewSet
+    transaction.on_commit(lambda: bump_version('companies'))
+
+    admins = [
+        User(
+            identification_number=data['admin']['identification_number'],
+            email=data['admin']['email'],
+            username=data['admin']['username'],
+            rol='admin',
+            company=company,
+            password=password_hash,
+        )
+        for (_, data), company, password_hash in zip(accepted, companies, hashes)
+    ]
+    bulk_insert_users(admins)
+    return companies, admins
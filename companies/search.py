@@ -0,0 +1,9 @@
+from commons.search import SearchIndex
+
+# campo: peso en el ranking
+company_index = SearchIndex(
+    kind='company',
+    model='companies.Company',
+    fields={'nit': 5, 'company_name': 3},
+    tenant_field='pk',
+)
@@ -1,34 +1,21 @@
+from django.db import transaction
 from rest_framework import serializers
+from commons.mixins.serializers_mixins import LowercaseEmailMixin, SparseFieldsetMixin
+from commons.serializers import ValuesSerializer
 from companies.models import Company
 from users.models import User
 from users.serializers.user_serializers import AdminUserSerializer
 
-class CompanyAdminSerializer(serializers.ModelSerializer):
+class CompanyAdminSerializer(LowercaseEmailMixin, serializers.ModelSerializer):
     admin = AdminUserSerializer(write_only = True)
     
     class Meta:
         model = Company
         fields = ['id', 'company_name', 'nit', 'address', 'cell', 'phone', 'email', 'admin']
         
-    def validate_email_company(self, value):
-        value = value.lower()
-        if Company.objects.filter(email=value).exists():
-            raise serializers.ValidationError("Ya existe una empresa registrada con este correo.")
-        return value
-        
-    def validate_user(self, data):
-        admin_data = data.get('admin')
-
-        if not admin_data:
-            raise serializers.ValidationError("Los datos del administrador son requeridos.")
-
-        # Validar que no exista otro admin con ese email
-        email = admin_data.get('email', '').lower()
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError("Ya existe un usuario con este email.")
-
-        return data    
-        
+    # la unicidad del correo (ya en minúsculas, ver LowercaseEmailMixin) y del NIT la
+    # validan los UniqueValidator del modelo; la del admin, AdminUserSerializer.validate
+    @transaction.atomic
     def create(self, validate_data):
         admin_data = validate_data.pop('admin')
         
@@ -48,7 +35,21 @@ class CompanyAdminSerializer(serializers.ModelSerializer):
         return company
     
     
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(LowercaseEmailMixin, SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Company
+        fields = '__all__'
+        read_only_fields = ['created_at', 'updated_at']
+
+
+# lectura rápida (list/retrieve) con la misma salida que CompanySerializer
+class CompanyValuesSerializer(ValuesSerializer):
+    serializer_class = CompanySerializer
+
+
+class CompanySearchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    score = serializers.IntegerField(source='search_score', read_only=True)
+    
     class Meta:
         model = Company
-        fields = '__all__'           
\ No newline at end of file
+        fields = ['id', 'company_name', 'nit', 'email', 'score']
@@ -0,0 +1,69 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from commons import tenancy
+from commons.utils.response_cache import bump_version
+from companies.models import Company
+from companies.search import company_index
+from companies.sync import company_feed
+
+
+# ---------- Índice de búsqueda ---------- #
+
+@receiver(post_save, sender=Company)
+def company_saved(sender, instance, update_fields=None, **kwargs):
+    if company_index.needs_reindex(update_fields):
+        company_index.index([instance])
+
+
+@receiver(post_delete, sender=Company)
+def company_deleted(sender, instance, **kwargs):
+    company_index.remove([instance.pk])
+
+
+# ---------- Caché de respuestas (CompanyViewSet) ---------- #
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_changed(sender, instance, **kwargs):
+    # tras el commit: si se incrementa antes, una lectura concurrente podría cachear
+    # los datos anteriores bajo la versión nueva
+    pk = instance.pk
+    transaction.on_commit(lambda: bump_version('companies', pk))
+
+
+# ---------- Sincronización incremental (borrados) ---------- #
+
+@receiver(post_delete, sender=Company)
+def company_tombstone(sender, instance, **kwargs):
+    if instance._state.db == DEFAULT_DB_ALIAS:   # no la copia del shard
+        company_feed.tombstone(instance)
+
+
+# ---------- Datos del tenant (commons.tenancy.request_tenant) ---------- #
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_tenant_changed(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.db != DEFAULT_DB_ALIAS:
+        return
+    pk = instance.pk
+    # también ahora: que una lectura dentro de la transacción no vea la copia anterior
+    tenancy.invalidate_tenant(pk)
+    transaction.on_commit(lambda: tenancy.invalidate_tenant(pk))
+
+
+# ---------- Copia de la empresa en su shard (commons.tenancy) ---------- #
+
+@receiver(post_save, sender=Company)
+def company_synced_to_shard(sender, instance, created=False, raw=False, **kwargs):
+    # move_tenant copia la fila de la empresa al shard para las FK de sus datos;
+    # se mantiene igual a la de 'default'
+    if created or raw or instance._state.db != DEFAULT_DB_ALIAS:
+        return
+    database = tenancy.tenant_database(instance.pk)
+    if database != DEFAULT_DB_ALIAS:
+        values = {field.attname: getattr(instance, field.attname)
+                  for field in Company._meta.concrete_fields if not field.primary_key and not field.generated}
+        Company.objects.using(database).filter(pk=instance.pk).update(**values)
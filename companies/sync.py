@@ -0,0 +1,8 @@
+from commons.utils.sync import DeltaFeed
+
+company_feed = DeltaFeed(
+    kind='company',
+    model='companies.Company',
+    fields=('id', 'company_name', 'nit', 'address', 'cell', 'phone', 'email', 'created_at', 'updated_at'),
+    tenant_field='pk',
+)
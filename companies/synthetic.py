@@ -0,0 +1,127 @@
+# Datos sintéticos de empresas y usuarios para pruebas de escala (comando generate_tenants)
+#
+# Cada empresa se genera con su propio random.Random(f"{seed}:{índice}"), así el
+# contenido (nombres, correos, roles, fechas, tamaño de la empresa) solo depende de la
+# semilla y del índice, no del orden en que los lotes o los workers la procesen. Todos
+# los usuarios comparten un único hash de contraseña (con sal derivada de la semilla)
+# y las filas se insertan con bulk_create, sin create_user() ni señales por fila (el de
+# User llena además el directorio global de usuarios, UserIdentity).
+
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth import hashers
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from commons.utils.response_cache import bump_version
+from companies.models import Company
+from companies.search import company_index
+from users.models import User
+from users.models.user import ROL_GRUPO_MAP
+from users.search import user_index
+
+DEFAULT_PASSWORD = 'synthetic-pass-123'
+
+# reparto de roles de los usuarios que no son el admin (uno por empresa)
+ROLE_WEIGHTS = {'cliente': 80, 'cajero': 14, 'proveedor': 6}
+
+INACTIVE_RATE = 0.05
+
+# fecha fija (no now()) para que las fechas sean iguales en cada corrida
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HISTORY_DAYS = 730
+
+NOMBRES = ('Ana', 'Andrés', 'Camila', 'Carlos', 'Daniela', 'David', 'Diana', 'Felipe', 'Juan', 'Julián',
+           'Laura', 'Luisa', 'María', 'Mateo', 'Natalia', 'Paula', 'Santiago', 'Sara', 'Sofía', 'Valentina')
+APELLIDOS = ('Álvarez', 'Castro', 'Díaz', 'Gómez', 'González', 'Herrera', 'Jiménez', 'López', 'Martínez',
+             'Moreno', 'Muñoz', 'Ortiz', 'Pérez', 'Ramírez', 'Rodríguez', 'Rojas', 'Sánchez', 'Torres', 'Vargas')
+RUBROS = ('Ferretería', 'Droguería', 'Panadería', 'Papelería', 'Distribuidora', 'Minimercado', 'Almacén',
+          'Cafetería', 'Comercializadora', 'Tienda')
+CIUDADES = ('Bogotá', 'Medellín', 'Cali', 'Barranquilla', 'Bucaramanga', 'Pereira', 'Manizales', 'Cartagena')
+
+
+def password_hash(seed, password=DEFAULT_PASSWORD):
+    """
+    Un solo hash para todos los usuarios, igual para la misma semilla.
+    """
+    return hashers.make_password(password, salt=f"synthetic{seed}")
+
+
+def company_size(rng, mean_users):
+    """
+    Usuarios de la empresa (admin incluido): log-normal con la media pedida, así hay
+    muchas empresas pequeñas y pocas muy grandes, como en producción.
+    """
+    sigma = 1.0
+    mu = math.log(max(mean_users, 1)) - sigma ** 2 / 2
+    return max(1, round(rng.lognormvariate(mu, sigma)))
+
+
+def generate_company(seed, index, mean_users):
+    """
+    (valores de la empresa, [valores de sus usuarios]) de la empresa número `index`.
+    """
+    rng = random.Random(f"{seed}:{index}")
+    tag = f"s{seed}c{index}"
+    created = EPOCH + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+    company = {
+        'company_name': f"{rng.choice(RUBROS)} {rng.choice(APELLIDOS)} {index}",
+        'nit': f"S{seed}-{index}",
+        'address': f"Calle {rng.randint(1, 200)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}, {rng.choice(CIUDADES)}",
+        'cell': f"3{rng.randrange(10 ** 9):09d}",
+        'email': f"contacto@{tag}.synthetic.test",
+        'created_at': created,
+    }
+    roles, weights = zip(*ROLE_WEIGHTS.items())
+    users = []
+    for number in range(company_size(rng, mean_users)):
+        rol = 'admin' if number == 0 else rng.choices(roles, weights)[0]
+        joined = created + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        users.append({
+            'identification_number': f"S{seed}-{index}-{number}",
+            'email': f"u{number}@{tag}.synthetic.test",
+            'username': f"{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}",
+            'rol': rol,
+            'is_active': number == 0 or rng.random() >= INACTIVE_RATE,
+            'date_joined': joined,
+            'created_at': joined,
+        })
+    return company, users
+
+
+def insert_companies(seed, indexes, mean_users, password, batch_size=1000, index_search=True):
+    """
+    Genera e inserta las empresas `indexes` con sus usuarios y grupos en una
+    transacción. Devuelve las filas insertadas por tabla.
+    """
+    groups = dict(Group.objects.filter(name__in=ROL_GRUPO_MAP.values()).values_list('name', 'id'))
+    generated = [generate_company(seed, index, mean_users) for index in indexes]
+
+    with transaction.atomic():
+        companies = Company.objects.bulk_create([Company(**values) for values, _ in generated], batch_size=batch_size)
+        # MySQL no devuelve los ids de un INSERT masivo: se recuperan por NIT
+        if any(company.pk is None for company in companies):
+            ids = dict(Company.objects.filter(nit__in=[company.nit for company in companies]).values_list('nit', 'id'))
+            for company in companies:
+                company.pk = ids[company.nit]
+
+        users = [User(company_id=company.pk, password=password, **values)
+                 for company, (_, rows) in zip(companies, generated) for values in rows]
+        # registra también el directorio global (UserIdentity), de donde salen los ids
+        User.objects.bulk_create(users, batch_size=batch_size)
+
+        Through = User.groups.through
+        memberships = Through.objects.bulk_create([
+            Through(user_id=user.pk, group_id=groups[ROL_GRUPO_MAP[user.rol]])
+            for user in users if ROL_GRUPO_MAP[user.rol] in groups
+        ], batch_size=batch_size)
+
+        if index_search:
+            company_index.index(companies)
+            user_index.index(users)
+        # bulk_create no emite señales: se invalidan los listados de CompanyViewSet
+        transaction.on_commit(lambda: bump_version('companies'))
+
+    return {'companies': len(companies), 'users': len(users), 'memberships': len(memberships)}
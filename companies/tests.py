@@ -1,3 +1,298 @@
+import io
+import json
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from django.urls import reverse
+
+from commons.utils import response_cache
+from companies.models import Company
+from companies.serializer_company import CompanySerializer, CompanyValuesSerializer
+from companies.views_company import CompanyBulkProvisionView
+from users.models import User, UserIdentity
+from users.tests import auth_header
+
+
+class CompanyValuesSerializerParityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Company.objects.bulk_create([
+            Company(company_name=f'Empresa Ñ {i:02d}', nit=f'900{i:03d}' if i % 3 else None,
+                    address=f'Calle {i} # 1-2' if i % 2 else None, cell='3000000000',
+                    phone=None if i % 4 else '6010000000', email=f'empresa{i}@test.co')
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_queryset_output_matches_model_serializer(self):
+        companies = Company.objects.order_by('id')
+        expected = json.loads(json.dumps(CompanySerializer(companies, many=True).data))
+        self.assertEqual(CompanyValuesSerializer.serialize_queryset(companies), expected)
+
+    def test_list_endpoint_matches_model_serializer(self):
+        response = self.client.get(reverse('companies-list'), {'page_size': 50})
+        expected = CompanySerializer(Company.objects.order_by('id'), many=True).data
+        self.assertEqual(response.json()['results'], json.loads(json.dumps(expected)))
+
+    def test_list_endpoint_paginates_by_name_with_sparse_fields(self):
+        response = self.client.get(reverse('companies-list'), {'page_size': 10, 'ordering': 'company_name', 'fields': 'id'})
+        data = response.json()
+        self.assertEqual(data['results'], [{'id': company.pk} for company in Company.objects.order_by('company_name', 'id')[:10]])
+
+        next_page = self.client.get(data['next']).json()
+        self.assertEqual(next_page['results'], [{'id': company.pk} for company in Company.objects.order_by('company_name', 'id')[10:20]])
+
+    def test_detail_endpoint_matches_model_serializer(self):
+        company = Company.objects.filter(address__isnull=True).first()
+        response = self.client.get(reverse('companies-detail', kwargs={'pk': company.pk}))
+        self.assertEqual(response.json(), CompanySerializer(company).data)
+
+        response = self.client.get(reverse('companies-detail', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, 404)
+
+
+class CompanyKeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Company.objects.bulk_create([
+            Company(company_name='Repetida' if i % 3 else f'Empresa {i:02d}', cell='3000000000', email=f'k{i}@test.co')
+            for i in range(15)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, ordering):
+        url, pages = reverse('companies-list'), []
+        params = {'page_size': 3, 'ordering': ordering, 'fields': 'id'}
+        while url:
+            data = self.client.get(url, params).json()
+            pages.append([row['id'] for row in data['results']])
+            url, params = data['next'], None
+        return pages, data['previous']
+
+    def test_pages_through_duplicate_names_without_offsets(self):
+        for ordering, expected in (('company_name', ('company_name', 'id')), ('-company_name', ('-company_name', '-id'))):
+            with CaptureQueriesContext(connection) as ctx:
+                pages, previous = self.walk(ordering)
+            # la posición lleva (nombre, id): las páginas que empiezan en un nombre repetido no usan OFFSET
+            self.assertFalse([query['sql'] for query in ctx.captured_queries if 'OFFSET' in query['sql']])
+            self.assertEqual(sum(pages, []), list(Company.objects.order_by(*expected).values_list('id', flat=True)))
+            self.assertEqual(len(pages), 5)
+            # la página anterior a la última es la cuarta
+            self.assertEqual([row['id'] for row in self.client.get(previous).json()['results']], pages[3])
+
+
+class CompanyResponseCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Cacheada', nit='700', cell='3000000000', email='c@test.co')
+        cls.staff = User.objects.create(identification_number='s', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('companies-detail', kwargs={'pk': self.company.pk})
+
+    def stats(self):
+        return self.client.get(reverse('response-cache-stats'), **auth_header(self.staff)).json()['companies']
+
+    def test_etag_and_last_modified_answer_304_without_queries(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        etag = first['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"otro", W/{etag}').status_code, 304)
+            self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304)
+            cached = self.client.get(self.url)
+        self.assertEqual((cached.status_code, cached.content), (200, first.content))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.company_name = 'Renombrada'
+            self.company.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(changed.json()['company_name'], 'Renombrada')
+        stale_since = http_date(0)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=stale_since).status_code, 200)
+
+    def test_if_none_match_any_requires_an_existing_resource(self):
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='*').status_code, 304)
+        missing = reverse('companies-detail', kwargs={'pk': 999999})
+        self.assertEqual(self.client.get(missing, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_conditional_get_requires_an_existing_resource(self):
+        future = http_date(time.time() + 3600)
+        missing = reverse('companies-detail', kwargs={'pk': 999999})
+        self.assertEqual(self.client.get(missing, HTTP_IF_MODIFIED_SINCE=future).status_code, 404)
+
+        # sin la respuesta en caché se construye antes de responder 304
+        etag = self.client.get(self.url)['ETag']
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=future).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stats_count_hits_misses_and_304(self):
+        etag = self.client.get(self.url)['ETag']
+        self.client.get(self.url)
+        self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.client.get(reverse('companies-list'))
+        self.assertEqual(self.stats(), {'hit': 1, 'miss': 2, 'stampede': 0, 'not_modified': 1})
+
+    def test_concurrent_misses_build_once(self):
+        building, release = threading.Event(), threading.Event()
+        builds = []
+
+        def build():
+            builds.append(1)
+            building.set()
+            release.wait(5)
+            return 'respuesta'
+
+        args = ('companies', 'list', 1, 'variante')
+        results = []
+        builder = threading.Thread(target=lambda: results.append(response_cache.get_or_build(*args, build)))
+        builder.start()
+        building.wait(5)
+        # otra petición con la misma clave mientras se construye: espera el valor
+        waiter = threading.Thread(target=lambda: results.append(
+            response_cache.get_or_build(*args, build, poll_interval=0.01)))
+        waiter.start()
+        for _ in range(500):
+            if response_cache.get_stats(['companies'])['companies']['stampede']:
+                break
+            time.sleep(0.01)
+        release.set()
+        builder.join()
+        waiter.join()
+
+        self.assertEqual(results, ['respuesta', 'respuesta'])
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(response_cache.get_stats(['companies'])['companies']['stampede'], 1)
+
+
+class GenerateTenantsCommandTests(TestCase):
+
+    def generate(self, **options):
+        call_command('generate_tenants', companies=5, users_per_company=4, seed=7, chunk_size=2, stdout=io.StringIO(), **options)
+        return (list(Company.objects.order_by('nit').values_list('company_name', 'nit', 'email')),
+                list(User.objects.order_by('email').values_list('email', 'username', 'rol', 'is_active', 'date_joined',
+                                                                'company__nit', 'groups__name')))
+
+    def test_same_seed_generates_the_same_dataset(self):
+        first = self.generate()
+        User.objects.all().delete()
+        Company.objects.all().delete()
+        self.assertEqual(self.generate(), first)
+
+    def test_one_admin_per_company_with_groups_and_shared_password(self):
+        companies, users = self.generate()
+        admins = [user for user in users if user[2] == 'admin']
+        self.assertEqual(sorted(admin[5] for admin in admins), sorted(nit for _, nit, _ in companies))
+        self.assertTrue(all(user[6] for user in users))
+        self.assertEqual(User.objects.values('password').distinct().count(), 1)
+        self.assertTrue(User.objects.first().check_password('synthetic-pass-123'))
+        # bulk_create no emite post_save: el directorio global lo llena User.objects.bulk_create
+        self.assertEqual(sorted(UserIdentity.objects.values_list('email', flat=True)), [user[0] for user in users])
+        self.assertEqual(set(UserIdentity.objects.values_list('id', 'company_id')),
+                         set(User.objects.values_list('id', 'company_id')))
+        with self.assertRaisesMessage(CommandError, 'ya existe'):
+            call_command('generate_tenants', companies=1, seed=7, stdout=io.StringIO())
+
+
+class CompanyProvisioningTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='Administradores')
+        cls.existing = Company.objects.create(company_name='Existente', nit='100', cell='3000000000',
+                                              email='existente@test.co')
+        User.objects.create(identification_number='1', email='admin@existente.co', username='admin', rol='admin',
+                            company=cls.existing, password='!')
+        cls.staff = User.objects.create(identification_number='0', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+
+    def item(self, index, **overrides):
+        admin = {'identification_number': f'5{index}', 'email': f'admin@nueva{index}.co', 'username': f'admin {index}',
+                 'password': 'secreta-123', **overrides.pop('admin', {})}
+        return {'company_name': f'Nueva {index}', 'nit': f'20{index}', 'cell': '3000000000',
+                'email': f'nueva{index}@test.co', 'admin': admin, **overrides}
+
+    def provision(self, items, **params):
+        url = reverse('companies-bulk-create-with-admin')
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(url, items, content_type='application/json', **auth_header(self.staff))
+
+    def batch(self):
+        return [
+            self.item(0),
+            self.item(1, nit='200'),                                   # NIT repetido en el lote
+            self.item(2, email='EXISTENTE@Test.co'),                    # correo de empresa ya registrado
+            self.item(3, admin={'email': 'Admin@Existente.co'}),        # correo de admin ya registrado
+            self.item(4, admin={'identification_number': '1'}),
+            {'company_name': 'Sin celular', 'email': 'sin@test.co'},
+            self.item(6, admin={'password': ''}),
+        ]
+
+    def test_dry_run_reports_per_item_without_writing(self):
+        response = self.provision(self.batch(), dry_run=1)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['status'] for result in results],
+                         ['valid', 'error', 'error', 'error', 'error', 'error', 'valid'])
+        self.assertEqual(list(results[1]['errors']), ['nit'])
+        self.assertEqual(list(results[2]['errors']), ['email'])
+        self.assertEqual(results[3]['errors'], {'admin': {'email': ["Ya existe un usuario con este correo electrónico."]}})
+        self.assertEqual(list(results[4]['errors']['admin']), ['identification_number'])
+        self.assertIn('cell', results[5]['errors'])
+        self.assertEqual(Company.objects.count(), 1)
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_creates_valid_items_with_their_admin(self):
+        response = self.provision({'items': self.batch()})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['total'], body['created'], body['failed']), (7, 2, 5))
+
+        created = body['results'][0]
+        admin = User.objects.get(pk=created['admin_id'])
+        self.assertEqual((admin.company_id, admin.rol, admin.email), (created['company_id'], 'admin', 'admin@nueva0.co'))
+        self.assertTrue(admin.check_password('secreta-123'))
+        self.assertEqual(list(admin.groups.values_list('name', flat=True)), ['Administradores'])
+        self.assertFalse(User.objects.get(email='admin@nueva6.co').has_usable_password())
+        self.assertTrue(UserIdentity.objects.filter(pk=admin.pk, company_id=admin.company_id).exists())
+
+    def test_rejects_oversized_requests(self):
+        with mock.patch.object(CompanyBulkProvisionView, 'max_items', 2):
+            response = self.provision([self.item(index) for index in range(3)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Company.objects.count(), 1)
 
-# Create your tests here.
+    def test_single_create_compares_emails_in_lowercase(self):
+        response = self.client.post('/api/v1/companies/create-with-admin/', {
+            'company_name': 'Copia', 'nit': '300', 'cell': '3000000000', 'email': 'EXISTENTE@Test.co',
+            'admin': {'identification_number': '30', 'email': 'Nuevo@Copia.co', 'username': 'admin',
+                      'rol': 'admin', 'password': 'secreta-123'},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
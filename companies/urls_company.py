@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
-from .views_company import CompanyAdminViewSet, CompanyViewSet
+from .views_company import (CompanyAdminViewSet, CompanyBulkProvisionView, CompanyDeltaSyncView, CompanyExportView,
+                            CompanySearchView, CompanyViewSet)
 
 router = DefaultRouter()
 
@@ -8,5 +9,10 @@ router.register(r'companies/create-with-admin', CompanyAdminViewSet, basename='c
 router.register(r'companies', CompanyViewSet, basename='companies')
 
 urlpatterns = [
+    # antes del router para que no la capture la ruta de detalle companies/<pk>/
+    path('companies/bulk-create-with-admin/', CompanyBulkProvisionView.as_view(), name='companies-bulk-create-with-admin'),
+    path('companies/search/', CompanySearchView.as_view(), name='companies-search'),
+    path('companies/export/', CompanyExportView.as_view(), name='companies-export'),
+    path('companies/changes/', CompanyDeltaSyncView.as_view(), name='companies-changes'),
     path('', include(router.urls))
 ]
\ No newline at end of file
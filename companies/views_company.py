@@ -1,8 +1,20 @@
-from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
+from django.conf import settings
+from rest_framework import status, viewsets
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from commons.mixins.views_mixins import SparseFieldsetQuerysetMixin, ValuesReadMixin, VersionedCacheMixin
+from commons.pagination import KeysetCursorPagination
+from commons.throttling import ANON_ENDPOINT_THROTTLES
+from commons.views import DeltaSyncView, ExportView
+
+from .exports import company_exporter
 from .models import Company
-from .serializer_company import CompanyAdminSerializer, CompanySerializer
+from .provisioning import provision_companies
+from .search import company_index
+from .sync import company_feed
+from .serializer_company import CompanyAdminSerializer, CompanySearchSerializer, CompanySerializer, CompanyValuesSerializer
 
 
 class CompanyAdminViewSet(viewsets.ModelViewSet):
@@ -10,10 +22,85 @@ class CompanyAdminViewSet(viewsets.ModelViewSet):
     serializer_class = CompanyAdminSerializer
     permission_classes = [AllowAny]
     http_method_names = ['post']    #solo permitir post
+    throttle_classes = ANON_ENDPOINT_THROTTLES
+    throttle_scope = 'company_create'
     
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(VersionedCacheMixin, SparseFieldsetQuerysetMixin, ValuesReadMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
+    cache_namespace = 'companies'  # versiones incrementadas en companies/signals.py
     serializer_class = CompanySerializer
+    values_serializer_class = CompanyValuesSerializer   # list/retrieve sin instanciar modelos
+    pagination_class = KeysetCursorPagination
+    cursor_ordering_fields = ('company_name',)
     
-    
-     
\ No newline at end of file
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action != 'list':
+            return queryset
+        
+        # filtros que usan índices: nit y email (únicos) y prefijo del nombre (company_name_id_idx)
+        params = self.request.query_params
+        if params.get('nit'):
+            queryset = queryset.filter(nit=params['nit'])
+        if params.get('email'):
+            queryset = queryset.filter(email=params['email'].lower())
+        if params.get('name'):
+            queryset = queryset.filter(company_name__istartswith=params['name'])
+        return queryset
+
+
+# alta masiva de empresas con su admin (migración desde el sistema legado); la contraseña
+# de cada admin se hashea dentro de la petición, de ahí el límite por petición
+class CompanyBulkProvisionView(APIView):
+    permission_classes = [IsAdminUser]
+    max_items = getattr(settings, 'BULK_IMPORT', {}).get('MAX_COMPANIES', 100)
+
+    def post(self, request):
+        items = request.data if isinstance(request.data, list) else request.data.get('items')
+        if not isinstance(items, list) or not items:
+            return Response({"items": "Debe enviar una lista de empresas con su administrador."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
+            return Response({"items": f"Máximo {self.max_items} empresas por petición."}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run') in ('1', 'true')
+        results = provision_companies(items, dry_run=dry_run)
+        failed = sum(1 for result in results if result['status'] == 'error')
+
+        return Response({
+            'total': len(results),
+            'created': sum(1 for result in results if result['status'] == 'created'),
+            'failed': failed,
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+
+# búsqueda de empresas por nombre o NIT (typeahead)
+class CompanySearchView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+
+        # fuera del staff, cada usuario solo ve su propia empresa
+        company_id = None if request.user.is_staff else request.user.company_id
+        if company_id is None and not request.user.is_staff:
+            return Response([], status=status.HTTP_200_OK)
+
+        companies = company_index.search_queryset(query, company_id=company_id, limit=limit)
+        return Response(CompanySearchSerializer(companies, many=True, context={'request': request}).data, status=status.HTTP_200_OK)
+
+
+# exportación de empresas (NDJSON o CSV); un administrador solo exporta la suya
+class CompanyExportView(ExportView):
+    exporter = company_exporter
+    filename = 'companies'
+
+
+# sincronización incremental de empresas (?updated_since=<cursor>); un administrador solo ve la suya
+class CompanyDeltaSyncView(DeltaSyncView):
+    feed = company_feed
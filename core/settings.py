@@ -14,6 +14,7 @@ import os
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import timedelta
+from importlib.util import find_spec
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,7 +48,7 @@ ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '').split(',')
 
 
 # recovery password
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_BACKEND = 'commons.mail.MeteredSMTPEmailBackend'  # SMTP de Django + métricas (commons.metrics)
 #EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'   #imprime el email en back
 EMAIL_HOST = os.getenv('EMAIL_HOST')  # o el que uses
 EMAIL_PORT =  os.getenv('EMAIL_PORT')
@@ -55,6 +56,32 @@ EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL') # dominio
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 10))
+
+# Sincronización incremental (?updated_since=, commons.utils.sync)
+SYNC = {
+    "SAFETY_LAG": 5,                 # segundos: margen para transacciones que aún no confirman
+    "TOMBSTONE_RETENTION_DAYS": 30,  # borrados que se recuerdan (comando purge_tombstones)
+    "PAGE_SIZE": 500,
+    "MAX_PAGE_SIZE": 2000,
+}
+
+# Altas masivas por HTTP: cada contraseña se hashea dentro de la petición, así que se
+# limita el tamaño; los archivos grandes van por `manage.py import_users`
+BULK_IMPORT = {
+    "MAX_ROWS": 200,        # filas por archivo en companies/<id>/users/import/
+    "MAX_COMPANIES": 100,   # empresas (y contraseñas de admin) por petición en companies/bulk-create-with-admin/
+}
+
+# Cola de correos (commons.outbox): las vistas encolan y `manage.py send_outbox --loop` entrega
+EMAIL_OUTBOX = {
+    "BATCH_SIZE": int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50)),  # correos por conexión SMTP
+    "MAX_ATTEMPTS": 6,      # luego el correo queda en estado 'dead'
+    "BACKOFF_BASE": 30,     # segundos; se duplica en cada fallo
+    "BACKOFF_MAX": 3600,
+    "CLAIM_TIMEOUT": 300,   # reserva mínima de un lote (se amplía según BATCH_SIZE y EMAIL_TIMEOUT)
+    "RETENTION_DAYS": 7,    # días que se guardan los enviados (comando purge_outbox)
+}
 FRONTEND_URL = os.getenv('FRONTEND_URL')  # Cambia según tu entorno
 
 # Application definition
@@ -82,7 +109,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "commons.metrics.MetricsMiddleware",  # primero: mide a los demás middlewares (/metrics)
     "django.middleware.security.SecurityMiddleware",
+    "commons.middleware.ReadYourWritesMiddleware",  # réplicas de lectura (commons.db_routers)
+    "commons.tenancy.TenantMiddleware",  # shard de la empresa del usuario (commons.tenancy)
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -116,7 +146,7 @@ WSGI_APPLICATION = "core.wsgi.application"
 
 DATABASES = {
     'default': {
-        "ENGINE": "django.db.backends.mysql",
+        "ENGINE": os.getenv('DB_ENGINE', "django.db.backends.mysql"),
         "NAME": os.getenv('DB_NAME'),
         "USER": os.getenv('DB_USER'),
         "PASSWORD": os.getenv('DB_PASSWORD'),
@@ -126,6 +156,46 @@ DATABASES = {
     },
 }
 
+# Réplicas de lectura: DB_REPLICA_HOSTS=host1,host2 (mismas credenciales que la primaria)
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{_index}'] = {**DATABASES['default'], "HOST": _host.strip(), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f'replica_{_index}')
+
+# Tras escribir, las lecturas del usuario van a la primaria durante estos segundos
+READ_YOUR_WRITES_WINDOW = int(os.getenv('READ_YOUR_WRITES_WINDOW', 5))
+
+# Shards por empresa: DB_SHARD_HOSTS=host1,host2 (mismas credenciales que la primaria).
+# El directorio commons.TenantShard asigna empresas a shards (comando move_tenant);
+# solo se reparten los modelos listados aquí ('app.Modelo' -> campo de la empresa).
+TENANT_SHARDS = ['default']
+for _index, _host in enumerate(filter(None, os.getenv('DB_SHARD_HOSTS', '').split(',')), start=1):
+    DATABASES[f'shard_{_index}'] = {**DATABASES['default'], "HOST": _host.strip()}
+    TENANT_SHARDS.append(f'shard_{_index}')
+TENANT_SHARDED_MODELS = {
+    'users.User': 'company_id',
+    # los refresh tokens emitidos/revocados tienen FK al usuario: van en su mismo shard
+    'token_blacklist.OutstandingToken': 'user__company_id',
+    'token_blacklist.BlacklistedToken': 'token__user__company_id',
+} if len(TENANT_SHARDS) > 1 else {}
+# segundos que cada proceso cachea localmente una entrada del directorio
+TENANT_DIRECTORY_TTL = 2
+# segundos que cada proceso reutiliza los datos de una empresa (commons.tenancy.request_tenant)
+TENANT_COMPANY_TTL = 30
+
+DATABASE_ROUTERS = ['commons.db_routers.TenantRouter', 'commons.db_routers.ReplicaRouter']
+
+
+# Caché compartida entre procesos (en producción: Redis o Memcached)
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        "BACKEND": os.getenv('CACHE_BACKEND', "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv('CACHE_LOCATION', "magcontrol"),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -146,6 +216,32 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Hash de contraseñas: PBKDF2 con costo configurable por entorno (users.passwords)
+PASSWORD_HASHERS = [
+    "users.passwords.hashers.TieredPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Iteraciones por nivel; los hashes con otro nivel se re-hashean en el siguiente login
+PASSWORD_HASHER_TIERS = {
+    'low': 300_000,
+    'standard': 1_000_000,
+    'high': 1_500_000,
+}
+PASSWORD_HASHER_TIER = os.getenv('PASSWORD_HASHER_TIER', 'standard')
+
+# Pool acotado donde corren los hashes (fuera del hilo de la petición)
+PASSWORD_POOL = {
+    "MAX_WORKERS": int(os.getenv('PASSWORD_POOL_WORKERS', 4)),
+    "MAX_QUEUE": int(os.getenv('PASSWORD_POOL_QUEUE', 32)),  # trabajos en espera antes de responder 503
+    "RETRY_AFTER": 2,  # segundos (cabecera Retry-After del 503)
+    "TIMEOUT": 30,
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -177,7 +273,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = 'users.User'
 
 AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend"
+    # ModelBackend que busca al usuario en todos los shards (commons.tenancy)
+    "commons.tenancy.TenantModelBackend"
 ]
 
 SIMPLE_JWT = {
@@ -186,6 +283,26 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Métricas en /metrics (commons.metrics). Con varios workers, un directorio compartido
+# (vacío al arrancar) donde cada proceso vuelca su acumulado cada FLUSH_INTERVAL segundos
+METRICS = {
+    "MULTIPROCESS_DIR": os.getenv('METRICS_MULTIPROCESS_DIR'),
+    "FLUSH_INTERVAL": 5,
+    # los scrapers (Prometheus) se identifican con la cabecera X-Metrics-Token
+    "TOKEN": os.getenv('METRICS_TOKEN'),
+}
+
+# Matriz rol/grupo -> permisos (users.permissions)
+PERMISSION_MATRIX = {
+    "LOCAL_TTL": 5,  # segundos que un proceso confía en su copia local antes de revalidar la versión
+}
+
+# LRU local para los principals construidos desde el JWT (users.authentication)
+JWT_PRINCIPAL_CACHE = {
+    "MAX_SIZE": int(os.getenv('JWT_PRINCIPAL_CACHE_SIZE', 10000)),
+    "TTL": int(os.getenv('JWT_PRINCIPAL_CACHE_TTL', 300)),  # segundos
+}
+
 REST_FRAMEWORK = {
     # 👮‍♂️ Quién puede acceder (autenticado, anónimo, permisos de grupo, etc.)
     
@@ -193,12 +310,51 @@ REST_FRAMEWORK = {
         # 'rest_framework.permissions.IsAuthenticated',  # o la que desees
         # Anónimos: pueden hacer GET, HEAD, OPTIONS (lectura)
         # Usuarios autenticados: pueden modificar (POST, PUT, DELETE) si tienen permisos asignados.
-        'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
+        # Igual que DjangoModelPermissionsOrAnonReadOnly pero contra la matriz precompilada de permisos
+        'users.permissions.MatrixModelPermissionsOrAnonReadOnly'
 
     ],
 
     # 🔐 Cómo se autentican los usuarios
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ]
+        # JWT sin consulta a la BD por petición (principal construido desde los claims)
+        'users.authentication.PrincipalJWTAuthentication',
+    ],
+
+    # 📦 Formatos de respuesta y de entrada (JSON con orjson; MessagePack si está instalado)
+    'DEFAULT_RENDERER_CLASSES': [
+        'commons.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        *(['commons.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'commons.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        *(['commons.parsers.MessagePackParser'] if find_spec('msgpack') else []),
+    ],
+
+    # Errores de dominio (commons.exceptions.ServiceBusy) -> 503 + Retry-After
+    'EXCEPTION_HANDLER': 'commons.exceptions.exception_handler',
+
+    # Proxies de confianza delante de la app: la IP del cliente es la que agregó el último
+    # a X-Forwarded-For (0 = REMOTE_ADDR; el encabezado lo controla el cliente)
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+
+    # 🚦 Límites de los endpoints anónimos (commons.throttling): '<throttle_scope>_<clave>'
+    # Claves: ip, email, ip_email, identification_number. Sin tasa configurada = sin límite para esa clave.
+    # El login limita por (IP, correo) y no solo por correo: otra IP no puede bloquear la cuenta.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '30/min',
+        'login_ip_email': '10/min',
+        'register_ip': '20/hour',
+        'register_email': '5/hour',
+        'register_identification_number': '5/hour',
+        'password_reset_ip': '10/hour',
+        'password_reset_email': '3/hour',
+        'set_new_password_ip': '20/hour',
+        'company_create_ip': '10/hour',
+        'company_create_email': '3/hour',
+        'company_create_identification_number': '3/hour',
+    },
 }
\ No newline at end of file
@@ -0,0 +1,21 @@
+# Configuración de las pruebas (manage.py test la usa por defecto, ver manage.py)
+#
+# SQLite locales como primaria, réplica y un shard. Los routers solo usan la réplica y
+# el shard en las pruebas que los activan con override_settings.
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+# en archivo (no en memoria) para que las pruebas concurrentes esperen el lock de escritura
+DATABASES = {
+    alias: {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / f"test_{alias}.sqlite3",
+        "OPTIONS": {"timeout": 20},
+        "TEST": {"NAME": BASE_DIR / f"test_{alias}.sqlite3"},
+    }
+    for alias in ('default', 'replica', 'shard_1')
+}
+DATABASE_REPLICAS = []
+TENANT_SHARDS = ['default']
+TENANT_SHARDED_MODELS = {}
@@ -19,9 +19,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponseRedirect
 
+from commons.views import MetricsView
+
 urlpatterns = [
     path('', lambda request: HttpResponseRedirect('/admin')),  # Redirige la raíz
     path("admin/", admin.site.urls),
+    path("metrics", MetricsView.as_view(), name='metrics'),  # Prometheus (commons.metrics)
     path("api/v1/", include("users.urls_user")),
-    path("api/v1/", include("companies.urls_company"))
+    path("api/v1/", include("companies.urls_company")),
+    path("api/v1/", include("commons.urls_commons"))
 ]
\ No newline at end of file
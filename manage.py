@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+    # las pruebas corren con su propia configuración (SQLite locales, core/settings_test.py)
+    default_settings = "core.settings_test" if sys.argv[1:2] == ["test"] else "core.settings"
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", default_settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
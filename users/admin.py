@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User  # tu modelo de usuario personalizado
+from .search import user_index
 
 @admin.register(User)
 class CustomUserAdmin(UserAdmin):
@@ -21,6 +22,13 @@ class CustomUserAdmin(UserAdmin):
         ),
     )
 
-    search_fields = ('email', 'username')
+    search_fields = ('email', 'username', 'identification_number')
     ordering = ('email',)
     filter_horizontal = ('groups', 'user_permissions')  # 👈 esto muestra bien los permisos y grupos
+
+    # usa el índice de tokens (commons.search) en lugar de icontains sobre toda la tabla
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        ranked = user_index.search(search_term, limit=200)
+        return queryset.filter(pk__in=[object_id for object_id, _ in ranked]), False
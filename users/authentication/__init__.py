@@ -0,0 +1,4 @@
+from .principal import TokenPrincipal, add_principal_claims
+from .jwt_authentication import AsyncPrincipalJWTAuthentication, PrincipalJWTAuthentication
+
+__all__ = ['TokenPrincipal', 'add_principal_claims', 'PrincipalJWTAuthentication', 'AsyncPrincipalJWTAuthentication']
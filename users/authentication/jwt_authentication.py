@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from commons import metrics
+from commons.utils.cache import LRUCache
+from users.authentication.principal import PRINCIPAL_CLAIMS, TokenPrincipal
+
+_cache_settings = getattr(settings, 'JWT_PRINCIPAL_CACHE', {})
+
+# token crudo -> (id de usuario, claims, token validado)
+principal_cache = LRUCache(
+    max_size=_cache_settings.get('MAX_SIZE', 10000),
+    ttl=_cache_settings.get('TTL', 300),
+)
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    Autenticación JWT que no consulta la base de datos.
+
+    Construye un TokenPrincipal desde los claims firmados y guarda el resultado de
+    la validación en una LRU local, de modo que un mismo token no se vuelve a
+    decodificar mientras siga vigente. Los tokens emitidos antes de agregar los
+    claims del principal siguen funcionando con la consulta normal al ORM.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = principal_cache.get(raw_token)
+        if cached is not None:
+            user_id, claims, validated_token = cached
+            return TokenPrincipal.from_claims(user_id, claims), validated_token
+
+        with metrics.timer('jwt_decode_duration_seconds'):
+            validated_token = self.get_validated_token(raw_token)
+            user = self.get_user(validated_token)
+
+        self._cache_principal(raw_token, user, validated_token)
+        return user, validated_token
+
+    def _cache_principal(self, raw_token, user, validated_token):
+        if isinstance(user, TokenPrincipal):
+            claims = {claim: validated_token[claim] for claim in PRINCIPAL_CLAIMS}
+            ttl = min(principal_cache.ttl, validated_token['exp'] - time.time())
+            principal_cache.set(raw_token, (user.id, claims, validated_token), ttl=ttl)
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in PRINCIPAL_CLAIMS):
+            return super().get_user(validated_token)
+        return TokenPrincipal.from_claims(validated_token[api_settings.USER_ID_CLAIM], validated_token)
+
+
+class AsyncPrincipalJWTAuthentication(PrincipalJWTAuthentication):
+    """
+    Variante para las vistas async (commons.async_views): misma LRU y mismos claims;
+    solo los tokens sin claims del principal consultan el usuario, con el ORM async.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cached = principal_cache.get(raw_token)
+        if cached is not None:
+            user_id, claims, validated_token = cached
+            return TokenPrincipal.from_claims(user_id, claims), validated_token
+
+        with metrics.timer('jwt_decode_duration_seconds'):
+            validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_user(validated_token)
+
+        self._cache_principal(raw_token, user, validated_token)
+        return user, validated_token
+
+    async def aget_user(self, validated_token):
+        if all(claim in validated_token for claim in PRINCIPAL_CLAIMS):
+            return self.get_user(validated_token)
+        # igual que JWTAuthentication.get_user
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
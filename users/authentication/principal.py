@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from rest_framework import exceptions
+
+
+# Claims que se firman dentro del access token para reconstruir el usuario sin ir a la BD.
+# Los permisos no viajan en el token: se resuelven con la matriz (users.permissions).
+PRINCIPAL_CLAIMS = ('email', 'username', 'identification_number', 'rol', 'company_id',
+                    'is_staff', 'is_superuser')
+
+
+def add_principal_claims(token, user):
+    """
+    Agrega al token los claims necesarios para construir un TokenPrincipal (login y
+    refresh: en el refresh se toman del usuario actual, no del refresh token).
+    """
+    token['email'] = user.email
+    token['username'] = user.username
+    token['identification_number'] = user.identification_number
+    token['rol'] = user.rol
+    token['company_id'] = user.company_id
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    return token
+
+
+class TokenPrincipal:
+    """
+    Usuario ligero construido a partir de los claims firmados del JWT.
+
+    Expone los atributos que usan las vistas (id, email, rol, company_id...) sin
+    consultar la base de datos. Si una vista necesita algo más (check_password,
+    save, groups...), se carga la instancia del ORM una sola vez y se delega en ella.
+
+    is_active es True porque solo se emiten tokens a usuarios activos: desactivar a un
+    usuario (o cambiarle el rol o la empresa) surte efecto en su siguiente refresh, que
+    vuelve a leerlo de la BD, es decir, a más tardar en ACCESS_TOKEN_LIFETIME.
+    """
+    __slots__ = ('id', 'email', 'username', 'identification_number', 'rol', 'company_id',
+                 'is_staff', 'is_superuser', '_instance')
+
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, email, username, identification_number, rol, company_id,
+                 is_staff=False, is_superuser=False):
+        self.id = id
+        self.email = email
+        self.username = username
+        self.identification_number = identification_number
+        self.rol = rol
+        self.company_id = company_id
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+        self._instance = None
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        return cls(
+            id=user_id,
+            email=claims['email'],
+            username=claims['username'],
+            identification_number=claims['identification_number'],
+            rol=claims['rol'],
+            company_id=claims['company_id'],
+            is_staff=claims['is_staff'],
+            is_superuser=claims['is_superuser'],
+        )
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def instance(self):
+        """
+        Instancia real del usuario en el ORM (se consulta solo la primera vez).
+        """
+        if self._instance is None:
+            User = get_user_model()
+            try:
+                user = User.objects.get(pk=self.id)
+            except User.DoesNotExist:
+                raise exceptions.AuthenticationFailed("Usuario no encontrado.", code='user_not_found')
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed("Usuario inactivo.", code='user_inactive')
+            self._instance = user
+        return self._instance
+
+    def get_username(self):
+        return self.email
+
+    def has_perm(self, perm, obj=None):
+        return self.has_perms([perm], obj)
+
+    def has_perms(self, perm_list, obj=None):
+        from users.permissions import user_has_perms
+        return user_has_perms(self, list(perm_list))
+
+    def has_module_perms(self, app_label):
+        if self.is_superuser:
+            return True
+        from users.permissions import get_user_permissions
+        return any(perm.startswith(f"{app_label}.") for perm in get_user_permissions(self.id))
+
+    def __getattr__(self, name):
+        # Cualquier atributo que no viaje en el token se resuelve contra el ORM
+        if name in TokenPrincipal.__slots__:
+            raise AttributeError(name)
+        return getattr(self.instance, name)
+
+    def __eq__(self, other):
+        return getattr(other, 'pk', None) == self.id and getattr(other, 'is_authenticated', False)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __str__(self):
+        return f"{self.username} ({self.rol})"
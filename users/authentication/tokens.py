@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken, Token, TokenError
+from rest_framework_simplejwt.utils import datetime_from_epoch, get_md5_hash_password
+
+from commons import tenancy
+from users.authentication.principal import add_principal_claims
+
+
+class AsyncRefreshToken(RefreshToken):
+    """
+    RefreshToken cuya lista negra se consulta y actualiza con el ORM async.
+
+    El constructor solo verifica firma, expiración y tipo (sin BD); las vistas async
+    llaman después a acheck_blacklist(). Mismas tablas que RefreshToken.
+    """
+
+    def verify(self, *args, **kwargs):
+        Token.verify(self, *args, **kwargs)
+
+    async def acheck_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if await BlacklistedToken.objects.filter(token__jti=jti).aexists():
+            raise TokenError("Token is blacklisted")
+
+    async def auser(self):
+        """
+        Usuario del token o None si ya no existe.
+        """
+        User = get_user_model()
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if not user_id:
+            return None
+        try:
+            return await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            return None
+
+    async def ablacklist(self):
+        token, _ = await OutstandingToken.objects.aget_or_create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            defaults={
+                'user': await self.auser(),
+                'created_at': self.current_time,
+                'token': str(self),
+                'expires_at': datetime_from_epoch(self.payload['exp']),
+            },
+        )
+        return await BlacklistedToken.objects.aget_or_create(token=token)
+
+    async def aoutstand(self, user):
+        return await OutstandingToken.objects.acreate(
+            user=user,
+            jti=self.payload[api_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+
+    @classmethod
+    async def afor_user(cls, user):
+        """
+        Igual que CustomTokenObtainPairSerialier.get_token(): claims del principal y
+        registro del token en el shard del usuario.
+        """
+        token = cls()
+        user_id = getattr(user, api_settings.USER_ID_FIELD)
+        token[api_settings.USER_ID_CLAIM] = user_id if isinstance(user_id, int) else str(user_id)
+        if api_settings.CHECK_REVOKE_TOKEN:
+            token[api_settings.REVOKE_TOKEN_CLAIM] = get_md5_hash_password(user.password)
+        with tenancy.use_tenant(user.company_id):
+            await token.aoutstand(user)
+            return add_principal_claims(token, user)
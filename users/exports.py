@@ -0,0 +1,10 @@
+from commons.utils.export import Exporter
+
+user_exporter = Exporter(
+    name='users',
+    model='users.User',
+    fields=('id', 'identification_number', 'email', 'username', 'rol', 'is_active', 'is_staff',
+            'company_id', 'date_joined', 'created_at', 'updated_at'),
+    default_fields=('id', 'identification_number', 'email', 'username', 'rol', 'is_active', 'company_id'),
+    tenant_field='company_id',
+)
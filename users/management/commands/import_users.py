@@ -0,0 +1,43 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from companies.models import Company
+from users.services import UserImporter, read_rows
+from users.services.bulk_users import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios de una empresa desde un archivo CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('company_id', type=int)
+        parser.add_argument('path', help='Archivo .csv (con encabezado) o .jsonl')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Por defecto se deduce de la extensión')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--report', help='Ruta donde guardar el reporte completo en JSON')
+
+    def handle(self, *args, **options):
+        try:
+            company = Company.objects.get(pk=options['company_id'])
+        except Company.DoesNotExist:
+            raise CommandError(f"No existe la empresa {options['company_id']}")
+
+        fmt = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if fmt not in ('csv', 'jsonl'):
+            raise CommandError("Formato no soportado. Use --format csv|jsonl")
+
+        with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+            report = UserImporter(company, batch_size=options['batch_size']).run(read_rows(stream, fmt))
+
+        if options['report']:
+            with open(options['report'], 'w', encoding='utf-8') as out:
+                json.dump(report, out, ensure_ascii=False, indent=2)
+
+        for error in report['errors'][:20]:
+            self.stdout.write(self.style.WARNING(f"Fila {error['row']}: {error['errors']}"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {report['created']} de {report['total']} usuarios ({report['failed']} con errores) en {company}"
+        ))
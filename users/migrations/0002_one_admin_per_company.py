@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("companies", "0006_company_name_id_idx"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="admin_company",
+            field=models.GeneratedField(db_persist=True, expression=models.Case(models.When(rol="admin", then=models.F("company")), default=None), output_field=models.BigIntegerField(null=True)),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["company", "rol", "is_active"], name="user_company_rol_active_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(fields=("admin_company",), name="user_one_admin_per_company"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("companies", "0007_company_timestamps"),
+        ("users", "0002_one_admin_per_company"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["company", "updated_at", "id"], name="user_company_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["updated_at", "id"], name="user_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:29
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+BATCH_SIZE = 1000
+
+
+def fill_identities(apps, schema_editor):
+    # el directorio vive en 'default' y recoge a los usuarios de todos los shards; si
+    # un correo o identificación se repite entre shards, la migración falla aquí
+    if schema_editor.connection.alias != DEFAULT_DB_ALIAS:
+        return
+    User = apps.get_model("users", "User")
+    UserIdentity = apps.get_model("users", "UserIdentity")
+    for alias in getattr(settings, "TENANT_SHARDS", [DEFAULT_DB_ALIAS]):
+        rows = User.objects.using(alias).order_by("pk").values_list("pk", "email", "identification_number", "company_id")
+        batch = []
+        for pk, email, identification_number, company_id in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(UserIdentity(id=pk, email=email, identification_number=identification_number, company_id=company_id))
+            if len(batch) >= BATCH_SIZE:
+                UserIdentity.objects.using(DEFAULT_DB_ALIAS).bulk_create(batch)
+                batch = []
+        UserIdentity.objects.using(DEFAULT_DB_ALIAS).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_updated_at_auto_now"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserIdentity",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("email", models.EmailField(max_length=254, unique=True)),
+                ("identification_number", models.CharField(blank=True, max_length=20, null=True, unique=True)),
+                ("company_id", models.BigIntegerField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "identidad de usuario",
+                "verbose_name_plural": "identidades de usuario",
+            },
+        ),
+        migrations.RunPython(fill_identities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_user_identity"),
+    ]
+
+    operations = [
+        # la secuencia del directorio reparte los ids de User entre los shards; empieza
+        # tras el mayor id ya copiado (todos los usuarios de todos los shards)
+        migrations.AlterField(
+            model_name="useridentity",
+            name="id",
+            field=models.BigAutoField(primary_key=True, serialize=False),
+        ),
+    ]
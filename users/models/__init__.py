@@ -1,3 +1,4 @@
-from .user import User
+from .user import User, is_admin_conflict
+from .userIdentity import UserIdentity
 
-__all__ = ['User']
\ No newline at end of file
+__all__ = ['User', 'UserIdentity', 'is_admin_conflict']
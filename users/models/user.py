@@ -1,4 +1,5 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, models, router, transaction
 from commons.models import TimeStampedModel
 
 from django.contrib.auth.models import (
@@ -12,7 +13,10 @@ from django.utils import timezone
 from django.utils.timezone import localtime
 
 from companies.models import Company
+from commons.managers import TenantQuerySet
 from commons.utils.validators import validate_user_company
+from users import passwords
+from users.models.userIdentity import UserIdentity
 
 
 # ---------- Constantes globales ---------- #
@@ -33,9 +37,22 @@ ROLES = (
     ('cliente', 'Cliente'),
     ('proveedor', 'Proveedor')
 )
+
+# Índice único sobre User.admin_company: un solo usuario admin por empresa
+ADMIN_PER_COMPANY_CONSTRAINT = 'user_one_admin_per_company'
+
+
+def is_admin_conflict(error):
+    """
+    Indica si un IntegrityError lo produjo la restricción de un admin por empresa.
+    """
+    # MySQL/PostgreSQL nombran la restricción; SQLite, la columna
+    message = str(error)
+    return ADMIN_PER_COMPANY_CONSTRAINT in message or 'admin_company' in message
+
         
 # ---------- Manager personalizado ---------- #
-class UserManager(BaseUserManager):
+class UserManager(BaseUserManager.from_queryset(TenantQuerySet)):   # User.objects.for_tenant()
     
     #Crea un usuario regular. Es llamado cuando haces User.objects.create_user(...)    
     def create_user(self, identification_number, email, username, rol, company, password=None, **extra_fields):
@@ -59,15 +76,20 @@ class UserManager(BaseUserManager):
         ) 
         user.set_password(password) # Hashea la contraseña
         
-        user.save(using=self._db) # Guarda el usuario en la base de datos configurada
-           
-        # Agregar grupo automáticamente según rol
-        grupo_nombre = ROL_GRUPO_MAP[rol]
-        try:
-            grupo = Group.objects.get(name=grupo_nombre)
-            user.groups.add(grupo)
-        except Group.DoesNotExist:
-            print(f"⚠️ Grupo '{grupo_nombre}' no encontrado en la base de datos.")
+        # Atómico: si el INSERT choca con una restricción no queda el usuario a medias
+        # (en la base donde va el usuario: el shard de su empresa, ver commons.tenancy;
+        # y en 'default', donde save() registra su UserIdentity y toma de ella el id)
+        database = self._db or router.db_for_write(self.model, instance=user)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=database):
+            user.save(using=self._db) # Guarda el usuario en la base de datos configurada
+               
+            # Agregar grupo automáticamente según rol
+            grupo_nombre = ROL_GRUPO_MAP[rol]
+            try:
+                grupo = Group.objects.get(name=grupo_nombre)
+                user.groups.add(grupo)
+            except Group.DoesNotExist:
+                print(f"⚠️ Grupo '{grupo_nombre}' no encontrado en la base de datos.")
             
         # user = MyModel.objects.get(id=1)  # o el objeto que estés usando
         #print("guardado: ", localtime(user.date_joined))
@@ -75,6 +97,32 @@ class UserManager(BaseUserManager):
  
         return user
     
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create no pasa por save(): los ids (únicos entre shards) se reservan aquí
+        # en el directorio global (UserIdentity.allocate), que no recibe post_save
+        objs = list(objs)
+        with transaction.atomic(using=DEFAULT_DB_ALIAS, savepoint=False):
+            UserIdentity.allocate([obj for obj in objs if obj.pk is None], batch_size=kwargs.get('batch_size'))
+            return super().bulk_create(objs, *args, **kwargs)
+
+    def located(self, **lookup):
+        """
+        Manager sobre la base donde vive el usuario que cumple `lookup` (email, pk...),
+        según el directorio global (UserIdentity). Para el login y la recuperación de
+        contraseña, que todavía no conocen la empresa. Sin shards, el propio manager.
+        """
+        # aquí y no arriba: commons.tenancy importa el backend de auth (y este, el modelo User)
+        from commons import tenancy
+
+        if tenancy.tenant_field(self.model) is None:
+            return self
+        company_ids = list(UserIdentity.objects.filter(**lookup).values_list('company_id', flat=True)[:1])
+        return self.db_manager(tenancy.database_for(self.model, company_ids[0]) if company_ids else None)
+
+    async def alocated(self, **lookup):
+        # el directorio de shards (tenancy.lookup) se consulta de forma síncrona
+        return await sync_to_async(self.located)(**lookup)
+
     #Crea un usuario administrador, llamado cuando haces createsuperuser. Se requiere para usar el panel de admin
     def create_superuser(self, email, username, password, **extra_fields):
         
@@ -120,7 +168,7 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
     
     #date_joined = models.DateField(auto_now_add=True)
     date_joined = models.DateTimeField(default=timezone.now) # Fecha de creación
-    updated_at = models.DateTimeField(default=timezone.now) # Fecha de última modificación
+    updated_at = models.DateTimeField(auto_now=True) # Fecha de última modificación (la pone save())
     
     company = models.ForeignKey(
         'companies.Company',
@@ -153,12 +201,77 @@ class User(AbstractBaseUser, PermissionsMixin, TimeStampedModel):
         verbose_name='permisos de usuario'
     )
     
+    # Empresa del usuario si es admin y NULL en otro caso. Columna generada (STORED) con
+    # índice único: garantiza un solo admin por empresa en la BD (MySQL no tiene índices
+    # únicos parciales y los NULL no chocan entre sí)
+    admin_company = models.GeneratedField(
+        expression=models.Case(models.When(rol='admin', then=models.F('company')), default=None),
+        output_field=models.BigIntegerField(null=True),
+        db_persist=True,
+    )
+    
     objects = UserManager() # Establece el manager personalizado
     
     USERNAME_FIELD = 'email' # Le dice a Django que el campo principal de login será email, no username.
     #REQUIRED_FIELDS = ['username', 'company']
     REQUIRED_FIELDS = ['username']
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['admin_company'], name=ADMIN_PER_COMPANY_CONSTRAINT),
+        ]
+        indexes = [
+            # usuarios de una empresa por rol (y estado): admin de la empresa, cajeros activos...
+            models.Index(fields=['company', 'rol', 'is_active'], name='user_company_rol_active_idx'),
+            # sincronización incremental por empresa y global (staff)
+            models.Index(fields=['company', 'updated_at', 'id'], name='user_company_updated_idx'),
+            models.Index(fields=['updated_at', 'id'], name='user_updated_idx'),
+        ]
+    
+    # ---------- Id global: lo reparte el directorio (UserIdentity.allocate) ---------- #
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.pk is None:
+            # la identidad y el usuario se confirman (o se deshacen) juntos
+            with transaction.atomic(using=DEFAULT_DB_ALIAS, savepoint=False):
+                UserIdentity.allocate([self])
+                kwargs['force_insert'] = kwargs.get('force_insert') or True
+                return super().save(*args, **kwargs)
+        return super().save(*args, **kwargs)
+
+    # ---------- Contraseñas: hash y verificación en el pool acotado ---------- #
+    def set_password(self, raw_password):
+        self.password = passwords.make_password(raw_password)
+        self._password = raw_password
+
+    async def aset_password(self, raw_password):
+        self.password = await passwords.amake_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        # setter: re-hashea si el nivel de costo (PASSWORD_HASHER_TIER) cambió
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self._password = None  # re-hashear no cuenta como cambio de contraseña
+            self.save(update_fields=["password"])
+
+        return passwords.check_password(raw_password, self.password, setter)
+
+    async def acheck_password(self, raw_password):
+        async def setter(raw_password):
+            await self.aset_password(raw_password)
+            self._password = None
+            await self.asave(update_fields=["password"])
+
+        return await passwords.acheck_password(raw_password, self.password, setter)
+
+    # ---------- Empresa con la que se leyó (users.signals: cambio de empresa) ---------- #
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        if 'company_id' in field_names:
+            user._loaded_company_id = user.company_id
+        return user
+
     # se llama automaticamente con modelForm
     def clean(self):
         super().clean()
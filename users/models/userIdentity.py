@@ -0,0 +1,57 @@
+from django.db import DEFAULT_DB_ALIAS, models
+
+
+class UserIdentity(models.Model):
+    """
+    Directorio global de usuarios en 'default': una fila por usuario (mismo id) con los
+    campos que deben ser únicos entre todos los shards. Los índices únicos de User solo
+    cubren la base donde vive cada usuario; estos cubren todas. Lo mantienen save() y
+    bulk_create() de User y sus señales, y lo consultan los validadores de unicidad y el login
+    (commons.tenancy.TenantModelBackend) para ir directo al shard del usuario.
+
+    Su secuencia reparte además los ids de User: cada shard tiene su propio autoincremento
+    y los ids se repetirían entre shards (ver allocate).
+    """
+    id = models.BigAutoField(primary_key=True)   # User.id
+    email = models.EmailField(unique=True)
+    identification_number = models.CharField(max_length=20, unique=True, null=True, blank=True)
+    company_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'identidad de usuario'
+        verbose_name_plural = 'identidades de usuario'
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(id=user.pk, email=user.email, identification_number=user.identification_number,
+                   company_id=user.company_id)
+
+    @classmethod
+    def allocate(cls, users, batch_size=None):
+        """
+        Inserta en 'default' las identidades de usuarios nuevos (sin id) y les asigna a
+        los usuarios el id de su identidad, único entre todos los shards. Un correo o
+        identificación repetidos fallan aquí (IntegrityError), antes de tocar el shard.
+        """
+        identities = [cls.from_user(user) for user in users]
+        manager = cls.objects.using(DEFAULT_DB_ALIAS)
+        if len(identities) == 1:
+            identities[0].save(using=DEFAULT_DB_ALIAS, force_insert=True)
+        elif identities:
+            manager.bulk_create(identities, batch_size=batch_size)
+            # MySQL no devuelve los ids de un INSERT masivo: se recuperan por email
+            if any(identity.pk is None for identity in identities):
+                emails = [identity.email for identity in identities]
+                step = batch_size or len(emails)
+                ids = {}
+                for start in range(0, len(emails), step):
+                    ids.update(manager.filter(email__in=emails[start:start + step]).values_list('email', 'id'))
+                for identity in identities:
+                    identity.pk = ids[identity.email]
+        for user, identity in zip(users, identities):
+            user.pk = identity.pk
+            user._identity_allocated = True   # users.signals: la identidad ya está al día
+        return users
+
+    def __str__(self):
+        return f"{self.email} (empresa {self.company_id})"
@@ -0,0 +1,50 @@
+# Hash y verificación de contraseñas a través del pool acotado (users.passwords.pool)
+
+from django.contrib.auth import hashers as django_hashers
+
+from .pool import PasswordPool, PasswordPoolBusy, get_pool
+
+
+def make_password(raw_password):
+    if raw_password is None:
+        return django_hashers.make_password(None)
+    return get_pool().run(django_hashers.make_password, raw_password)
+
+
+async def amake_password(raw_password):
+    if raw_password is None:
+        return django_hashers.make_password(None)
+    return await get_pool().arun(django_hashers.make_password, raw_password)
+
+
+def make_passwords(raw_passwords):
+    """
+    Hashea varias contraseñas en paralelo (importaciones masivas). Las contraseñas
+    vacías quedan como no utilizables, igual que make_password(None).
+    """
+    raw_passwords = list(raw_passwords)
+    pending = [raw for raw in raw_passwords if raw]
+    hashed = iter(get_pool().map(django_hashers.make_password, pending))
+    return [next(hashed) if raw else django_hashers.make_password(None) for raw in raw_passwords]
+
+
+def check_password(raw_password, encoded, setter=None):
+    """
+    Verifica en el pool y, si el hash quedó desactualizado (otro nivel de costo),
+    llama a `setter` desde el hilo actual para re-hashear.
+    """
+    is_correct, must_update = get_pool().run(django_hashers.verify_password, raw_password, encoded)
+    if setter and is_correct and must_update:
+        setter(raw_password)
+    return is_correct
+
+
+async def acheck_password(raw_password, encoded, setter=None):
+    is_correct, must_update = await get_pool().arun(django_hashers.verify_password, raw_password, encoded)
+    if setter and is_correct and must_update:
+        await setter(raw_password)
+    return is_correct
+
+
+__all__ = ['make_password', 'amake_password', 'make_passwords', 'check_password', 'acheck_password',
+           'PasswordPool', 'PasswordPoolBusy', 'get_pool']
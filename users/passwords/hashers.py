@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.exceptions import ImproperlyConfigured
+
+from commons import metrics
+
+
+def check_tier():
+    """
+    Valida PASSWORD_HASHER_TIER contra PASSWORD_HASHER_TIERS (UsersConfig.ready): un
+    nivel mal escrito en el entorno falla al arrancar y no en el primer login.
+    """
+    tier = settings.PASSWORD_HASHER_TIER
+    if tier not in settings.PASSWORD_HASHER_TIERS:
+        raise ImproperlyConfigured(
+            f"PASSWORD_HASHER_TIER '{tier}' no es válido. Debe ser uno de: "
+            f"{', '.join(settings.PASSWORD_HASHER_TIERS)}")
+
+
+class TieredPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con el número de iteraciones del nivel PASSWORD_HASHER_TIER
+    (iteraciones por nivel en PASSWORD_HASHER_TIERS).
+
+    Conserva el algoritmo 'pbkdf2_sha256', así que los hashes existentes siguen
+    siendo válidos; al cambiar de nivel, must_update() marca los hashes viejos y
+    se re-hashean en el siguiente login exitoso.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASHER_TIERS[settings.PASSWORD_HASHER_TIER]
+
+    def encode(self, password, salt, iterations=None):
+        with metrics.timer('password_hash_duration_seconds', ('encode',)):
+            return super().encode(password, salt, iterations)
+
+    def verify(self, password, encoded):
+        with metrics.timer('password_hash_duration_seconds', ('verify',)):
+            return super().verify(password, encoded)
@@ -0,0 +1,119 @@
+# Pool acotado para hashear y verificar contraseñas fuera del hilo de la petición
+#
+# PBKDF2 (hashlib.pbkdf2_hmac) libera el GIL mientras calcula, así que un pool de
+# hilos basta para no bloquear a los workers y limita cuántos hashes corren a la vez.
+# Si el pool y su cola están llenos, o el hash no termina en TIMEOUT segundos, se lanza
+# PasswordPoolBusy y las vistas responden 503 + Retry-After (commons.exceptions).
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from commons.exceptions import ServiceBusy
+
+_pool_settings = getattr(settings, 'PASSWORD_POOL', {})
+
+
+class PasswordPoolBusy(ServiceBusy):
+    default_code = 'password_pool_busy'
+    default_wait = _pool_settings.get('RETRY_AFTER', 2)
+
+
+class PasswordPool:
+    """
+    ThreadPoolExecutor con un semáforo que limita trabajos en curso + en cola.
+    """
+
+    def __init__(self, max_workers, max_queue, timeout=None):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-pool')
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # el trabajo sigue en el pool y libera su lugar al terminar
+            raise PasswordPoolBusy()
+
+    def run(self, fn, *args):
+        return self.result(self.submit(fn, *args))
+
+    def map(self, fn, items, max_in_flight=None):
+        """
+        Para cargas masivas: espera turno en lugar de lanzar PasswordPoolBusy y deja
+        como mucho `max_in_flight` trabajos propios en curso (la mitad del pool por
+        defecto) para no acaparar los hilos que usan los logins.
+        """
+        limit = threading.Semaphore(max_in_flight or max(1, self.max_workers // 2))
+
+        def release(_):
+            self._slots.release()
+            limit.release()
+
+        futures = []
+        for item in items:
+            limit.acquire()
+            self._slots.acquire()
+            try:
+                future = self._executor.submit(fn, item)
+            except BaseException:
+                release(None)
+                raise
+            future.add_done_callback(release)
+            futures.append(future)
+        return [self.result(future) for future in futures]
+
+    async def arun(self, fn, *args):
+        try:
+            # shield: al vencer el plazo no se cancela el trabajo, solo se deja de esperar
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(self.submit(fn, *args))), self.timeout)
+        except asyncio.TimeoutError:
+            raise PasswordPoolBusy()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # Se crea en el primer uso para que cada worker (tras el fork) tenga el suyo
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordPool(
+                    max_workers=_pool_settings.get('MAX_WORKERS', 4),
+                    max_queue=_pool_settings.get('MAX_QUEUE', 32),
+                    timeout=_pool_settings.get('TIMEOUT', 30),
+                )
+    return _pool
+
+
+def _reset_after_fork():
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,5 @@
+from .matrix import get_matrix, get_user_permissions, user_has_perms, invalidate_matrix, invalidate_user
+from .model_permissions import MatrixModelPermissionsOrAnonReadOnly
+
+__all__ = ['get_matrix', 'get_user_permissions', 'user_has_perms', 'invalidate_matrix', 'invalidate_user',
+           'MatrixModelPermissionsOrAnonReadOnly']
@@ -0,0 +1,166 @@
+# Matriz precompilada rol/grupo -> permisos ('app_label.codename')
+#
+# La matriz vive en la caché compartida (CACHES['default']) bajo un número de
+# versión, y cada proceso guarda una copia local que revalida como mucho cada
+# PERMISSION_MATRIX['LOCAL_TTL'] segundos. Las señales m2m_changed de
+# Group.permissions y de User.groups / User.user_permissions invalidan las entradas.
+#
+# Los permisos por usuario van además bajo un sello por usuario que invalidate_user
+# incrementa: un cálculo que leyó la base antes de la invalidación escribe bajo el
+# sello viejo, que ya nadie consulta, en lugar de pisar la entrada vigente.
+
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+
+from commons.utils.cache import LRUCache
+
+_matrix_settings = getattr(settings, 'PERMISSION_MATRIX', {})
+LOCAL_TTL = _matrix_settings.get('LOCAL_TTL', 5)
+CACHE_TIMEOUT = _matrix_settings.get('CACHE_TIMEOUT', 60 * 60 * 24)
+
+VERSION_KEY = 'perm_matrix:version'
+MATRIX_KEY = 'perm_matrix:{version}'
+USER_STAMP_KEY = 'perm_matrix:user:{user_id}:stamp'
+USER_PERMS_KEY = 'perm_matrix:{version}:user:{user_id}:{stamp}'
+
+_local = {'version': None, 'checked_at': 0.0, 'matrix': None}
+_user_perms = LRUCache(max_size=_matrix_settings.get('LOCAL_USERS', 10000), ttl=LOCAL_TTL)
+
+
+class PermissionMatrix:
+    """
+    Permisos por grupo, como frozensets para chequeos O(1).
+    """
+    __slots__ = ('groups',)
+
+    def __init__(self, groups):
+        self.groups = groups
+
+    def for_group(self, name):
+        return self.groups.get(name, frozenset())
+
+
+def compile_matrix():
+    """
+    Construye la matriz con una sola consulta sobre los permisos de los grupos.
+    """
+    groups = {}
+    rows = Permission.objects.filter(group__isnull=False).values_list(
+        'group__name', 'content_type__app_label', 'codename')
+    for group_name, app_label, codename in rows:
+        groups.setdefault(group_name, set()).add(f"{app_label}.{codename}")
+
+    return PermissionMatrix({name: frozenset(perms) for name, perms in groups.items()})
+
+
+def get_version():
+    now = time.monotonic()
+    if _local['version'] is not None and now - _local['checked_at'] < LOCAL_TTL:
+        return _local['version']
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    if version != _local['version']:
+        _local['matrix'] = None
+    _local['version'] = version
+    _local['checked_at'] = now
+    return version
+
+
+def get_matrix():
+    version = get_version()
+    if _local['matrix'] is not None:
+        return _local['matrix']
+
+    key = MATRIX_KEY.format(version=version)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = compile_matrix()
+        cache.set(key, matrix, timeout=CACHE_TIMEOUT)
+    _local['matrix'] = matrix
+    return matrix
+
+
+def get_user_permissions(user_id):
+    """
+    Permisos efectivos del usuario (grupos + permisos individuales).
+    """
+    version = get_version()
+    perms = _user_perms.get((version, user_id))
+    if perms is not None:
+        return perms
+
+    stamp = get_user_stamp(user_id)
+    key = USER_PERMS_KEY.format(version=version, user_id=user_id, stamp=stamp)
+    perms = cache.get(key)
+    if perms is None:
+        from users.models import User
+
+        matrix = get_matrix()
+        group_names = User.groups.through.objects.filter(user_id=user_id).values_list('group__name', flat=True)
+        direct = User.user_permissions.through.objects.filter(user_id=user_id).values_list(
+            'permission__content_type__app_label', 'permission__codename')
+
+        collected = set()
+        for name in group_names:
+            collected |= matrix.for_group(name)
+        collected.update(f"{app_label}.{codename}" for app_label, codename in direct)
+        perms = frozenset(collected)
+        cache.set(key, perms, timeout=CACHE_TIMEOUT)
+
+    _user_perms.set((version, user_id), perms)
+    if get_user_stamp(user_id) != stamp:
+        # se invalidó mientras se calculaba: el resultado puede ser viejo, se descarta la
+        # copia local (la entrada compartida quedó bajo el sello viejo)
+        _user_perms.delete((version, user_id))
+    return perms
+
+
+def get_user_stamp(user_id):
+    key = USER_STAMP_KEY.format(user_id=user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        # un sello nuevo parte de la hora: si la caché lo desalojó, no vuelve a un
+        # valor ya usado cuyas entradas podrían seguir guardadas
+        cache.add(key, time.time_ns(), timeout=None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def user_has_perms(user, perm_list):
+    if not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    if not perm_list:
+        return True
+    perms = get_user_permissions(user.pk)
+    return all(perm in perms for perm in perm_list)
+
+
+def invalidate_matrix():
+    """
+    Invalida la matriz completa (y con ella todos los permisos por usuario).
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, timeout=None)
+    _local['version'] = None
+    _local['matrix'] = None
+    _user_perms.clear()
+
+
+def invalidate_user(user_id):
+    key = USER_STAMP_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # sin sello (nunca creado o desalojado): basta con uno nuevo
+        cache.add(key, time.time_ns(), timeout=None)
+    _user_perms.delete((get_version(), user_id))
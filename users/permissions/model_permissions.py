@@ -0,0 +1,28 @@
+from rest_framework.permissions import DjangoModelPermissionsOrAnonReadOnly
+
+from commons import metrics
+from users.permissions.matrix import user_has_perms
+
+
+class MatrixModelPermissionsOrAnonReadOnly(DjangoModelPermissionsOrAnonReadOnly):
+    """
+    Igual que DjangoModelPermissionsOrAnonReadOnly, pero resuelve los permisos
+    contra la matriz precompilada en lugar de user.has_perms().
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or (not user.is_authenticated and self.authenticated_users_only):
+            return False
+
+        if getattr(view, '_ignore_model_permissions', False):
+            return True
+
+        queryset = self._queryset(view)
+        perms = self.get_required_permissions(request.method, queryset.model)
+
+        if not user.is_authenticated:
+            return not perms
+
+        with metrics.timer('permission_check_duration_seconds'):
+            return user_has_perms(user, perms)
@@ -0,0 +1,9 @@
+from commons.search import SearchIndex
+
+# campo: peso en el ranking
+user_index = SearchIndex(
+    kind='user',
+    model='users.User',
+    fields={'identification_number': 5, 'email': 4, 'username': 3},
+    tenant_field='company_id',
+)
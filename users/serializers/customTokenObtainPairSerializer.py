@@ -1,8 +1,64 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from commons import tenancy
+
+from users.authentication import add_principal_claims
 
 class CustomTokenObtainPairSerialier(TokenObtainPairSerializer):
     username_field = 'email'
     
+    @classmethod
+    def get_token(cls, user):
+        # claims para autenticar sin consultar la BD (PrincipalJWTAuthentication);
+        # el login es anónimo: el refresh token se registra en el shard del usuario
+        with tenancy.use_tenant(user.company_id):
+            return add_principal_claims(super().get_token(user), user)
+    
     def validate(self, attrs):
         attrs[self.username_field] = attrs[self.username_field].lower() # normaliza el email
-        return super().validate(attrs)
\ No newline at end of file
+        return super().validate(attrs)
+
+
+class TenantTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh que vuelve a leer al usuario: rechaza a los inactivos o eliminados y firma
+    el nuevo access token con sus claims actuales (rol, empresa...), no con los del
+    refresh token.
+    """
+
+    def validate(self, attrs):
+        # la petición de refresh es anónima: la lista negra del token se consulta en el
+        # shard de la empresa del claim (firmado; la firma se verifica al construirlo)
+        try:
+            company_id = RefreshToken(attrs['refresh'], verify=False).get('company_id')
+        except Exception:
+            company_id = None
+        with tenancy.use_tenant(company_id):
+            refresh = self.token_class(attrs['refresh'])
+            user = self.get_user(refresh)
+            add_principal_claims(refresh, user)
+            data = {'access': str(refresh.access_token)}
+
+            if api_settings.ROTATE_REFRESH_TOKENS:
+                if api_settings.BLACKLIST_AFTER_ROTATION:
+                    refresh.blacklist()
+                refresh.set_jti()
+                refresh.set_exp()
+                refresh.set_iat()
+                refresh.outstand()
+                data['refresh'] = str(refresh)
+        return data
+
+    def get_user(self, refresh):
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+        except (KeyError, User.DoesNotExist):
+            user = None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        return user
@@ -1,21 +1,36 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
 
+from commons import tenancy
+from commons.mixins.serializers_mixins import LowercaseEmailField, LowercaseEmailMixin, SparseFieldsetMixin
+from commons.serializers import ValuesSerializer
+from users.models import UserIdentity, is_admin_conflict
+
 User = get_user_model()
 
+ADMIN_EXISTS_MESSAGE = "Ya existe un usuario administrador para esta empresa"
+IDENTIFICATION_TAKEN_MESSAGE = "Este número de identificación ya está registrado."
+
+# la unicidad se valida en el directorio global (UserIdentity): los índices únicos de
+# User solo ven el shard de la empresa
+unique_email = UniqueValidator(queryset=UserIdentity.objects.all(), lookup='iexact')
+unique_identification = UniqueValidator(queryset=UserIdentity.objects.all(), message=IDENTIFICATION_TAKEN_MESSAGE)
+
 # register user
 class UserRegisterSerializer(serializers.ModelSerializer):
     identification_number = serializers.CharField(
         required=True,
         max_length=20,
-        validators=[UniqueValidator(queryset=User.objects.all(), message="Este número de identificación ya está registrado.")],
+        validators=[unique_identification],
         write_only=True
     )
     
-    email = serializers.EmailField(
+    email = LowercaseEmailField(
         required = True,
-        validators = [UniqueValidator(queryset=User.objects.all())]
+        validators = [unique_email]
     )
     
     password = serializers.CharField(write_only=True, min_length=6)
@@ -26,34 +41,77 @@ class UserRegisterSerializer(serializers.ModelSerializer):
     
     def validate(self, data):
         company = data.get('company')
-        rol = data.get('rol')
         
         if not company:
             raise serializers.ValidationError("La empresa es requerida para este tipo de usuario.")
         
-        if rol == 'admin':
-            exists_admin = User.objects.filter(company=company, rol='admin').exists()
-            if exists_admin:
-                raise serializers.ValidationError("Ya existe un usuario administrador para esta empresa")
-            
+        # "un admin por empresa" lo garantiza la restricción única de la BD (ver create)
         return data    
         
     def create(self, validated_data):
         password = validated_data.pop('password')
         
-        user = User.objects.create_user(password=password, **validated_data)
+        # inserción optimista: sin consulta previa y sin carrera entre registros simultáneos
+        try:
+            user = User.objects.create_user(password=password, **validated_data)
+        except IntegrityError as e:
+            if is_admin_conflict(e):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [ADMIN_EXISTS_MESSAGE]})
+            raise
         return user    
 
         
 # get profile       
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'identification_number', 'email', 'username', 'rol']
 
 
+# lectura rápida del perfil con la misma salida que UserSerializer
+class UserValuesSerializer(ValuesSerializer):
+    serializer_class = UserSerializer
+
+
+class CompanyNameField(serializers.ReadOnlyField):
+    """
+    Nombre de la empresa desde company_id con los datos cacheados del tenant
+    (commons.tenancy.request_tenant): sin JOIN ni consulta por fila a la empresa.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'company_id'
+        super().__init__(**kwargs)
+
+    def to_representation(self, company_id):
+        request = self.context.get('request')
+        tenant = tenancy.request_tenant(request) if request is not None else None
+        if tenant is None or tenant.id != company_id:
+            tenant = tenancy.get_tenant(company_id)
+        return tenant.company_name if tenant is not None else None
+
+
+# list users of a company
+class CompanyUserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    company_name = CompanyNameField()
+    groups = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    
+    class Meta:
+        model = User
+        fields = ['id', 'identification_number', 'email', 'username', 'rol', 'is_active', 'company', 'company_name', 'groups']
+
+
+# search users
+class UserSearchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    score = serializers.IntegerField(source='search_score', read_only=True)
+    
+    class Meta:
+        model = User
+        fields = ['id', 'identification_number', 'email', 'username', 'rol', 'company', 'score']
+
+
 # create company with user admin
-class AdminUserSerializer(serializers.ModelSerializer):
+class AdminUserSerializer(LowercaseEmailMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['identification_number', 'email', 'username', 'rol', 'password']
@@ -62,33 +120,29 @@ class AdminUserSerializer(serializers.ModelSerializer):
             'rol': {'default': 'admin'}
         }
         
-    def validate_email(self, value):
-        return value.lower()    
-        
     def validate_rol(self, value):
         if value != 'admin':
             raise serializers.ValidationError("Solo se permite rol 'admin' al crear una empresa.")
         return value
     
     def validate(self, data):
-        email = data['email'].lower()
-        if User.objects.filter(email=email).exists():
+        if UserIdentity.objects.filter(email=data['email']).exists():
             raise serializers.ValidationError("Ya existe un usuario con este correo electrónico.")
         
-        if User.objects.filter(identification_number=data['identification_number']).exists():
+        if UserIdentity.objects.filter(identification_number=data['identification_number']).exists():
             raise serializers.ValidationError("Ya existe un usuario con este número de identificación.")
             
         return data
 
        
 # update user
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(LowercaseEmailMixin, SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'identification_number', 'email', 'username', 'rol', 'company', 'is_active']
         extra_kwargs = {
-            'identification_number': {'required': False},
-            'email': {'required': False},
+            'identification_number': {'required': False, 'validators': [unique_identification]},
+            'email': {'required': False, 'validators': [unique_email]},
             'username': {'required': False},
             'rol': {'required': False},
             'company': {'required': False},
@@ -97,9 +151,20 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         instance = self.instance
         if instance and not instance.is_superuser:
-            if not attrs.get('company') and not instance.company:
+            if not attrs.get('company') and instance.company_id is None:
                 raise serializers.ValidationError("El usuario debe estar asociado a una empresa.")
         return attrs    
+    
+    def update(self, instance, validated_data):
+        # cambiar el rol a admin (o de empresa) puede chocar con el admin existente; el
+        # directorio global (en 'default') se actualiza en la misma transacción
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=instance._state.db):
+                return super().update(instance, validated_data)
+        except IntegrityError as e:
+            if is_admin_conflict(e):
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [ADMIN_EXISTS_MESSAGE]})
+            raise
 
 
 # change password user
@@ -120,7 +185,7 @@ class RequestPasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        if not User.objects.filter(email=value).exists():
+        if not UserIdentity.objects.filter(email=value).exists():
             raise serializers.ValidationError("No hay usuario con este email")
         return value
 
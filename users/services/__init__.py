@@ -0,0 +1,3 @@
+from .bulk_users import UserImporter, bulk_insert_users, read_rows
+
+__all__ = ['UserImporter', 'bulk_insert_users', 'read_rows']
@@ -0,0 +1,193 @@
+# Importación masiva de usuarios de una empresa
+#
+# En lugar de create_user() por fila (INSERT + Group.objects.get + INSERT en la m2m),
+# cada lote se valida con consultas IN, se hashea en paralelo y se inserta con
+# bulk_create en users_user, en la tabla intermedia de grupos y en el directorio
+# global de usuarios (UserIdentity, en 'default').
+
+import csv
+import json
+
+from django.contrib.auth.models import Group
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, router, transaction
+from rest_framework import serializers
+
+from commons import tenancy
+from users import passwords
+from users.models import User, UserIdentity
+from users.models.user import ROL_GRUPO_MAP, ROLES
+from users.search import user_index
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class BulkUserRowSerializer(serializers.Serializer):
+    """
+    Validación por fila sin consultas; la unicidad se valida por lote.
+    """
+    identification_number = serializers.CharField(max_length=20)
+    email = serializers.EmailField()
+    username = serializers.CharField(max_length=100)
+    rol = serializers.ChoiceField(choices=ROLES)
+    password = serializers.CharField(min_length=6, required=False, allow_blank=True, write_only=True)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value).lower()
+
+
+class RowError(ValueError):
+    """
+    Fila ilegible (p. ej. una línea JSONL mal formada): read_rows la entrega en lugar
+    de la fila y UserImporter la reporta como error de esa fila.
+    """
+
+
+def read_rows(stream, fmt):
+    """
+    Lee filas de un archivo de texto CSV (con encabezado) o JSONL sin cargarlo
+    completo en memoria.
+    """
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    yield RowError(f"JSON inválido: {e}")
+    else:
+        raise ValueError(f"Formato '{fmt}' no soportado. Use 'csv' o 'jsonl'.")
+
+
+def bulk_insert_users(users):
+    """
+    Inserta usuarios (ya con contraseña hasheada), sus grupos según el rol y sus
+    entradas del directorio global. Devuelve los usuarios con el id asignado.
+    El llamador abre la transacción en la base de los usuarios y en 'default'.
+    """
+    if not users:
+        return users
+
+    # registra también sus entradas del directorio global (UserIdentity), de donde salen los ids
+    User.objects.bulk_create(users)
+
+    groups = dict(Group.objects.filter(name__in=ROL_GRUPO_MAP.values()).values_list('name', 'id'))
+    Through = User.groups.through
+    Through.objects.bulk_create([
+        Through(user_id=user.pk, group_id=groups[ROL_GRUPO_MAP[user.rol]])
+        for user in users if ROL_GRUPO_MAP[user.rol] in groups
+    ])
+
+    user_index.index(users)
+    return users
+
+
+class UserImporter:
+    """
+    Importa usuarios a una empresa por lotes y arma un reporte de errores por fila.
+    """
+
+    def __init__(self, company, batch_size=DEFAULT_BATCH_SIZE):
+        self.company = company
+        self.batch_size = batch_size
+        self.seen_emails = set()
+        self.seen_identifications = set()
+        with tenancy.use_tenant(company.pk):
+            self.has_admin = User.objects.filter(company=company, rol='admin').exists()
+        self.created = 0
+        self.total = 0
+        self.errors = []
+
+    def run(self, rows):
+        # al shard de la empresa importada (no al del usuario que importa ni a 'default'
+        # en el comando): bulk_create no lleva el objeto para que el router lo ubique
+        with tenancy.use_tenant(self.company.pk):
+            batch = []
+            for index, row in enumerate(rows, start=1):
+                batch.append((index, row))
+                if len(batch) >= self.batch_size:
+                    self._process_batch(batch)
+                    batch = []
+            if batch:
+                self._process_batch(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            'company': self.company.pk,
+            'total': self.total,
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+    def _error(self, index, errors):
+        self.errors.append({'row': index, 'errors': errors})
+
+    def _process_batch(self, batch):
+        self.total += len(batch)
+        valid = []
+        for index, row in batch:
+            if isinstance(row, RowError):
+                self._error(index, {'non_field_errors': [str(row)]})
+                continue
+            serializer = BulkUserRowSerializer(data=row)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                self._error(index, serializer.errors)
+
+        emails = {data['email'] for _, data in valid}
+        identifications = {data['identification_number'] for _, data in valid}
+        # en el directorio global: los usuarios de otros shards también cuentan
+        taken_emails = set(UserIdentity.objects.filter(email__in=emails).values_list('email', flat=True))
+        taken_identifications = set(UserIdentity.objects.filter(
+            identification_number__in=identifications).values_list('identification_number', flat=True))
+
+        accepted = []
+        for index, data in valid:
+            errors = {}
+            if data['email'] in taken_emails or data['email'] in self.seen_emails:
+                errors['email'] = ["Ya existe un usuario con este correo electrónico."]
+            if data['identification_number'] in taken_identifications or data['identification_number'] in self.seen_identifications:
+                errors['identification_number'] = ["Este número de identificación ya está registrado."]
+            if data['rol'] == 'admin' and self.has_admin:
+                errors['rol'] = ["Ya existe un usuario administrador para esta empresa"]
+            if errors:
+                self._error(index, errors)
+                continue
+
+            self.seen_emails.add(data['email'])
+            self.seen_identifications.add(data['identification_number'])
+            if data['rol'] == 'admin':
+                self.has_admin = True
+            accepted.append((index, data))
+
+        if not accepted:
+            return
+
+        hashes = passwords.make_passwords(data.get('password') for _, data in accepted)
+        users = [
+            User(
+                identification_number=data['identification_number'],
+                email=data['email'],
+                username=data['username'],
+                rol=data['rol'],
+                company=self.company,
+                password=password_hash,
+            )
+            for (_, data), password_hash in zip(accepted, hashes)
+        ]
+
+        try:
+            with transaction.atomic(using=DEFAULT_DB_ALIAS), transaction.atomic(using=router.db_for_write(User)):
+                bulk_insert_users(users)
+        except IntegrityError:
+            # otra petición insertó los mismos datos entre la validación y el INSERT
+            for index, _ in accepted:
+                self._error(index, {'non_field_errors': ["Conflicto de unicidad al insertar el lote, reintente estas filas."]})
+            return
+
+        self.created += len(users)
@@ -0,0 +1,113 @@
+from django.contrib.auth.models import Group
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.models import User, UserIdentity
+from users.permissions import invalidate_matrix, invalidate_user
+from users.search import user_index
+from users.sync import user_feed
+
+M2M_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+# campos de User copiados en el directorio global (UserIdentity)
+IDENTITY_FIELDS = {'email', 'identification_number', 'company', 'company_id'}
+
+
+# ---------- Invalidación de la matriz de permisos ---------- #
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action in M2M_ACTIONS:
+        invalidate_matrix()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    invalidate_matrix()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in M2M_ACTIONS:
+        return
+
+    if not reverse:
+        invalidate_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_user(user_id)
+    else:
+        # clear() desde el grupo/permiso: no se conocen los usuarios afectados
+        invalidate_matrix()
+
+
+# ---------- Directorio global de usuarios ---------- #
+
+@receiver(post_save, sender=User)
+def user_identity_saved(sender, instance, created, update_fields=None, **kwargs):
+    # un correo o identificación ya usados en otro shard chocan con el índice único
+    # (IntegrityError), al crear en User.save() y al editar aquí: create_user y
+    # UserUpdateSerializer abren la transacción en ambas bases
+    if update_fields is not None and not IDENTITY_FIELDS.intersection(update_fields):
+        return
+    if created and instance.__dict__.pop('_identity_allocated', False):
+        return   # User.save() la insertó al reservar el id
+    identity = UserIdentity.from_user(instance)
+    if created:
+        identity.save(using=DEFAULT_DB_ALIAS, force_insert=True)
+    else:
+        identity.save(using=DEFAULT_DB_ALIAS)
+
+
+@receiver(post_delete, sender=User)
+def user_identity_deleted(sender, instance, **kwargs):
+    UserIdentity.objects.using(DEFAULT_DB_ALIAS).filter(pk=instance.pk).delete()
+
+
+# ---------- Índice de búsqueda ---------- #
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if user_index.needs_reindex(update_fields):
+        user_index.index([instance])
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_index.remove([instance.pk])
+
+
+# ---------- Sincronización incremental (borrados) ---------- #
+
+@receiver(post_delete, sender=User)
+def user_tombstone(sender, instance, **kwargs):
+    user_feed.tombstone(instance)
+
+
+@receiver(pre_save, sender=User)
+def user_company_loaded(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    # empresa anterior: la de from_db y, si no se leyó (instancia armada a mano, .only()),
+    # una consulta; solo cuando este save puede cambiarla. Un usuario nuevo no tiene:
+    # su id lo acaba de reservar User.save()
+    if raw or instance.pk is None or '_loaded_company_id' in instance.__dict__:
+        return
+    if instance.__dict__.get('_identity_allocated'):
+        return
+    if update_fields is not None and not {'company', 'company_id'}.intersection(update_fields):
+        return
+    instance._loaded_company_id = (sender._base_manager.using(using).filter(pk=instance.pk)
+                                   .values_list('company_id', flat=True).first())
+
+
+@receiver(post_save, sender=User)
+def user_company_changed(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # el usuario sale del feed de su empresa anterior: allí se informa como borrado
+    if raw or (update_fields is not None and not {'company', 'company_id'}.intersection(update_fields)):
+        return
+    previous = instance.__dict__.get('_loaded_company_id')
+    if not created and previous is not None and previous != instance.company_id:
+        user_feed.tombstone(instance, company_id=previous)
+    instance._loaded_company_id = instance.company_id
@@ -0,0 +1,9 @@
+from commons.utils.sync import DeltaFeed
+
+user_feed = DeltaFeed(
+    kind='user',
+    model='users.User',
+    fields=('id', 'identification_number', 'email', 'username', 'rol', 'is_active', 'company_id',
+            'date_joined', 'updated_at'),
+    tenant_field='company_id',
+)
@@ -1,3 +1,633 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from commons.serializers import ValuesSerializer
+from commons.utils.export import stream_export
+
+from companies.models import Company
+from users.authentication import PrincipalJWTAuthentication, TokenPrincipal
+from users.authentication.jwt_authentication import principal_cache
+from users.exports import user_exporter
+from users.models import User, UserIdentity
+from users.passwords import PasswordPool, PasswordPoolBusy, hashers, pool
+from users.permissions import get_user_permissions, invalidate_matrix, invalidate_user, matrix
+from users.serializers import CompanyUserSerializer, UserSerializer, UserValuesSerializer
+from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+from users.views import import_views
+
+
+def auth_header(user):
+    token = CustomTokenObtainPairSerialier.get_token(user).access_token
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+class CompanyUserListViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Empresa', nit='9001', cell='3000000000', email='empresa@test.co')
+        cls.other_company = Company.objects.create(company_name='Otra', nit='9002', cell='3000000000', email='otra@test.co')
+        clientes = Group.objects.create(name='Clientes')
+
+        cls.admin = User.objects.create(identification_number='1', email='admin@test.co', username='admin',
+                                        rol='admin', company=cls.company, password='!')
+        User.objects.bulk_create([
+            User(identification_number=f'c{i}', email=f'cliente{i}@test.co', username=f'cliente {i}',
+                 rol='cliente', company=cls.company, is_active=i % 10 != 0, password='!')
+            for i in range(60)
+        ])
+        users = User.objects.filter(rol='cliente')
+        User.groups.through.objects.bulk_create([User.groups.through(user_id=user.pk, group_id=clientes.pk) for user in users])
+        User.objects.create(identification_number='x1', email='ajeno@test.co', username='ajeno',
+                            rol='cliente', company=cls.other_company, password='!')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('company-users', kwargs={'company_id': self.company.pk})
+        self.headers = auth_header(self.admin)
+
+    def count_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'page_size': page_size}, **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        small = self.count_queries(5)
+        large = self.count_queries(50)
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)  # página + prefetch de grupos
+
+    def test_only_lists_users_of_the_company(self):
+        response = self.client.get(self.url, {'page_size': 100}, **self.headers)
+        emails = {row['email'] for row in response.data['results']}
+        self.assertEqual(len(emails), 61)
+        self.assertNotIn('ajeno@test.co', emails)
+        self.assertEqual(response.data['results'][1]['groups'], ['Clientes'])
+        # el nombre sale del tenant de la petición, sin JOIN a la empresa
+        self.assertEqual({row['company_name'] for row in response.data['results']}, {'Empresa'})
+
+    def test_filters_by_rol_and_is_active(self):
+        response = self.client.get(self.url, {'rol': 'cliente', 'is_active': 'false'}, **self.headers)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertTrue(all(row['rol'] == 'cliente' and not row['is_active'] for row in response.data['results']))
+
+    def test_fields_and_omit_shape_rows_and_narrow_the_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'fields': 'id,email,company_name,desconocido'}, **self.headers)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'email', 'company_name'})
+        self.assertEqual(response.data['results'][0]['company_name'], 'Empresa')
+        # una sola consulta de usuarios (sin prefetch de grupos) con las columnas de esos
+        # campos; el nombre de la empresa sale del tenant cacheado
+        queries = [query['sql'] for query in ctx.captured_queries if 'users_user' in query['sql']]
+        self.assertEqual(len(queries), 1)
+        select = queries[0].split(' FROM ')[0]
+        self.assertEqual(select, 'SELECT "users_user"."id", "users_user"."email", "users_user"."company_id"')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'omit': 'groups,username,identification_number'}, **self.headers)
+        self.assertEqual(set(response.data['results'][0]),
+                         {'id', 'email', 'rol', 'is_active', 'company', 'company_name'})
+        queries = [query['sql'] for query in ctx.captured_queries if 'users_user' in query['sql']]
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"users_user"."username"', queries[0])
+        self.assertNotIn('"users_user"."password"', queries[0])
+
+    def test_fields_trim_write_responses_after_full_validation(self):
+        url = reverse('update', kwargs={'id': self.admin.pk}) + '?fields=username'
+        response = self.client.patch(url, {'username': 'renombrado'}, content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'username': 'renombrado'})
+        response = self.client.patch(url, {'email': 'no-es-correo'}, content_type='application/json', **self.headers)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+    def test_admin_of_another_company_is_forbidden(self):
+        url = reverse('company-users', kwargs={'company_id': self.other_company.pk})
+        response = self.client.get(url, **self.headers)
+        self.assertEqual(response.status_code, 403)
+
+
+class UserAuditSerializer(serializers.ModelSerializer):
+    company_name = serializers.CharField(source='company.company_name', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ['id', 'email', 'company', 'company_name', 'is_active', 'date_joined', 'updated_at']
+
+
+class UserAuditValuesSerializer(ValuesSerializer):
+    serializer_class = UserAuditSerializer
+
+
+class UserValuesSerializerParityTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Panadería Ñandú', nit='9001', cell='3000000000', email='empresa@test.co')
+        cls.admin = User.objects.create(identification_number='1', email='admin@test.co', username='José Pérez',
+                                        rol='admin', company=cls.company, password='!')
+        User.objects.create(identification_number=None, email='staff@test.co', username='staff',
+                            rol='admin', company=None, is_staff=True, password='!')
+        User.objects.bulk_create([
+            User(identification_number=f'c{i}', email=f'cliente{i}@test.co', username=f'cliente {i}',
+                 rol='cliente', company=cls.company, is_active=i % 2 == 0, password='!')
+            for i in range(20)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def as_json(self, data):
+        return json.loads(json.dumps(data, default=str))
+
+    def test_queryset_output_matches_model_serializer(self):
+        users = User.objects.order_by('id')
+        expected = UserSerializer(users, many=True).data
+        self.assertEqual(UserValuesSerializer.serialize_queryset(users), self.as_json(expected))
+
+    def test_converted_and_related_fields_match_model_serializer(self):
+        users = User.objects.select_related('company').order_by('id')
+        expected = UserAuditSerializer(users, many=True).data
+        self.assertEqual(UserAuditValuesSerializer.serialize_queryset(users), self.as_json(expected))
+
+    def test_object_output_matches_model_serializer(self):
+        principal = TokenPrincipal.from_claims(self.admin.pk, CustomTokenObtainPairSerialier.get_token(self.admin))
+        self.assertEqual(UserValuesSerializer.serialize_object(principal), UserSerializer(self.admin).data)
+        self.assertEqual(UserAuditValuesSerializer.serialize_object(self.admin), self.as_json(UserAuditSerializer(self.admin).data))
+
+    def test_profile_endpoint_matches_model_serializer(self):
+        headers = auth_header(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('profile'), **headers)
+        self.assertEqual(response.json(), UserSerializer(self.admin).data)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        response = self.client.get(reverse('profile'), {'fields': 'id,rol'}, **headers)
+        self.assertEqual(response.json(), {'id': self.admin.pk, 'rol': 'admin'})
+
+    def test_many_to_many_fields_are_rejected(self):
+        class CompanyUserValuesSerializer(ValuesSerializer):
+            serializer_class = CompanyUserSerializer
+
+        with self.assertRaises(ImproperlyConfigured):
+            CompanyUserValuesSerializer.get_plan()
+
+
+class OneAdminPerCompanyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Empresa', nit='9001', cell='3000000000', email='empresa@test.co')
+        cls.admin = User.objects.create(identification_number='1', email='admin@test.co', username='admin',
+                                        rol='admin', company=cls.company, password='!')
+
+    def setUp(self):
+        cache.clear()
+
+    def register(self, **data):
+        payload = {'identification_number': '2', 'email': 'otro@test.co', 'username': 'otro',
+                   'rol': 'admin', 'company': self.company.pk, 'password': 'secreta-123', **data}
+        return self.client.post(reverse('register'), payload, content_type='application/json')
+
+    def test_second_admin_is_rejected_with_validation_error(self):
+        response = self.register()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'non_field_errors': ['Ya existe un usuario administrador para esta empresa']})
+        self.assertFalse(User.objects.filter(email='otro@test.co').exists())
+
+    def test_other_roles_are_not_limited(self):
+        self.assertEqual(self.register(rol='cajero').status_code, 201)
+        self.assertEqual(self.register(rol='cajero', identification_number='3', email='otro3@test.co').status_code, 201)
+
+    def test_promoting_a_second_admin_is_rejected(self):
+        cajero = User.objects.create(identification_number='3', email='cajero@test.co', username='cajero',
+                                     rol='cajero', company=self.company, password='!')
+        staff = User.objects.create(identification_number='4', email='staff@test.co', username='staff',
+                                    rol='admin', is_staff=True, password='!')
+        response = self.client.patch(reverse('update', kwargs={'id': cajero.pk}), {'rol': 'admin'},
+                                     content_type='application/json', **auth_header(staff))
+        self.assertEqual(response.status_code, 400)
+        cajero.refresh_from_db()
+        self.assertEqual(cajero.rol, 'cajero')
+
+
+class ConcurrentAdminRegistrationTests(TransactionTestCase):
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest("SQLite en memoria (caché compartida) bloquea las escrituras concurrentes en lugar de esperar")
+        cache.clear()
+        self.company = Company.objects.create(company_name='Empresa', nit='9001', cell='3000000000', email='empresa@test.co')
+
+    def test_parallel_admin_registrations_create_a_single_admin(self):
+        workers = 6
+        barrier = threading.Barrier(workers)
+        responses = []
+
+        def register(index):
+            try:
+                barrier.wait()
+                response = Client().post(reverse('register'), {
+                    'identification_number': f'10{index}', 'email': f'admin{index}@test.co', 'username': f'admin {index}',
+                    'rol': 'admin', 'company': self.company.pk, 'password': 'secreta-123',
+                }, content_type='application/json')
+                responses.append(response)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register, args=(index,)) for index in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        statuses = sorted(response.status_code for response in responses)
+        self.assertEqual(statuses, [201] + [400] * (workers - 1))
+        self.assertEqual(User.objects.filter(company=self.company, rol='admin').count(), 1)
+
+
+class AsyncAuthViewsTests(TestCase):
+    """
+    Las vistas async responden igual que sus equivalentes sync.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='Administradores')
+        company = Company.objects.create(company_name='Empresa', nit='9001', cell='3000000000', email='empresa@test.co')
+        cls.user = User.objects.create_user(identification_number='1', email='admin@test.co', username='admin',
+                                            rol='admin', company=company, password='secreta-123')
+
+    def setUp(self):
+        cache.clear()
+
+    async def post(self, name, data, headers=None):
+        return await self.async_client.post(reverse(name), data, content_type='application/json', headers=headers)
+
+    async def test_login_refresh_profile_logout(self):
+        response = await self.post('async-login', {'email': 'ADMIN@test.co', 'password': 'secreta-123'})
+        self.assertEqual(response.status_code, 200)
+        tokens = response.json()
+        headers = {'Authorization': f"Bearer {tokens['access']}"}
+
+        profile = await self.async_client.get(reverse('async-profile'), headers=headers)
+        self.assertEqual(profile.status_code, 200)
+        self.assertEqual(profile.json(), (await self.async_client.get(reverse('profile'), headers=headers)).json())
+
+        response = await self.post('async-token_refresh', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+        self.assertEqual((await self.post('async-logout', {'refresh': tokens['refresh']}, headers)).status_code, 200)
+        for name in ('async-token_refresh', 'token_refresh'):
+            response = await self.post(name, {'refresh': tokens['refresh']})
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()['code'], 'token_not_valid')
+
+    async def test_errors_match_sync_views(self):
+        for data in ({'email': 'admin@test.co', 'password': 'otra'}, {'email': 'admin@test.co'}):
+            sync, native = await self.post('login', data), await self.post('async-login', data)
+            self.assertEqual((native.status_code, native.json()), (sync.status_code, sync.json()))
+
+        sync, native = await self.async_client.get(reverse('profile')), await self.async_client.get(reverse('async-profile'))
+        self.assertEqual((native.status_code, native.json()), (sync.status_code, sync.json()))
+        self.assertEqual(native['WWW-Authenticate'], sync['WWW-Authenticate'])
+
+
+class UserImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for name in ('Administradores', 'Cajeros', 'Clientes'):
+            Group.objects.create(name=name)
+        cls.company = Company.objects.create(company_name='Empresa', nit='9001', cell='3000000000', email='empresa@test.co')
+        cls.admin = User.objects.create_user(identification_number='1', email='admin@test.co', username='admin',
+                                             rol='admin', company=cls.company, password='secreta-123')
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('users-import', kwargs={'company_id': self.company.pk})
+
+    def upload(self, name, content):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(name, content.encode())}, **auth_header(self.admin))
+
+    def test_csv_reports_duplicates_and_invalid_rows(self):
+        response = self.upload('usuarios.csv', (
+            "identification_number,email,username,rol,password\n"
+            "10,Cajero@Test.co,cajero,cajero,secreta-123\n"
+            "11,cajero@test.co,repetido,cajero,\n"          # correo repetido en el archivo
+            "1,otro@test.co,otro,cliente,\n"                 # identificación ya registrada
+            "12,no-es-correo,malo,cliente,\n"
+            "13,jefe@test.co,jefe,admin,\n"                  # la empresa ya tiene admin
+            "14,cliente@test.co,cliente,cliente,\n"
+        ))
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report['total'], report['created'], report['failed']), (6, 2, 4))
+        self.assertEqual({error['row']: sorted(error['errors']) for error in report['errors']},
+                         {2: ['email'], 3: ['identification_number'], 4: ['email'], 5: ['rol']})
+
+        cajero = User.objects.get(email='cajero@test.co')
+        self.assertTrue(cajero.check_password('secreta-123'))
+        self.assertEqual(list(cajero.groups.values_list('name', flat=True)), ['Cajeros'])
+        self.assertFalse(User.objects.get(email='cliente@test.co').has_usable_password())
+        self.assertEqual(UserIdentity.objects.filter(company_id=self.company.pk).count(), 3)
+
+    def test_malformed_jsonl_line_is_a_row_error(self):
+        response = self.upload('usuarios.jsonl', '\n'.join([
+            json.dumps({'identification_number': '20', 'email': 'a@test.co', 'username': 'a', 'rol': 'cliente'}),
+            '{"identification_number": "21", "email": ',
+            '',
+            '[1, 2]',
+            json.dumps({'identification_number': '22', 'email': 'b@test.co', 'username': 'b', 'rol': 'cliente'}),
+        ]))
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report['total'], report['created']), (4, 2))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3])
+        self.assertIn('JSON inválido', report['errors'][0]['errors']['non_field_errors'][0])
+
+    @mock.patch.object(import_views, 'MAX_ROWS', 2)
+    def test_files_over_the_row_limit_are_rejected_before_importing(self):
+        rows = ''.join(f"{i},u{i}@test.co,u{i},cliente\n" for i in range(30, 33))
+        response = self.upload('usuarios.csv', "identification_number,email,username,rol\n" + rows)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('import_users', response.json()['file'])
+        self.assertFalse(User.objects.filter(rol='cliente').exists())
+
+        response = self.upload('usuarios.csv', "identification_number,email,username,rol\n" + rows.split('\n', 1)[1])
+        self.assertEqual(response.json()['created'], 2)
+
+
+class TokenPrincipalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(company_name='Empresa', nit='9001', cell='3000000000', email='empresa@test.co')
+        cls.user = User.objects.create(identification_number='1', email='cajero@test.co', username='cajero',
+                                       rol='cajero', company=company, password='!')
+
+    def setUp(self):
+        cache.clear()
+        principal_cache.clear()
+
+    def authenticate(self, token):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return PrincipalJWTAuthentication().authenticate(request)
+
+    def refresh(self, name='token_refresh'):
+        refresh = CustomTokenObtainPairSerialier.get_token(self.user)
+        return self.client.post(reverse(name), {'refresh': str(refresh)}, content_type='application/json')
+
+    def test_principal_comes_from_signed_claims_without_queries(self):
+        token = CustomTokenObtainPairSerialier.get_token(self.user).access_token
+        self.assertNotIn('perms', token)
+        with self.assertNumQueries(0):
+            principal, _ = self.authenticate(token)
+        self.assertIsInstance(principal, TokenPrincipal)
+        self.assertEqual((principal.pk, principal.email, principal.rol, principal.company_id),
+                         (self.user.pk, 'cajero@test.co', 'cajero', self.user.company_id))
+        self.assertTrue(principal.is_active and principal.is_authenticated)
+        # lo que no viaja en el token se carga una sola vez del ORM
+        with self.assertNumQueries(1):
+            self.assertEqual(principal.date_joined, self.user.date_joined)
+            self.assertTrue(principal.has_usable_password() is False)
+
+    def test_validated_tokens_are_cached(self):
+        token = str(CustomTokenObtainPairSerialier.get_token(self.user).access_token)
+        with mock.patch.object(PrincipalJWTAuthentication, 'get_validated_token',
+                               autospec=True, side_effect=PrincipalJWTAuthentication.get_validated_token) as validate:
+            first, _ = self.authenticate(token)
+            second, _ = self.authenticate(token)
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(first, second)
+
+    def test_legacy_tokens_without_principal_claims_use_the_orm(self):
+        token = RefreshToken.for_user(self.user).access_token
+        with self.assertNumQueries(1):
+            user, _ = self.authenticate(token)
+        self.assertIsInstance(user, User)
+        self.assertEqual(len(principal_cache), 0)
+
+    def test_refresh_signs_current_claims(self):
+        refresh = CustomTokenObtainPairSerialier.get_token(self.user)
+        User.objects.filter(pk=self.user.pk).update(rol='cliente')
+        for name in ('token_refresh', 'async-token_refresh'):
+            response = self.client.post(reverse(name), {'refresh': str(refresh)}, content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(AccessToken(response.json()['access'])['rol'], 'cliente')
+
+    def test_refresh_rejects_inactive_and_deleted_users(self):
+        for name in ('token_refresh', 'async-token_refresh'):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            response = self.refresh(name)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()['code'], 'no_active_account')
+
+        refresh = CustomTokenObtainPairSerialier.get_token(self.user)
+        User.objects.filter(pk=self.user.pk).delete()
+        for name in ('token_refresh', 'async-token_refresh'):
+            response = self.client.post(reverse(name), {'refresh': str(refresh)}, content_type='application/json')
+            self.assertEqual(response.status_code, 401)
+
+
+class PermissionMatrixInvalidationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        company = Company.objects.create(company_name='Empresa', nit='9002', cell='3000000000', email='e2@test.co')
+        cls.user = User.objects.create(identification_number='2', email='perm@test.co', username='perm',
+                                       rol='cajero', company=company, password='!')
+        cls.group = Group.objects.create(name='Auditores')
+        cls.view_user = Permission.objects.get(content_type__app_label='users', codename='view_user')
+
+    def setUp(self):
+        cache.clear()
+        invalidate_matrix()
+
+    def test_group_permission_changes_invalidate_the_matrix(self):
+        self.user.groups.add(self.group)
+        self.assertNotIn('users.view_user', get_user_permissions(self.user.pk))
+        self.group.permissions.add(self.view_user)
+        self.assertIn('users.view_user', get_user_permissions(self.user.pk))
+        self.group.permissions.clear()
+        self.assertNotIn('users.view_user', get_user_permissions(self.user.pk))
+
+    def test_user_groups_and_direct_permissions_invalidate_the_user(self):
+        self.group.permissions.add(self.view_user)
+        self.assertNotIn('users.view_user', get_user_permissions(self.user.pk))
+        self.user.groups.add(self.group)
+        self.assertIn('users.view_user', get_user_permissions(self.user.pk))
+        self.user.groups.remove(self.group)
+        self.assertNotIn('users.view_user', get_user_permissions(self.user.pk))
+        self.user.user_permissions.add(self.view_user)
+        self.assertIn('users.view_user', get_user_permissions(self.user.pk))
+
+    def test_reverse_changes_invalidate_the_affected_users(self):
+        self.group.permissions.add(self.view_user)
+        get_user_permissions(self.user.pk)
+        self.group.custom_user_set.add(self.user)
+        self.assertIn('users.view_user', get_user_permissions(self.user.pk))
+        self.group.custom_user_set.clear()
+        self.assertNotIn('users.view_user', get_user_permissions(self.user.pk))
+
+    def test_invalidation_during_compute_does_not_keep_the_stale_set(self):
+        real_get_matrix = matrix.get_matrix
+
+        def concurrent_change():
+            # otra petición cambia los permisos mientras este cálculo sigue en curso
+            result = real_get_matrix()
+            invalidate_user(self.user.pk)
+            return result
+
+        with mock.patch.object(matrix, 'get_matrix', side_effect=concurrent_change):
+            get_user_permissions(self.user.pk)
+        # ni la copia local ni la compartida vigente guardan el resultado calculado
+        with self.assertNumQueries(2):
+            get_user_permissions(self.user.pk)
+        with self.assertNumQueries(0):
+            get_user_permissions(self.user.pk)
+
+
+@override_settings(PASSWORD_HASHER_TIERS={'low': 1000, 'standard': 2000})
+class PasswordPoolTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Group.objects.create(name='Cajeros')
+        company = Company.objects.create(company_name='Empresa', nit='9003', cell='3000000000', email='e3@test.co')
+        cls.user = User.objects.create_user(identification_number='3', email='pool@test.co', username='pool',
+                                            rol='cajero', company=company, password='secreta-123')
+
+    def setUp(self):
+        cache.clear()
+
+    def blocked_pool(self, max_queue=0, timeout=None):
+        # un pool de un hilo ocupado hasta que termine la prueba
+        release = threading.Event()
+        blocked = PasswordPool(max_workers=1, max_queue=max_queue, timeout=timeout)
+        blocked.submit(release.wait)
+        self.addCleanup(blocked.shutdown)
+        self.addCleanup(release.set)
+        return blocked
+
+    def test_busy_pool_responds_503_with_retry_after(self):
+        data = {'email': 'pool@test.co', 'password': 'secreta-123'}
+        with mock.patch.object(pool, '_pool', self.blocked_pool()):
+            for name in ('login', 'async-login'):
+                response = self.client.post(reverse(name), data, content_type='application/json')
+                self.assertEqual(response.status_code, 503)
+                self.assertEqual(response['Retry-After'], '2')
+                self.assertEqual(response.json()['detail'], PasswordPoolBusy.default_detail)
+
+    def test_hash_timeout_raises_busy(self):
+        blocked = self.blocked_pool(max_queue=1, timeout=0.01)
+        with self.assertRaises(PasswordPoolBusy):
+            blocked.run(len, 'x')
+
+    def test_tier_change_rehashes_on_login(self):
+        self.assertIn('$2000$', self.user.password)
+        with override_settings(PASSWORD_HASHER_TIER='low'):
+            response = self.client.post(reverse('login'), {'email': 'pool@test.co', 'password': 'secreta-123'},
+                                        content_type='application/json')
+            self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIn('$1000$', self.user.password)
+        self.assertTrue(self.user.check_password('secreta-123'))
+
+    def test_unknown_tier_fails_at_startup(self):
+        with override_settings(PASSWORD_HASHER_TIER='ultra'), self.assertRaises(ImproperlyConfigured):
+            hashers.check_tier()
+
+
+class UserExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(company_name='Exporta', nit='9004', cell='3000000000', email='x@test.co')
+        other = Company.objects.create(company_name='Ajena', nit='9005', cell='3000000000', email='y@test.co')
+        cls.admin = User.objects.create(identification_number='1', email='admin@exporta.co', username='admin',
+                                        rol='admin', company=cls.company, password='!')
+        User.objects.bulk_create([
+            User(identification_number=f'e{i}', email=f'cliente{i}@exporta.co', username=f'Cliente ñ {i}',
+                 rol='cliente', company=cls.company, password='!')
+            for i in range(4)
+        ])
+        User.objects.create(identification_number='a1', email='ajeno@ajena.co', username='ajeno',
+                            rol='cliente', company=other, password='!')
+        cls.staff = User.objects.create(identification_number='s', email='staff@test.co', username='staff',
+                                        rol='admin', is_staff=True, password='!')
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, user, **params):
+        response = self.client.get(reverse('users-export'), params, **auth_header(user))
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_is_scoped_to_the_company(self):
+        response, body = self.export(self.admin, fields='id,email,username,date_joined')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.ndjson"')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        expected = User.objects.filter(company=self.company).order_by('pk')
+        self.assertEqual([row['email'] for row in rows], [user.email for user in expected])
+        self.assertEqual(set(rows[1]), {'id', 'email', 'username', 'date_joined'})
+        self.assertEqual(rows[1]['username'], 'Cliente ñ 0')
+        self.assertEqual(rows[0]['date_joined'], timezone.localtime(self.admin.date_joined).isoformat())
+
+    def test_csv_and_gzip(self):
+        response, body = self.export(self.admin, output='csv', fields='id,email')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], ['id', 'email'])
+        self.assertEqual(rows[1], [str(self.admin.pk), 'admin@exporta.co'])
+        self.assertEqual(len(rows), 6)
+
+        response, compressed = self.export(self.admin, output='csv', fields='id,email', gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="users.csv.gz"')
+        self.assertEqual(gzip.decompress(compressed), body)
+
+    def test_staff_exports_everything_or_one_company(self):
+        _, body = self.export(self.staff, fields='email')
+        self.assertEqual(len(body.splitlines()), User.objects.count())
+        _, body = self.export(self.staff, fields='email', company=self.company.pk)
+        self.assertEqual(len(body.splitlines()), 5)
+        # ?company= no cambia la empresa de un admin
+        _, body = self.export(self.admin, fields='email', company=self.staff.pk + 100)
+        self.assertEqual(len(body.splitlines()), 5)
+
+    def test_rows_are_read_in_keyset_batches(self):
+        queryset = user_exporter.queryset(company_id=self.company.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            body = b''.join(stream_export(user_exporter, queryset, ('id',), chunk_size=2))
+        self.assertEqual(len(body.splitlines()), 5)
+        self.assertEqual(len(ctx.captured_queries), 3)   # 2 + 2 + 1
+
+    def test_invalid_parameters(self):
+        url, headers = reverse('users-export'), auth_header(self.staff)
+        for params, key in (({'output': 'xml'}, 'output'), ({'fields': 'id,password'}, 'fields'),
+                            ({'company': 'x'}, 'company')):
+            response = self.client.get(url, params, **headers)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(key, response.json())
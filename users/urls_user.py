@@ -1,23 +1,45 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views.users_views import (RegisterView, ProfileView, LogoutView, UserUpdateView,
+from rest_framework_simplejwt.views import TokenObtainPairView
+from .views.users_views import (RegisterView, ProfileView, LogoutView, UserUpdateView, CompanyUserListView, UserSearchView,
     ChangePasswordView,
     RequestPasswordResetView,
     PasswordTokenCheckView,
     SetNewPasswordView)
-from users.views.customTokenObtainPairView import CustomTokenObtainPairView
+from users.views.customTokenObtainPairView import CustomTokenObtainPairView, TenantTokenRefreshView
+from users.views.export_views import UserExportView
+from users.views.import_views import UserImportView
+from users.views.sync_views import UserDeltaSyncView
+from users.views.async_views import AsyncLoginView, AsyncLogoutView, AsyncProfileView, AsyncTokenRefreshView
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', CustomTokenObtainPairView.as_view(), name='login'), # retorna access y refresh
-    path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('auth/refresh/', TenantTokenRefreshView.as_view(), name='token_refresh'),
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/profile/', ProfileView.as_view(), name='profile'),
     path('auth/<int:id>/update/', UserUpdateView.as_view(), name='update'),
     path('auth/change-password/', ChangePasswordView.as_view(), name='change-password'),
+
+    # mismas rutas en vistas async nativas (para servir con ASGI sin hilos por petición)
+    path('auth/async/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('auth/async/refresh/', AsyncTokenRefreshView.as_view(), name='async-token_refresh'),
+    path('auth/async/logout/', AsyncLogoutView.as_view(), name='async-logout'),
+    path('auth/async/profile/', AsyncProfileView.as_view(), name='async-profile'),
     
     # recovery password
     path('auth/request-reset-password/', RequestPasswordResetView.as_view(), name='request-reset-password'),
     path('auth/password-reset/<uidb64>/<token>/', PasswordTokenCheckView.as_view(), name='password-reset-confirm'),
     path('auth/set-new-password/', SetNewPasswordView.as_view(), name='set-new-password'),
+    
+    # búsqueda de usuarios (typeahead)
+    path('users/search/', UserSearchView.as_view(), name='users-search'),
+    # exportación en streaming (NDJSON/CSV)
+    path('users/export/', UserExportView.as_view(), name='users-export'),
+    # sincronización incremental (?updated_since=<cursor>)
+    path('users/changes/', UserDeltaSyncView.as_view(), name='users-changes'),
+    
+    # usuarios de una empresa
+    path('companies/<int:company_id>/users/', CompanyUserListView.as_view(), name='company-users'),
+    # importación masiva de usuarios de una empresa
+    path('companies/<int:company_id>/users/import/', UserImportView.as_view(), name='users-import'),
 ]
\ No newline at end of file
@@ -0,0 +1,100 @@
+# Login, refresh, perfil y logout como vistas async nativas (commons.async_views)
+#
+# Mismos datos de entrada, respuestas y errores que CustomTokenObtainPairView,
+# TenantTokenRefreshView, ProfileView y LogoutView, pero sin hilos bajo ASGI: ORM async
+# (aget, aexists, acreate...), JWT con AsyncPrincipalJWTAuthentication y el hash de
+# contraseñas esperado en el pool de users.passwords. Las rutas sync siguen disponibles.
+
+from django.contrib.auth import aauthenticate
+from django.utils import timezone
+from rest_framework import exceptions, status
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from commons import tenancy
+from commons.async_views import AsyncAPIView
+from commons.throttling import ANON_ENDPOINT_THROTTLES
+from users.authentication import AsyncPrincipalJWTAuthentication, add_principal_claims
+from users.authentication.tokens import AsyncRefreshToken
+from users.serializers import UserValuesSerializer
+from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier, TenantTokenRefreshSerializer
+
+
+class AsyncLoginView(AsyncAPIView):
+    throttle_classes = ANON_ENDPOINT_THROTTLES
+    throttle_scope = 'login'
+
+    async def post(self, request):
+        # solo la validación de campos del serializer: su validate() es síncrono
+        serializer = CustomTokenObtainPairSerialier()
+        attrs = serializer.to_internal_value(request.data)
+
+        user = await aauthenticate(request, email=attrs['email'].lower(), password=attrs['password'])
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise exceptions.AuthenticationFailed(serializer.error_messages['no_active_account'], 'no_active_account')
+
+        refresh = await AsyncRefreshToken.afor_user(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            user.last_login = timezone.now()
+            await user.asave(update_fields=['last_login'])
+        return self.respond({'refresh': str(refresh), 'access': str(refresh.access_token)})
+
+
+class AsyncTokenRefreshView(AsyncAPIView):
+
+    async def post(self, request):
+        serializer = TenantTokenRefreshSerializer()
+        attrs = serializer.to_internal_value(request.data)
+        try:
+            refresh = AsyncRefreshToken(attrs['refresh'])
+            # petición anónima: la lista negra está en el shard de la empresa del claim
+            with tenancy.use_tenant(refresh.get('company_id')):
+                await refresh.acheck_blacklist()
+                user = await refresh.auser()
+                if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                    # la de simplejwt, como TokenRefreshSerializer: incluye 'code' en la respuesta
+                    raise AuthenticationFailed(serializer.error_messages['no_active_account'], 'no_active_account')
+                # claims actuales del usuario, no los del refresh token
+                add_principal_claims(refresh, user)
+                data = {'access': str(refresh.access_token)}
+
+                if api_settings.ROTATE_REFRESH_TOKENS:
+                    if api_settings.BLACKLIST_AFTER_ROTATION:
+                        await refresh.ablacklist()
+                    refresh.set_jti()
+                    refresh.set_exp()
+                    refresh.set_iat()
+                    await refresh.aoutstand(user)
+                    data['refresh'] = str(refresh)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        return self.respond(data)
+
+
+class AsyncProfileView(AsyncAPIView):
+    authentication_classes = (AsyncPrincipalJWTAuthentication,)
+    require_authentication = True
+
+    async def get(self, request):
+        # el principal del JWT ya trae los campos: sin consulta
+        plan = UserValuesSerializer.for_request(request)
+        return self.respond(plan.serialize_object(request.user))
+
+
+class AsyncLogoutView(AsyncAPIView):
+    authentication_classes = (AsyncPrincipalJWTAuthentication,)
+    require_authentication = True
+
+    async def post(self, request):
+        try:
+            refresh_token = request.data.get("refresh")
+            if not refresh_token:
+                return self.respond({"error": "Token de actualización requerido."}, status=status.HTTP_400_BAD_REQUEST)
+
+            token = AsyncRefreshToken(refresh_token)
+            await token.acheck_blacklist()
+            await token.ablacklist()
+
+            return self.respond({"detail": "Sesión cerrada correctamente"}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return self.respond({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
@@ -1,5 +1,12 @@
-from rest_framework_simplejwt.views import TokenObtainPairView
-from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from commons.throttling import ANON_ENDPOINT_THROTTLES
+from users.serializers.customTokenObtainPairSerializer import CustomTokenObtainPairSerialier, TenantTokenRefreshSerializer
 
 class CustomTokenObtainPairView(TokenObtainPairView):
-    serializer_class = CustomTokenObtainPairSerialier
\ No newline at end of file
+    serializer_class = CustomTokenObtainPairSerialier
+    throttle_classes = ANON_ENDPOINT_THROTTLES
+    throttle_scope = 'login'
+
+
+class TenantTokenRefreshView(TokenRefreshView):
+    serializer_class = TenantTokenRefreshSerializer
@@ -0,0 +1,8 @@
+from commons.views import ExportView
+from users.exports import user_exporter
+
+
+# exportación de usuarios (NDJSON o CSV), acotada a la empresa del usuario
+class UserExportView(ExportView):
+    exporter = user_exporter
+    filename = 'users'
@@ -0,0 +1,52 @@
+import csv
+import io
+import itertools
+import os
+
+from django.conf import settings
+
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from commons.mixins.permissions import IsCompanyAdminOrStaff
+from commons.mixins.views_mixins import TenantFromURLMixin
+from companies.models import Company
+from users.services import UserImporter, read_rows
+
+
+# filas por archivo: cada contraseña se hashea dentro de la petición
+MAX_ROWS = getattr(settings, 'BULK_IMPORT', {}).get('MAX_ROWS', 200)
+
+
+# importación masiva de usuarios (CSV o JSONL) a una empresa; hasta MAX_ROWS filas,
+# los archivos más grandes se importan con `manage.py import_users`
+class UserImportView(TenantFromURLMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated, IsCompanyAdminOrStaff]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, company_id):
+        company = get_object_or_404(Company, pk=company_id)
+
+        uploaded = request.FILES.get('file')
+        if not uploaded:
+            return Response({"file": "Debe adjuntar un archivo CSV o JSONL."}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get('format') or os.path.splitext(uploaded.name)[1].lstrip('.').lower()
+        if fmt not in ('csv', 'jsonl'):
+            return Response({"format": "Formato no soportado. Use 'csv' o 'jsonl'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        stream = io.TextIOWrapper(uploaded.file, encoding='utf-8-sig', newline='')
+        try:
+            # se cuentan antes de importar para no dejar el archivo a medias
+            if sum(1 for _ in itertools.islice(read_rows(stream, fmt), MAX_ROWS + 1)) > MAX_ROWS:
+                return Response({"file": f"Máximo {MAX_ROWS} filas por archivo; para archivos más grandes use "
+                                         f"el comando import_users."}, status=status.HTTP_400_BAD_REQUEST)
+            stream.seek(0)
+            report = UserImporter(company).run(read_rows(stream, fmt))
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            return Response({"file": f"No se pudo leer el archivo: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_200_OK)
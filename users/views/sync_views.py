@@ -0,0 +1,7 @@
+from commons.views import DeltaSyncView
+from users.sync import user_feed
+
+
+# usuarios modificados/eliminados desde el último cursor, acotados a la empresa del usuario
+class UserDeltaSyncView(DeltaSyncView):
+    feed = user_feed
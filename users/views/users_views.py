@@ -1,6 +1,5 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
 from django.conf import settings
 
 from django.utils.encoding import smart_str, force_str, smart_bytes, DjangoUnicodeDecodeError
@@ -14,7 +13,13 @@ from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from users.serializers import (UserRegisterSerializer, UserSerializer, UserUpdateSerializer,
+from commons import outbox
+from commons.mixins.permissions import IsCompanyAdminOrStaff
+from commons.mixins.views_mixins import SparseFieldsetQuerysetMixin, TenantFromURLMixin
+from commons.pagination import KeysetCursorPagination
+from commons.throttling import ANON_ENDPOINT_THROTTLES
+from users.search import user_index
+from users.serializers import (UserRegisterSerializer, UserSerializer, UserValuesSerializer, UserUpdateSerializer, CompanyUserSerializer, UserSearchSerializer,
                                ChangePasswordSerializer, RequestPasswordResetSerializer, SetNewPasswordSerializer,)
 
 User = get_user_model()
@@ -24,6 +29,8 @@ class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegisterSerializer
     permission_classes = [permissions.AllowAny]    
+    throttle_classes = ANON_ENDPOINT_THROTTLES
+    throttle_scope = 'register'
   
 # get profile    
 class ProfileView(generics.RetrieveAPIView):
@@ -32,6 +39,11 @@ class ProfileView(generics.RetrieveAPIView):
     
     def get_object(self):
         return self.request.user
+    
+    def retrieve(self, request, *args, **kwargs):
+        # el principal del JWT ya trae los campos: sin consulta ni instancia del ORM
+        plan = UserValuesSerializer.for_request(request)
+        return Response(plan.serialize_object(self.get_object()))
 
 #close session      
 class LogoutView(APIView):
@@ -51,6 +63,53 @@ class LogoutView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+# list users of a company
+class CompanyUserListView(TenantFromURLMixin, SparseFieldsetQuerysetMixin, generics.ListAPIView):
+    serializer_class = CompanyUserSerializer
+    permission_classes = [permissions.IsAuthenticated, IsCompanyAdminOrStaff]
+    pagination_class = KeysetCursorPagination   # keyset sobre (company_id, id)
+    # groups en una consulta fija por página, sin N+1; company_name sale del tenant
+    # de la petición (CompanyNameField), sin JOIN a la empresa
+    queryset = User.objects.prefetch_related('groups')
+    
+    def get_queryset(self):
+        # TenantFromURLMixin fijó como tenant la empresa de la URL
+        queryset = super().get_queryset().for_tenant()
+        
+        params = self.request.query_params
+        if params.get('rol'):
+            queryset = queryset.filter(rol=params['rol'])
+        if params.get('is_active') in ('true', 'false'):
+            queryset = queryset.filter(is_active=params['is_active'] == 'true')
+        return queryset
+
+
+# search users (typeahead)
+class UserSearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 50
+    
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+        
+        # solo el staff busca en todas las empresas (o en la que indique ?company=)
+        if request.user.is_staff:
+            company_id = request.query_params.get('company') or None
+            if company_id is not None and not company_id.isdigit():
+                return Response({"company": "Debe ser un id numérico."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            company_id = request.user.company_id
+            if company_id is None:
+                return Response([], status=status.HTTP_200_OK)
+        
+        users = user_index.search_queryset(query, company_id=company_id, limit=limit)
+        return Response(UserSearchSerializer(users, many=True, context={'request': request}).data, status=status.HTTP_200_OK)
+
+
 # update user
 class UserUpdateView(generics.UpdateAPIView):
     queryset = User.objects.all()
@@ -91,19 +150,22 @@ class ChangePasswordView(generics.UpdateAPIView):
 class RequestPasswordResetView(APIView):
     permission_classes = [AllowAny]  # si estás manejando sin autenticación
     serializer_class = RequestPasswordResetSerializer
+    throttle_classes = ANON_ENDPOINT_THROTTLES
+    throttle_scope = 'password_reset'
 
     def post(self, request):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         email = serializer.validated_data['email']
-        user = get_user_model().objects.get(email=email)
+        user = User.objects.located(email=email).get(email=email)
 
         uidb64 = urlsafe_base64_encode(smart_bytes(user.id))
         token = PasswordResetTokenGenerator().make_token(user)
         reset_url = f"{settings.FRONTEND_URL}/password-reset/{uidb64}/{token}"
 
-        send_mail(
+        # se encola: el comando send_outbox lo entrega por SMTP fuera de la petición
+        outbox.enqueue(
             subject="Restablecer contraseña de Magcontrol:",
             message=f"Da clic aquí para restablecer tu contraseña: {reset_url}",
             from_email=settings.DEFAULT_FROM_EMAIL,
@@ -114,10 +176,12 @@ class RequestPasswordResetView(APIView):
 
 
 class PasswordTokenCheckView(generics.GenericAPIView):
+    permission_classes = [AllowAny]  # sin modelo: los permisos por modelo no aplican
+
     def get(self, request, uidb64, token):
         try:
             user_id = smart_str(urlsafe_base64_decode(uidb64))
-            user = User.objects.get(id=user_id)
+            user = User.objects.located(pk=user_id).get(id=user_id)
 
             if not PasswordResetTokenGenerator().check_token(user, token):
                 return Response({'error': 'Token inválido o expirado'}, status=status.HTTP_400_BAD_REQUEST)
@@ -131,6 +195,8 @@ class PasswordTokenCheckView(generics.GenericAPIView):
 class SetNewPasswordView(APIView):
     serializer_class = SetNewPasswordSerializer
     permission_classes = [AllowAny]  # si estás manejando sin autenticación
+    throttle_classes = ANON_ENDPOINT_THROTTLES
+    throttle_scope = 'set_new_password'
 
     def patch(self, request):
         serializer = SetNewPasswordSerializer(data=request.data)
@@ -142,7 +208,7 @@ class SetNewPasswordView(APIView):
 
         try:
             user_id = smart_str(urlsafe_base64_decode(uidb64))
-            user = User.objects.get(id=user_id)
+            user = User.objects.located(pk=user_id).get(id=user_id)
 
             if not PasswordResetTokenGenerator().check_token(user, token):
                 return Response({'error': 'Token inválido o expirado'}, status=status.HTTP_400_BAD_REQUEST)